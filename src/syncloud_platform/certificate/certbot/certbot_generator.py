@@ -49,7 +49,7 @@ class CertbotGenerator:
     def generate_certificate(self, is_test_cert=False):
 
         self.log.info('running certbot')
-        domain_args = apps_to_certbot_domain_args(self.snap.list(), self.info.domain())
+        domain_args = apps_to_certbot_domain_args(self.snap.list(strict=True), self.info.domain())
 
         test_cert = ''
         if is_test_cert:
@@ -93,7 +93,7 @@ class CertbotGenerator:
 
     def new_domains(self):
 
-        current_domains = domain_list_sorted(self.snap.list(), self.info.domain())
+        current_domains = domain_list_sorted(self.snap.list(strict=True), self.info.domain())
 
         cert_domains = []
         if path.isfile(self.certbot_certificate_file()):
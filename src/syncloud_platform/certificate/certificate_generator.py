@@ -28,7 +28,11 @@ class CertificateGenerator:
 
         days_until_expiry = self.certbot_generator.days_until_expiry()
         real_cert = self.is_real_certificate_installed()
-        new_domains = self.certbot_generator.new_domains()
+        try:
+            new_domains = self.certbot_generator.new_domains()
+        except Exception as e:
+            self.log.warn('app list is not available, not regenerating: {0}'.format(e))
+            return
         self.log.info("certbot certificate days until expiry: {}".format(days_until_expiry))
         self.log.info("new domains: {}".format(new_domains))
 
@@ -1,9 +1,11 @@
+import marshal
 import os
 from configparser import ConfigParser
 from os.path import isfile
 from os.path import join
 
 PLATFORM_CONFIG_NAME = 'platform.cfg'
+PLATFORM_CONFIG_CACHE_SUFFIX = '.cache'
 PLATFORM_APP_NAME = 'platform'
 WEB_CERTIFICATE_PORT = 80
 WEB_ACCESS_PORT = 443
@@ -22,14 +24,72 @@ DATA_DIR = env('SNAP_COMMON', 'not_set')
 APP_DATA_PREFIX = 'common/'
 
 
+BOOLEAN_KEYS = ('certbot_test_cert',)
+KEYS = ('apps_root', 'hooks_root', 'data_root', 'configs_root', 'config_root', 'app_dir', 'data_dir', 'config_dir',
+        'bin_dir', 'www_root_public', 'nginx', 'nginx_config_dir', 'log_root', 'log_sender_pattern', 'disk_root',
+        'internal_disk_dir', 'external_disk_dir', 'disk_link', 'ssh_port', 'platform_log', 'rest_internal_log',
+        'rest_public_log', 'cron_user', 'cron_cmd', 'cron_schedule', 'ssl_ca_key_file', 'ssl_ca_certificate_file',
+        'ssl_ca_serial_file', 'ssl_certificate_request_file', 'ssl_key_file', 'ssl_certificate_file',
+        'default_ssl_certificate_file', 'default_ssl_key_file', 'openssl', 'openssl_config', 'channel') + BOOLEAN_KEYS
+
+
+class PlatformConfigValues(object):
+    __slots__ = KEYS
+
+    def __init__(self, values):
+        for key in KEYS:
+            object.__setattr__(self, key, values.get(key))
+
+    def __setattr__(self, name, value):
+        raise AttributeError('PlatformConfigValues is immutable')
+
+
+def compile_values(filename):
+    parser = ConfigParser()
+    parser.read(filename)
+    values = {}
+    for key in KEYS:
+        if parser.has_option('platform', key):
+            if key in BOOLEAN_KEYS:
+                values[key] = parser.getboolean('platform', key)
+            else:
+                values[key] = parser.get('platform', key)
+    return values
+
+
+def load_values(filename, cache_filename):
+    stat = os.stat(filename)
+    stamp = (stat.st_mtime_ns, stat.st_size)
+    try:
+        with open(cache_filename, 'rb') as f:
+            cached_stamp, values = marshal.load(f)
+        if tuple(cached_stamp) == stamp:
+            return values
+    except (IOError, OSError, EOFError, ValueError, TypeError):
+        pass
+
+    values = compile_values(filename)
+    try:
+        temp_filename = '{0}.{1}'.format(cache_filename, os.getpid())
+        with open(temp_filename, 'wb') as f:
+            marshal.dump((stamp, values), f)
+        os.rename(temp_filename, cache_filename)
+    except (IOError, OSError):
+        pass
+    return values
+
+
 class PlatformConfig:
 
-    def __init__(self, config_dir):
-        self.parser = ConfigParser()
+    def __init__(self, config_dir, use_cache=False):
         self.filename = join(config_dir, PLATFORM_CONFIG_NAME)
         if (not isfile(self.filename)):
             raise Exception('platform config does not exist: {0}'.format(self.filename))
-        self.parser.read(self.filename)
+        if use_cache:
+            values = load_values(self.filename, self.filename + PLATFORM_CONFIG_CACHE_SUFFIX)
+        else:
+            values = compile_values(self.filename)
+        self.values = PlatformConfigValues(values)
 
     def apps_root(self):
         return self.__get('apps_root')
@@ -137,10 +197,10 @@ class PlatformConfig:
         return self.__get('hooks_root')
 
     def is_certbot_test_cert(self):
-        return self.parser.getboolean('platform', 'certbot_test_cert')
+        return self.values.certbot_test_cert
 
     def get_channel(self):
         return self.__get('channel')
 
     def __get(self, key):
-        return self.parser.get('platform', key)
+        return getattr(self.values, key)
@@ -0,0 +1,75 @@
+import fcntl
+import mmap
+import os
+import struct
+from os.path import join
+
+from syncloudlib import logger
+from syncloud_platform.config import config
+
+GENERATIONS_FILE = join(config.DATA_DIR, 'generations')
+
+USER_CONFIG = 'user_config'
+PORT_CONFIG = 'port_config'
+APPS = 'apps'
+DISKS = 'disks'
+ACCESS = 'access'
+CHANNELS = [USER_CONFIG, PORT_CONFIG, APPS, DISKS, ACCESS]
+
+COUNTER_FORMAT = '=Q'
+COUNTER_SIZE = struct.calcsize(COUNTER_FORMAT)
+FILE_SIZE = mmap.PAGESIZE
+
+
+class Generations:
+    def __init__(self, filename=GENERATIONS_FILE):
+        self.filename = filename
+        self.log = logger.get_logger('Generations')
+        self.memory = None
+
+    def get(self, channel):
+        memory = self._memory()
+        if not memory:
+            return None
+        return struct.unpack_from(COUNTER_FORMAT, memory, self._offset(channel))[0]
+
+    def bump(self, channel):
+        memory = self._memory()
+        offset = self._offset(channel)
+        if not memory:
+            self._bump_file(offset)
+            return
+        with open(self.filename, 'rb') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            generation = struct.unpack_from(COUNTER_FORMAT, memory, offset)[0]
+            struct.pack_into(COUNTER_FORMAT, memory, offset, generation + 1)
+
+    def _bump_file(self, offset):
+        # other workers may still cache against their mapping of the file, it has to move on
+        if not os.path.exists(self.filename):
+            return
+        with open(self.filename, 'r+b') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            f.seek(offset)
+            data = f.read(COUNTER_SIZE)
+            generation = struct.unpack(COUNTER_FORMAT, data)[0] if len(data) == COUNTER_SIZE else 0
+            f.seek(offset)
+            f.write(struct.pack(COUNTER_FORMAT, generation + 1))
+
+    def _offset(self, channel):
+        return CHANNELS.index(channel) * COUNTER_SIZE
+
+    def _memory(self):
+        if self.memory is None:
+            try:
+                fd = os.open(self.filename, os.O_RDWR | os.O_CREAT, 0o644)
+                try:
+                    if os.fstat(fd).st_size < FILE_SIZE:
+                        os.ftruncate(fd, FILE_SIZE)
+                    self.memory = mmap.mmap(fd, FILE_SIZE)
+                finally:
+                    os.close(fd)
+            except (OSError, IOError) as e:
+                self.log.warn('generations are not shared, caches are disabled: {0}'.format(e))
+                self.memory = False
+        return self.memory
@@ -1,10 +1,14 @@
 import sqlite3
 import os
+import threading
 import uuid
+from contextlib import contextmanager
 from configparser import ConfigParser
 from os.path import isfile, join
 from syncloudlib import logger
+from syncloud_platform import metrics
 from syncloud_platform.config import config
+from syncloud_platform.config.generations import Generations, USER_CONFIG
 
 USER_CONFIG_FILE_OLD = join(config.DATA_DIR, 'user_platform.cfg')
 USER_CONFIG_DB = join(config.DATA_DIR, 'platform.db')
@@ -12,12 +16,33 @@ USER_CONFIG_DB = join(config.DATA_DIR, 'platform.db')
 TRUE = 'true'
 FALSE = 'false'
 
+fork_generation = 0
+# connections opened by a parent process must not be closed (or used) in a forked uwsgi worker
+inherited_connections = []
+
+
+def _after_fork():
+    global fork_generation
+    fork_generation += 1
+
+
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_after_fork)
+
 
 class PlatformUserConfig:
-    def __init__(self, config_db=USER_CONFIG_DB, old_config_file=USER_CONFIG_FILE_OLD):
+    def __init__(self, config_db=USER_CONFIG_DB, old_config_file=USER_CONFIG_FILE_OLD, generations=None):
         self.config_db = config_db
         self.old_config_file = old_config_file
+        self.generations = generations if generations is not None else Generations()
         self.log = logger.get_logger('PlatformUserConfig')
+        self.lock = threading.RLock()
+        self.local = threading.local()
+        self.connection = None
+        self.connection_generation = None
+        self.cache = None
+        self.cache_generation = None
+        self.data_version = None
 
     def init_config(self):
         if not isfile(self.config_db):
@@ -139,6 +164,35 @@ class PlatformUserConfig:
             ('platform.web_secret_key', value)
         ])
 
+    @contextmanager
+    def transaction(self):
+        if self._transaction() is not None:
+            yield
+            return
+        with self.lock:
+            self._connection()
+        connection = sqlite3.connect(self.config_db)
+        connection.set_trace_callback(metrics.count_sqlite)
+        self.local.transaction = connection
+        try:
+            with connection:
+                yield
+        finally:
+            self.local.transaction = None
+            connection.close()
+            with self.lock:
+                self.cache = None
+            self.generations.bump(USER_CONFIG)
+
+    def get_many(self, keys):
+        with self.lock:
+            values = self._load()
+            return dict((key, values.get(key)) for key in keys)
+
+    def snapshot(self):
+        with self.lock:
+            return UserConfigSnapshot(dict(self._load()))
+
     def init_user_config(self):
             
         conn = sqlite3.connect(self.config_db)
@@ -159,29 +213,122 @@ class PlatformUserConfig:
         self.set_web_secret_key(uuid.uuid4().hex)
         os.rename(self.old_config_file, self.old_config_file + '.bak')
 
+    def close(self):
+        with self.lock:
+            if self.connection is not None and self.connection_generation == fork_generation:
+                self.connection.close()
+            self.connection = None
+            self.cache = None
+
+    def _connection(self):
+        if self.connection is None or self.connection_generation != fork_generation:
+            self.init_config()
+            self._open()
+        return self.connection
+
+    def _open(self):
+        if self.connection is not None:
+            if self.connection_generation == fork_generation:
+                self.connection.close()
+            else:
+                inherited_connections.append(self.connection)
+        connection = sqlite3.connect(self.config_db, check_same_thread=False)
+        connection.set_trace_callback(metrics.count_sqlite)
+        connection.execute('PRAGMA journal_mode=WAL')
+        self.connection = connection
+        self.connection_generation = fork_generation
+        self.cache = None
+        self.data_version = None
+
+    def _transaction(self):
+        return getattr(self.local, 'transaction', None)
+
+    def _load(self):
+        transaction = self._transaction()
+        if transaction is not None:
+            return dict(transaction.execute('select key, value from config').fetchall())
+        generation = self.generations.get(USER_CONFIG)
+        if generation is not None and self.cache is not None and generation == self.cache_generation:
+            return self.cache
+        connection = self._connection()
+        data_version = connection.execute('PRAGMA data_version').fetchone()[0]
+        if self.cache is None or data_version != self.data_version:
+            self.cache = dict(connection.execute('select key, value from config').fetchall())
+            self.data_version = data_version
+        self.cache_generation = generation
+        return self.cache
+
     def _upsert(self, key_values):
-        self.init_config()
-        conn = sqlite3.connect(self.config_db)
-        with conn:
-            for key, value in key_values:
-                if value is not None:
-                    self.log.info('setting {0}={1}'.format(key, value))
-                    conn.execute('INSERT OR REPLACE INTO config VALUES (?, ?)', (key, value))
-        conn.close() 
+        transaction = self._transaction()
+        if transaction is not None:
+            self._execute_upsert(transaction, key_values)
+            return
+        with self.lock:
+            connection = self._connection()
+            with connection:
+                self._execute_upsert(connection, key_values)
+            # own commits do not change data_version, column affinity may also change the stored value
+            self.cache = None
+        self.generations.bump(USER_CONFIG)
+
+    def _execute_upsert(self, connection, key_values):
+        for key, value in key_values:
+            if value is not None:
+                self.log.info('setting {0}={1}'.format(key, value))
+                connection.execute('INSERT OR REPLACE INTO config VALUES (?, ?)', (key, value))
 
     def _get(self, key, default_value=None):
-        self.init_config()
-        conn = sqlite3.connect(self.config_db)
-        cursor = conn.cursor()
-        cursor.execute('select value from config where key = ?', (key,))
-        row = cursor.fetchone()
-        conn.close()
-        if row:
-            return row[0]
-        
+        with self.lock:
+            value = self._load().get(key)
+        if value is not None:
+            return value
+
         return default_value
- 
- 
+
+
+class UserConfigSnapshot(object):
+    __slots__ = ('_values',)
+
+    def __init__(self, values):
+        object.__setattr__(self, '_values', values)
+
+    def __setattr__(self, name, value):
+        raise AttributeError('UserConfigSnapshot is immutable')
+
+    def _get(self, key, default_value=None):
+        value = self._values.get(key)
+        if value is not None:
+            return value
+        return default_value
+
+    def get_redirect_api_url(self):
+        return self._get('redirect.api_url', 'http://api.syncloud.it')
+
+    def get_domain_update_token(self):
+        return self._get('platform.domain_update_token')
+
+    def is_redirect_enabled(self):
+        return to_bool(self._get('platform.redirect_enabled'))
+
+    def get_external_access(self):
+        return to_bool(self._get('platform.external_access'))
+
+    def get_upnp(self):
+        return to_bool(self._get('platform.upnp'), True)
+
+    def get_public_ip(self):
+        return self._get('platform.public_ip')
+
+    def get_manual_certificate_port(self):
+        return self._get('platform.manual_certificate_port')
+
+    def get_manual_access_port(self):
+        return self._get('platform.manual_access_port')
+
+    def get_dkim_key(self):
+        return self._get('dkim_key')
+
+
 def to_bool(db_value, default=False):
     if db_value is None:
         return default
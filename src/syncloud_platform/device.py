@@ -28,10 +28,10 @@ class Device:
         redirect_api_url = 'http://api.' + main_domain
 
         self.logger.info("prepare redirect {0}, {1}".format(redirect_email, redirect_api_url))
-        self.user_platform_config.set_redirect_enabled(True)
-        
-        self.user_platform_config.update_redirect(main_domain, redirect_api_url)
-        self.user_platform_config.set_user_email(redirect_email)
+        with self.user_platform_config.transaction():
+            self.user_platform_config.set_redirect_enabled(True)
+            self.user_platform_config.update_redirect(main_domain, redirect_api_url)
+            self.user_platform_config.set_user_email(redirect_email)
 
         user = self.redirect_service.get_user(redirect_email, redirect_password)
         return user
@@ -41,15 +41,19 @@ class Device:
         self.logger.info("activate {0}, {1}".format(user_domain_lower, device_username))
         
         self._check_internet_connection()
-        
+
         user = self.prepare_redirect(redirect_email, redirect_password, main_domain)
-        self.user_platform_config.set_user_update_token(user.update_token)
-      
+
         name, email = parse_username(device_username, '{0}.{1}'.format(user_domain_lower, main_domain))
-     
+
         response_data = self.redirect_service.acquire(redirect_email, redirect_password, user_domain_lower)
-        self.user_platform_config.update_domain(response_data.user_domain, response_data.update_token)
-   
+
+        # only config writes in the transaction, hooks and the api must see the committed state
+        with self.user_platform_config.transaction():
+            self.user_platform_config.set_user_update_token(user.update_token)
+            self.user_platform_config.update_domain(response_data.user_domain, response_data.update_token)
+            self.user_platform_config.set_web_secret_key(uuid.uuid4().hex)
+
         self._activate_common(name, device_username, device_password, email)
 
     def activate_custom_domain(self, full_domain, device_username, device_password):
@@ -57,13 +61,15 @@ class Device:
         self.logger.info("activate custom {0}, {1}".format(full_domain_lower, device_username))
         
         self._check_internet_connection()
-        
-        self.user_platform_config.set_redirect_enabled(False)
-        self.user_platform_config.set_custom_domain(full_domain_lower)
 
         name, email = parse_username(device_username, full_domain_lower)
-        self.user_platform_config.set_user_email(email)
-       
+
+        with self.user_platform_config.transaction():
+            self.user_platform_config.set_redirect_enabled(False)
+            self.user_platform_config.set_custom_domain(full_domain_lower)
+            self.user_platform_config.set_user_email(email)
+            self.user_platform_config.set_web_secret_key(uuid.uuid4().hex)
+
         self._activate_common(name, device_username, device_password, email)
         
     def _activate_common(self, name, device_username, device_password, email):
@@ -74,7 +80,6 @@ class Device:
         self.set_access(False, False, None, 0, 0)
 
         self.logger.info("activating ldap")
-        self.user_platform_config.set_web_secret_key(unicode(uuid.uuid4().hex))
 
         self.tls.generate_self_signed_certificate()
 
@@ -107,12 +112,13 @@ class Device:
     def set_access(self, upnp_enabled, external_access, manual_public_ip, manual_certificate_port, manual_access_port):
         self.logger.info('set_access: external_access={0}'.format(external_access))
 
-        update_token = self.user_platform_config.get_domain_update_token()
+        user_config = self.user_platform_config.snapshot()
+        update_token = user_config.get_domain_update_token()
         if update_token is None:
             return
         
         drill = self.port_drill_factory.get_drill(upnp_enabled, external_access, manual_public_ip,
-                                                  manual_certificate_port, manual_access_port)
+                                                  manual_certificate_port, manual_access_port, user_config)
 
         if drill is None:
             self.logger.error('Will not change access mode. Was not able to get working port mapper.')
@@ -127,23 +133,20 @@ class Device:
         external_ip = drill.external_ip()
         
         self.redirect_service.sync(external_ip, router_port, WEB_ACCESS_PORT, WEB_PROTOCOL,
-                                   update_token, external_access)
+                                   update_token, external_access, user_config)
         self.user_platform_config.update_device_access(upnp_enabled, external_access,
                                                        manual_public_ip, manual_certificate_port, manual_access_port)
         self.event_trigger.trigger_app_event_domain()
 
-    def sync_all(self):
-        update_token = self.user_platform_config.get_domain_update_token()
+    def sync_all(self, user_config=None):
+        if user_config is None:
+            user_config = self.user_platform_config.snapshot()
+        update_token = user_config.get_domain_update_token()
         if update_token is None:
             return
 
-        external_access = self.user_platform_config.get_external_access()
-        upnp = self.user_platform_config.get_upnp()
-        public_ip = self.user_platform_config.get_public_ip()
-        manual_certificate_port = self.user_platform_config.get_manual_certificate_port()
-        manual_access_port = self.user_platform_config.get_manual_access_port()
-        port_drill = self.port_drill_factory.get_drill(upnp, external_access, public_ip,
-                                                       manual_certificate_port, manual_access_port)
+        external_access = user_config.get_external_access()
+        port_drill = self.port_drill_factory.get_current_drill(user_config)
         try:
             port_drill.sync_existing_ports()
         except Exception as e:
@@ -157,29 +160,17 @@ class Device:
         external_ip = port_drill.external_ip()
         
         self.redirect_service.sync(external_ip, router_port, WEB_ACCESS_PORT, WEB_PROTOCOL,
-                                   update_token, external_access)
+                                   update_token, external_access, user_config)
 
         if not getpass.getuser() == self.platform_config.cron_user():
             fs.chownpath(self.platform_config.data_dir(), self.platform_config.cron_user())
 
     def add_port(self, local_port, protocol):
-        external_access = self.user_platform_config.get_external_access()
-        upnp = self.user_platform_config.get_upnp()
-        public_ip = self.user_platform_config.get_public_ip()
-        manual_certificate_port = self.user_platform_config.get_manual_certificate_port()
-        manual_access_port = self.user_platform_config.get_manual_access_port()
-        drill = self.port_drill_factory.get_drill(upnp, external_access, public_ip,
-                                                  manual_certificate_port, manual_access_port)
+        drill = self.port_drill_factory.get_current_drill(self.user_platform_config.snapshot())
         drill.sync_new_port(local_port, protocol)
 
     def remove_port(self, local_port, protocol):
-        external_access = self.user_platform_config.get_external_access()
-        upnp = self.user_platform_config.get_upnp()
-        public_ip = self.user_platform_config.get_public_ip()
-        manual_certificate_port = self.user_platform_config.get_manual_certificate_port()
-        manual_access_port = self.user_platform_config.get_manual_access_port()
-        drill = self.port_drill_factory.get_drill(upnp, external_access, public_ip,
-                                                  manual_certificate_port, manual_access_port)
+        drill = self.port_drill_factory.get_current_drill(self.user_platform_config.snapshot())
         drill.remove(local_port, protocol)
 
 
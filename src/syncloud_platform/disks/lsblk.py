@@ -141,7 +141,9 @@ class LsblkEntry:
         return match.group(1)
 
 
-class Partition:
+class Partition(object):
+    __slots__ = ('size', 'device', 'mount_point', 'active', 'fs_type', 'mountable', 'extendable')
+
     def __init__(self, size, device, mount_point, active, fs_type, mountable):
         self.size = size
         self.device = device
@@ -161,7 +163,9 @@ class Partition:
         return '{0}, {1}, {2}, {3}'.format(self.device, self.size, self.mount_point, self.active)
 
 
-class Disk:
+class Disk(object):
+    __slots__ = ('name', 'partitions', 'device', 'size', 'active')
+
     def __init__(self, name, device, size, partitions):
         
         if name == '':
@@ -4,8 +4,8 @@ from subprocess import check_output, CalledProcessError
 
 
 class EventTrigger:
-    def __init__(self, installer):
-        self.installer = installer
+    def __init__(self, installed_snaps):
+        self.installed_snaps = installed_snaps
         self.log = logger.get_logger('events')
 
     def trigger_app_event_disk(self):
@@ -15,16 +15,14 @@ class EventTrigger:
         self._trigger_app_event('access-change')
 
     def _trigger_app_event(self, action):
-        for app in self.installer.installed_all_apps():
-            app_id = app.app.id
+        for snap in self.installed_snaps.list():
+            app_id = snap['name']
             try:
-                info = check_output('snap info {0}'.format(app_id), shell=True)
-                command = '{0}.{1}'.format(app_id, action)
-                if command in info:
+                if self.installed_snaps.has_app(app_id, action):
+                    command = '{0}.{1}'.format(app_id, action)
                     self.log.info('executing {0}: {1}'.format(app_id, action))
                     output = check_output('snap run {0}'.format(command), shell=True)
                     print(output)
             except CalledProcessError as e:
                 self.log.error('event error: {0}'.format(e.output))
                 self.log.error(traceback.format_exc())
-
@@ -7,6 +7,7 @@ from syncloudlib import logger
 from syncloud_platform.auth.ldapauth import LdapAuth
 from syncloud_platform.config.config import PlatformConfig, PLATFORM_APP_NAME
 from syncloud_platform.config.user_config import PlatformUserConfig
+from syncloud_platform.config.generations import Generations
 from syncloud_platform.control.systemctl import Systemctl
 from syncloud_platform.device import Device
 from syncloud_platform.insider.cron import PlatformCron
@@ -15,12 +16,22 @@ from syncloud_platform.insider.natpmpc import NatPmpPortMapper
 from syncloud_platform.insider.port_config import PortConfig
 from syncloud_platform.insider.port_drill import PortDrillFactory
 from syncloud_platform.insider.port_mapper_factory import PortMapperFactory
+from syncloud_platform.insider.mapper_health import MapperHealth
 from syncloud_platform.insider.redirect_service import RedirectService
 from syncloud_platform.insider.upnpc import UpnpPortMapper
+from syncloud_platform.insider.igd import PersistedIgd
 from syncloud_platform.log.aggregator import Aggregator
 from syncloud_platform.rest.facade.internal import Internal
 from syncloud_platform.rest.facade.public import Public
 from syncloud_platform.snap.snap import Snap
+from syncloud_platform.snap.snapd import SnapdClient
+from syncloud_platform.snap.store_cache import StoreCache
+from syncloud_platform.snap.icon_cache import IconCache
+from syncloud_platform.rest.response_cache import ResponseCache
+from syncloud_platform.rest.backend_proxy import BackendProxy
+from syncloud_platform.operations import Operations
+from syncloud_platform.metrics import Metrics
+from syncloud_platform.snap.installed import InstalledSnaps
 from syncloud_platform.disks.lsblk import Lsblk
 from syncloud_platform.disks.path_checker import PathChecker
 from syncloud_platform.events import EventTrigger
@@ -46,14 +57,15 @@ def get_injector(debug=False):
 
 class Injector:
     def __init__(self, debug=False, config_dir=None):
-        self.platform_config = PlatformConfig(config_dir=config_dir)
+        self.platform_config = PlatformConfig(config_dir=config_dir, use_cache=True)
 
         if not logger.factory_instance:
             console = True if debug else False
             level = logging.DEBUG if debug else logging.INFO
             logger.init(level, console, join(self.platform_config.get_platform_log()))
 
-        self.user_platform_config = PlatformUserConfig()
+        self.generations = Generations()
+        self.user_platform_config = PlatformUserConfig(generations=self.generations)
 
         self.log_aggregator = Aggregator(self.platform_config)
 
@@ -61,19 +73,31 @@ class Injector:
         self.platform_app_paths.get_data_dir()
         self.versions = Versions(self.platform_config)
         self.redirect_service = RedirectService(self.user_platform_config, self.versions)
-        self.port_config = PortConfig(self.platform_app_paths.get_data_dir())
+        self.port_config = PortConfig(self.platform_app_paths.get_data_dir(), self.generations)
 
+        self.network = Network()
         self.nat_pmp_port_mapper = NatPmpPortMapper()
-        self.upnp_port_mapper = UpnpPortMapper(UPnP())
+        self.igd = PersistedIgd(UPnP(), join(self.platform_config.data_dir(), 'upnp_igd.json'), self.network)
+        self.upnp_port_mapper = UpnpPortMapper(self.igd)
         self.port_mapper_factory = PortMapperFactory(self.nat_pmp_port_mapper, self.upnp_port_mapper)
+        self.mapper_health = MapperHealth(self.port_mapper_factory, self.network,
+                                          join(self.platform_config.data_dir(), 'mapper_health.json'))
         self.port_drill_factory = PortDrillFactory(self.user_platform_config, self.port_config,
-                                                   self.port_mapper_factory)
-        self.device_info = DeviceInfo(self.user_platform_config, self.port_config)
-        self.snap = Snap(self.platform_config, self.device_info)
+                                                   self.mapper_health)
+        self.device_info = DeviceInfo(self.user_platform_config, self.port_config, self.generations)
+        self.snapd = SnapdClient()
+        self.store_cache = StoreCache(join(self.platform_config.data_dir(), 'cache', 'store'))
+        self.installed_snaps = InstalledSnaps(self.snapd)
+        self.icon_cache = IconCache(join(self.platform_config.data_dir(), 'cache', 'images'))
+        self.response_cache = ResponseCache(self.generations)
+        self.backend_proxy = BackendProxy()
+        self.operations = Operations()
+        self.metrics = Metrics()
+        self.snap = Snap(self.platform_config, self.device_info, self.snapd, self.store_cache, self.installed_snaps)
         self.platform_cron = PlatformCron(self.platform_config)
         self.systemctl = Systemctl(self.platform_config)
         self.ldap_auth = LdapAuth(self.platform_config, self.systemctl)
-        self.event_trigger = EventTrigger(self.snap)
+        self.event_trigger = EventTrigger(self.installed_snaps)
         self.nginx = Nginx(self.platform_config, self.systemctl, self.device_info)
         self.certbot_genetator = CertbotGenerator(self.platform_config, self.user_platform_config,
                                                   self.device_info, self.snap)
@@ -89,10 +113,9 @@ class Injector:
         self.lsblk = Lsblk(self.platform_config, self.path_checker)
         self.hardware = Hardware(self.platform_config, self.event_trigger,
                                  self.lsblk, self.path_checker, self.systemctl)
-        self.network = Network()
         self.public = Public(self.platform_config, self.user_platform_config, self.device, self.device_info, self.snap,
                              self.hardware, self.redirect_service, self.log_aggregator, self.certbot_genetator,
-                             self.port_mapper_factory, self.network, self.port_config)
+                             self.mapper_health, self.network, self.port_config)
 
     def get_app_paths(self, app_name):
         return AppPaths(app_name, self.platform_config)
@@ -1,4 +1,5 @@
-class Port:
+class Port(object):
+    __slots__ = ('local_port', 'external_port', 'protocol')
 
     def __init__(self, local_port, external_port, protocol):
         self.local_port = local_port
@@ -1,3 +1,4 @@
+from syncloud_platform.config.generations import USER_CONFIG, PORT_CONFIG
 from syncloud_platform.insider.util import protocol_to_port, secure_to_protocol
 
 
@@ -12,12 +13,28 @@ def construct_url(external_port, domain, app=None):
     return 'https://{0}{1}{2}'.format(app_string, domain, external_port)
 
 
+class UrlBuilder:
+    def __init__(self, external_port, domain):
+        self.external_port = external_port
+        self.domain = domain
+
+    def url(self, app=None):
+        if not self.domain:
+            return None
+        return construct_url(self.external_port, self.domain, app)
+
+
 class DeviceInfo:
-    def __init__(self, user_platform_config, port_config):
+    def __init__(self, user_platform_config, port_config, generations=None):
         self.port_config = port_config
         self.user_platform_config = user_platform_config
+        self.generations = generations
+        self.cache = (None, {})
 
     def domain(self):
+        return self._cached('domain', self._domain)
+
+    def _domain(self):
         if self.user_platform_config.is_redirect_enabled():
             user_domain = self.user_platform_config.get_user_domain()
             if user_domain is not None:
@@ -32,14 +49,36 @@ class DeviceInfo:
         return '{0}.{1}'.format(app_name, self.domain())
 
     def url(self, app=None):
+        return self.url_builder().url(app)
+
+    def url_builder(self):
+        return UrlBuilder(self._cached('port', self._port), self.domain())
+
+    def _port(self):
         port = 443
         if self.user_platform_config.get_external_access():
             mapping = self.port_config.get(port, 'TCP')
             if mapping:
                 port = mapping.external_port
+        return port
 
-        domain_name = self.domain()
-        if domain_name:
-            return construct_url(port, domain_name, app)
-        else:
-            ''
+    def _cached(self, key, load):
+        generation = self._generation()
+        if generation is None:
+            return load()
+        cache_generation, cache = self.cache
+        if generation != cache_generation:
+            cache = {}
+            self.cache = (generation, cache)
+        if key not in cache:
+            cache[key] = load()
+        return cache[key]
+
+    def _generation(self):
+        if self.generations is None:
+            return None
+        user_config = self.generations.get(USER_CONFIG)
+        port_config = self.generations.get(PORT_CONFIG)
+        if user_config is None or port_config is None:
+            return None
+        return user_config, port_config
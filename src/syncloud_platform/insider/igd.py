@@ -0,0 +1,203 @@
+import json
+import os
+import threading
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+import requests
+from syncloudlib import logger
+
+SOAP_TIMEOUT = 5
+SERVICE_TYPES = ['urn:schemas-upnp-org:service:WANIPConnection:1',
+                 'urn:schemas-upnp-org:service:WANPPPConnection:1']
+INVALID_ACTION = 401
+ARRAY_INDEX_INVALID = 713
+
+ENVELOPE = '<?xml version="1.0"?>' \
+           '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/" ' \
+           's:encodingStyle="http://schemas.xmlsoap.org/soap/encoding/">' \
+           '<s:Body><u:{0} xmlns:u="{1}">{2}</u:{0}></s:Body></s:Envelope>'
+
+
+class UpnpError(Exception):
+    def __init__(self, code, description):
+        Exception.__init__(self, 'upnp error {0}: {1}'.format(code, description))
+        self.code = code
+        self.description = description
+
+
+def local_name(tag):
+    return tag.split('}')[-1]
+
+
+def values(content):
+    return dict((local_name(element.tag), element.text or '') for element in ElementTree.fromstring(content).iter())
+
+
+class Igd:
+
+    def __init__(self, control_url, service_type, lanaddr, timeout=SOAP_TIMEOUT):
+        self.control_url = control_url
+        self.service_type = service_type
+        self.lanaddr = lanaddr
+        self.timeout = timeout
+
+    def soap(self, action, arguments):
+        body = ENVELOPE.format(action, self.service_type, ''.join(
+            '<{0}>{1}</{0}>'.format(name, escape(str(value))) for name, value in arguments))
+        headers = {'Content-Type': 'text/xml; charset="utf-8"',
+                   'SOAPAction': '"{0}#{1}"'.format(self.service_type, action)}
+        response = requests.post(self.control_url, data=body.encode(), headers=headers, timeout=self.timeout)
+        if response.status_code == 500:
+            try:
+                fault = values(response.content)
+            except ElementTree.ParseError:
+                fault = {}
+            if 'errorCode' in fault:
+                raise UpnpError(int(fault['errorCode']), fault.get('errorDescription'))
+        response.raise_for_status()
+        return values(response.content)
+
+    def externalipaddress(self):
+        return self.soap('GetExternalIPAddress', [])['NewExternalIPAddress']
+
+    def getgenericportmapping(self, index):
+        try:
+            result = self.soap('GetGenericPortMappingEntry', [('NewPortMappingIndex', index)])
+        except UpnpError as e:
+            if e.code == ARRAY_INDEX_INVALID:
+                return None
+            raise
+        return int(result['NewExternalPort']), result['NewProtocol'], \
+            (result['NewInternalClient'], int(result['NewInternalPort'])), \
+            result['NewPortMappingDescription'], result['NewEnabled'], result['NewRemoteHost'], \
+            int(result['NewLeaseDuration'] or 0)
+
+    def addportmapping(self, external_port, protocol, local_ip, local_port, description, remote_host):
+        self.soap('AddPortMapping', [('NewRemoteHost', remote_host),
+                                     ('NewExternalPort', external_port),
+                                     ('NewProtocol', protocol),
+                                     ('NewInternalPort', local_port),
+                                     ('NewInternalClient', local_ip),
+                                     ('NewEnabled', 1),
+                                     ('NewPortMappingDescription', description),
+                                     ('NewLeaseDuration', 0)])
+        return True
+
+    def deleteportmapping(self, external_port, protocol):
+        self.soap('DeletePortMapping', [('NewRemoteHost', ''),
+                                        ('NewExternalPort', external_port),
+                                        ('NewProtocol', protocol)])
+        return True
+
+
+class PersistedIgd:
+
+    def __init__(self, upnp, filename, network, timeout=SOAP_TIMEOUT):
+        self.upnp = upnp
+        self.filename = filename
+        self.network = network
+        self.timeout = timeout
+        self.logger = logger.get_logger('PersistedIgd')
+        self.lock = threading.Lock()
+        self.igd = None
+
+    @property
+    def lanaddr(self):
+        return self._igd().lanaddr
+
+    def discover(self):
+        with self.lock:
+            state = self._load()
+            if state is not None and self._is_current(state):
+                self.igd = self._to_igd(state)
+            else:
+                self.igd = self._discover()
+
+    def selectigd(self):
+        return self._igd().control_url
+
+    def externalipaddress(self):
+        return self._call('externalipaddress')
+
+    def getgenericportmapping(self, index):
+        return self._call('getgenericportmapping', index)
+
+    def addportmapping(self, external_port, protocol, local_ip, local_port, description, remote_host):
+        return self._call('addportmapping', external_port, protocol, local_ip, local_port, description, remote_host)
+
+    def deleteportmapping(self, external_port, protocol):
+        return self._call('deleteportmapping', external_port, protocol)
+
+    def _igd(self):
+        if self.igd is None:
+            self.discover()
+        return self.igd
+
+    def _call(self, name, *args):
+        igd = self._igd()
+        try:
+            return getattr(igd, name)(*args)
+        except UpnpError:
+            raise
+        except Exception as e:
+            self.logger.warn('{0} failed on {1}: {2}'.format(name, igd.control_url, e))
+        with self.lock:
+            if self.igd is igd:
+                # another process may have already rediscovered the router
+                state = self._load()
+                if state is not None and state['control_url'] != igd.control_url and self._is_current(state):
+                    self.igd = self._to_igd(state)
+                else:
+                    self.igd = self._discover()
+            igd = self.igd
+        return getattr(igd, name)(*args)
+
+    def _discover(self):
+        self.logger.info('discovering upnp gateway')
+        self.upnp.discover()
+        control_url = self.upnp.selectigd()
+        lanaddr = self.upnp.lanaddr
+        service_type = self._service_type(control_url, lanaddr)
+        state = dict(control_url=control_url, service_type=service_type, lanaddr=lanaddr,
+                     gateway=self.network.default_gateway())
+        self.logger.info('selected upnp gateway: {0}'.format(state))
+        self._save(state)
+        return self._to_igd(state)
+
+    def _service_type(self, control_url, lanaddr):
+        for service_type in SERVICE_TYPES:
+            try:
+                Igd(control_url, service_type, lanaddr, self.timeout).externalipaddress()
+                return service_type
+            except UpnpError as e:
+                if e.code != INVALID_ACTION:
+                    return service_type
+            except requests.exceptions.HTTPError:
+                pass
+        raise Exception('{0} does not support any of {1}'.format(control_url, SERVICE_TYPES))
+
+    def _is_current(self, state):
+        return state['gateway'] == self.network.default_gateway() and state['lanaddr'] in self.network.addresses()
+
+    def _to_igd(self, state):
+        return Igd(state['control_url'], state['service_type'], state['lanaddr'], self.timeout)
+
+    def _load(self):
+        try:
+            with open(self.filename) as f:
+                return json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+
+    def _save(self, state):
+        try:
+            directory = os.path.dirname(self.filename)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            temp_filename = '{0}.{1}.{2}'.format(self.filename, os.getpid(), threading.current_thread().ident)
+            with open(temp_filename, 'w') as f:
+                json.dump(state, f)
+            os.rename(temp_filename, self.filename)
+        except (IOError, OSError) as e:
+            self.logger.warn('unable to save upnp gateway: {0}'.format(e))
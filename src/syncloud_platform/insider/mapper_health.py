@@ -0,0 +1,133 @@
+import fcntl
+import json
+import os
+import threading
+import time
+
+from syncloudlib import logger
+
+PROBE_INTERVAL = 300
+CHECK_INTERVAL = 30
+
+
+class MapperHealth:
+
+    def __init__(self, port_mapper_factory, network, status_file, interval=PROBE_INTERVAL,
+                 check_interval=CHECK_INTERVAL):
+        self.port_mapper_factory = port_mapper_factory
+        self.network = network
+        self.status_file = status_file
+        self.interval = interval
+        self.check_interval = check_interval
+        self.logger = logger.get_logger('MapperHealth')
+        self.lock = threading.Lock()
+        self.memory = None
+        self.monitor = None
+        self.monitor_pid = None
+        self.probing = None
+
+    def status(self):
+        self.start()
+        status = self._read()
+        if status is None or self._is_due(status):
+            self.probe_in_background()
+        if status is None:
+            return dict(mapper=None, external_ip=None, checked=None)
+        return dict(mapper=status['mapper'], external_ip=status['external_ip'], checked=status['checked'])
+
+    def provide_mapper(self):
+        mapper, external_ip = self.port_mapper_factory.find_mapper()
+        self._write(dict(mapper=mapper.name() if mapper is not None else None,
+                         external_ip=external_ip,
+                         checked=time.time(),
+                         network=self._network()))
+        return mapper
+
+    def probe_in_background(self):
+        with self.lock:
+            if self.probing is not None:
+                return self.probing
+            thread = threading.Thread(target=self._background_probe)
+            thread.daemon = True
+            self.probing = thread
+        thread.start()
+        return thread
+
+    def start(self):
+        pid = os.getpid()
+        with self.lock:
+            if self.monitor is not None and self.monitor_pid == pid:
+                return
+            thread = threading.Thread(target=self._monitor)
+            thread.daemon = True
+            self.monitor = thread
+            self.monitor_pid = pid
+        thread.start()
+
+    def _monitor(self):
+        while True:
+            time.sleep(self.check_interval)
+            try:
+                status = self._read()
+                if status is None or self._is_due(status):
+                    self._background_probe()
+            except Exception as e:
+                self.logger.warn('mapper health check failed: {0}'.format(e))
+
+    def _background_probe(self):
+        try:
+            directory = os.path.dirname(self.status_file)
+            if not os.path.isdir(directory):
+                os.makedirs(directory)
+            with open(self.status_file + '.lock', 'a') as lock:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except (IOError, OSError):
+                    self.logger.info('mappers are being probed by another process')
+                    return
+                status = self._read()
+                if status is None or self._is_due(status):
+                    self.provide_mapper()
+        except Exception as e:
+            self.logger.warn('unable to probe mappers: {0}'.format(e))
+        finally:
+            with self.lock:
+                if self.probing is threading.current_thread():
+                    self.probing = None
+
+    def _is_due(self, status):
+        if time.time() - status['checked'] > self.interval:
+            return True
+        if status['network'] != self._network():
+            self.logger.info('network changed, probing mappers')
+            return True
+        return False
+
+    def _network(self):
+        return [self.network.default_gateway(), sorted(self.network.addresses())]
+
+    def _read(self):
+        try:
+            mtime = os.stat(self.status_file).st_mtime_ns
+        except OSError:
+            return None
+        cached = self.memory
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            with open(self.status_file) as f:
+                status = json.load(f)
+        except (IOError, OSError, ValueError) as e:
+            self.logger.warn('unable to read {0}: {1}'.format(self.status_file, e))
+            return None
+        self.memory = (mtime, status)
+        return status
+
+    def _write(self, status):
+        directory = os.path.dirname(self.status_file)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        temp_filename = '{0}.{1}.{2}'.format(self.status_file, os.getpid(), threading.current_thread().ident)
+        with open(temp_filename, 'w') as f:
+            json.dump(status, f)
+        os.rename(temp_filename, self.status_file)
@@ -0,0 +1,171 @@
+import asyncio
+import os
+import threading
+from concurrent.futures import TimeoutError
+
+from syncloudlib import logger
+
+from syncloud_platform.insider import NATPMP
+
+RETRIES = 9
+INITIAL_TIMEOUT = 0.25
+CANCEL_CHECK_INTERVAL = 0.05
+NATPMP_VERSION = 0
+PUBLIC_ADDRESS_OPCODE = 128
+
+
+class AsyncNatPmpClient(asyncio.DatagramProtocol):
+
+    def __init__(self, gateway, port=NATPMP.NATPMP_PORT, retries=RETRIES, initial_timeout=INITIAL_TIMEOUT):
+        self.gateway = gateway
+        self.port = port
+        self.retries = retries
+        self.initial_timeout = initial_timeout
+        self.logger = logger.get_logger('AsyncNatPmpClient')
+        self.transport = None
+        self.connecting = None
+        self.pending = {}
+
+    async def public_address(self):
+        response = await self.request((PUBLIC_ADDRESS_OPCODE,), NATPMP.PublicAddressRequest())
+        return response.ip
+
+    async def map_port(self, protocol, public_port, private_port, lifetime=3600):
+        if protocol not in [NATPMP.NATPMP_PROTOCOL_UDP, NATPMP.NATPMP_PROTOCOL_TCP]:
+            raise ValueError("Must be either NATPMP_PROTOCOL_UDP or NATPMP_PROTOCOL_TCP")
+        request = NATPMP.PortMapRequest(protocol, private_port, public_port, lifetime)
+        return await self.request((128 + protocol, private_port), request)
+
+    async def map_ports(self, mappings):
+        return await asyncio.gather(*[self.map_port(*mapping) for mapping in mappings])
+
+    async def request(self, key, request):
+        # responses only carry the opcode and the private port, one request per key is in flight
+        while key in self.pending:
+            await asyncio.wait([self.pending[key]])
+        await self.connect()
+        future = asyncio.get_event_loop().create_future()
+        self.pending[key] = future
+        try:
+            timeout = self.initial_timeout
+            for attempt in range(self.retries):
+                if self.transport is None:
+                    break
+                self.transport.sendto(request.toBytes())
+                try:
+                    response = await asyncio.wait_for(asyncio.shield(future), timeout)
+                except asyncio.TimeoutError:
+                    timeout *= 2
+                    continue
+                if response.result != NATPMP.NATPMP_RESULT_SUCCESS:
+                    raise NATPMP.NATPMPResultError(response.result, NATPMP.error_str(response.result), response)
+                return response
+            raise NATPMP.NATPMPUnsupportedError(NATPMP.NATPMP_GATEWAY_NO_SUPPORT,
+                                                NATPMP.error_str(NATPMP.NATPMP_GATEWAY_NO_SUPPORT))
+        finally:
+            del self.pending[key]
+            if not future.done():
+                future.cancel()
+
+    async def connect(self):
+        if self.connecting is None:
+            self.connecting = asyncio.ensure_future(asyncio.get_event_loop().create_datagram_endpoint(
+                lambda: self, remote_addr=(self.gateway, self.port)))
+        try:
+            await self.connecting
+        except Exception:
+            self.connecting = None
+            raise
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def connection_lost(self, exc):
+        self.transport = None
+        self.connecting = None
+
+    def error_received(self, exc):
+        # icmp port unreachable, nothing listens for NAT-PMP on the gateway
+        self.logger.info('{0}:{1}: {2}'.format(self.gateway, self.port, exc))
+        for future in self.pending.values():
+            if not future.done():
+                future.set_exception(NATPMP.NATPMPUnsupportedError(
+                    NATPMP.NATPMP_GATEWAY_NO_SUPPORT, NATPMP.error_str(NATPMP.NATPMP_GATEWAY_NO_SUPPORT)))
+
+    def datagram_received(self, data, addr):
+        if addr[0] != self.gateway or addr[1] != self.port or len(data) < 12:
+            return
+        version, opcode = bytearray(data[:2])
+        if version != NATPMP_VERSION:
+            return
+        if opcode == PUBLIC_ADDRESS_OPCODE:
+            response = NATPMP.PublicAddressResponse(data[:12])
+            key = (opcode,)
+        elif opcode > PUBLIC_ADDRESS_OPCODE and len(data) >= 16:
+            response = NATPMP.PortMapResponse(data[:16])
+            key = (opcode, response.private_port)
+        else:
+            return
+        future = self.pending.get(key)
+        if future is not None and not future.done():
+            future.set_result(response)
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+
+
+class NatPmpClient:
+
+    def __init__(self, gateway=None, port=NATPMP.NATPMP_PORT, retries=RETRIES, initial_timeout=INITIAL_TIMEOUT):
+        self.gateway = gateway
+        self.port = port
+        self.retries = retries
+        self.initial_timeout = initial_timeout
+        self.lock = threading.Lock()
+        self.loop = None
+        self.loop_pid = None
+        self.client = None
+
+    def get_public_address(self, cancelled=None):
+        return self._run(lambda client: client.public_address(), cancelled)
+
+    def map_port(self, protocol, public_port, private_port, lifetime=3600):
+        return self._run(lambda client: client.map_port(protocol, public_port, private_port, lifetime))
+
+    def map_ports(self, mappings):
+        return self._run(lambda client: client.map_ports(mappings))
+
+    def _run(self, call, cancelled=None):
+        gateway = self.gateway
+        if gateway is None:
+            gateway = NATPMP.get_gateway_addr()
+        loop, client = self._client(gateway)
+        future = asyncio.run_coroutine_threadsafe(call(client), loop)
+        if cancelled is None:
+            return future.result()
+        while True:
+            try:
+                return future.result(timeout=CANCEL_CHECK_INTERVAL)
+            except TimeoutError:
+                if cancelled.is_set():
+                    # stops the retransmits and frees the request slot for the next probe
+                    future.cancel()
+                    raise NATPMP.NATPMPError('cancelled')
+
+    def _client(self, gateway):
+        pid = os.getpid()
+        with self.lock:
+            if self.loop is None or self.loop_pid != pid:
+                loop = asyncio.new_event_loop()
+                thread = threading.Thread(target=loop.run_forever)
+                thread.daemon = True
+                thread.start()
+                self.loop = loop
+                self.loop_pid = pid
+                self.client = None
+            if self.client is None or self.client.gateway != gateway:
+                if self.client is not None:
+                    self.loop.call_soon_threadsafe(self.client.close)
+                self.client = AsyncNatPmpClient(gateway, self.port, self.retries, self.initial_timeout)
+            return self.loop, self.client
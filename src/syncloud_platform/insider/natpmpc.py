@@ -1,27 +1,30 @@
-import NATPMP
 from syncloudlib import logger
 
+from syncloud_platform.insider import NATPMP
+from syncloud_platform.insider.natpmp_client import NatPmpClient
+
 
 class NatPmpPortMapper:
 
-    def __init__(self):
+    def __init__(self, client=None):
         self.logger = logger.get_logger('NatPmpPortMapper')
+        self.client = client if client is not None else NatPmpClient()
 
     def name(self):
         return 'NAT-PMP'
 
-    def external_ip(self):
-        external_ip = NATPMP.get_public_address()
+    def external_ip(self, cancelled=None):
+        external_ip = self.client.get_public_address(cancelled)
         self.logger.info('ip: {0}'.format(external_ip))
         return external_ip
 
     def add_mapping(self, local_port, external_port, protocol):
 
-        response = NATPMP.map_port(protocol_from_string(protocol), external_port, local_port)
+        response = self.client.map_port(protocol_from_string(protocol), external_port, local_port)
         return response.public_port
 
     def remove_mapping(self, local_port, external_port, protocol):
-        NATPMP.map_port(protocol_from_string(protocol), external_port, local_port, lifetime=0)
+        self.client.map_port(protocol_from_string(protocol), external_port, local_port, lifetime=0)
 
 
 def protocol_from_string(protocol):
@@ -3,25 +3,33 @@ from os.path import join
 from syncloudlib.json import convertible
 
 from syncloudlib import logger
+from syncloud_platform.config.generations import Generations, PORT_CONFIG
 
 PORT_CONFIG_NAME = 'ports.json'
 
 
 class PortConfig:
 
-    def __init__(self, config_dir=None):
+    def __init__(self, config_dir=None, generations=None):
         self.filename = join(config_dir, PORT_CONFIG_NAME)
         self.logger = logger.get_logger('insider_port_config')
+        self.generations = generations if generations is not None else Generations()
+        self.cache = (None, [])
 
     def load(self):
-        items = convertible.read_json(self.filename)
-        if not items:
-            return []
+        generation = self.generations.get(PORT_CONFIG)
+        cache_generation, items = self.cache
+        if generation is None or generation != cache_generation:
+            items = convertible.read_json(self.filename)
+            if not items:
+                items = []
+            self.cache = (generation, items)
 
-        return items
+        return list(items)
 
     def save(self, items):
         convertible.write_json(self.filename, items)
+        self.generations.bump(PORT_CONFIG)
 
     def add_or_update(self, mapping):
         if self.get(mapping.local_port, mapping.protocol):
@@ -58,4 +66,5 @@ class PortConfig:
 
     def remove_all(self):
         if os.path.isfile(self.filename):
-            os.remove(self.filename)
\ No newline at end of file
+            os.remove(self.filename)
+        self.generations.bump(PORT_CONFIG)
@@ -129,7 +129,8 @@ class PortDrillFactory:
         self.user_platform_config = user_platform_config
         self.port_mapper_factory = port_mapper_factory
 
-    def get_drill(self, upnp_enabled, external_access, manual_public_ip, manual_certificate_port, manual_access_port):
+    def get_drill(self, upnp_enabled, external_access, manual_public_ip, manual_certificate_port, manual_access_port,
+                  user_config=None):
         if not external_access:
             return NonePortDrill()
         drill = None
@@ -139,15 +140,22 @@ class PortDrillFactory:
             mapper = ManualPortMapper(manual_public_ip, manual_certificate_port, manual_access_port)
         
         if mapper:
-            prober = self._get_port_prober()
+            prober = self._get_port_prober(user_config)
             drill = PortDrill(self.port_config, mapper, prober)
         return drill
-        
-    def _get_port_prober(self):
-        if self.user_platform_config.is_redirect_enabled():
+
+    def get_current_drill(self, user_config):
+        return self.get_drill(user_config.get_upnp(), user_config.get_external_access(), user_config.get_public_ip(),
+                              user_config.get_manual_certificate_port(), user_config.get_manual_access_port(),
+                              user_config)
+
+    def _get_port_prober(self, user_config=None):
+        if user_config is None:
+            user_config = self.user_platform_config
+        if user_config.is_redirect_enabled():
             return PortProber(
-                self.user_platform_config.get_redirect_api_url(),
-                self.user_platform_config.get_domain_update_token())
+                user_config.get_redirect_api_url(),
+                user_config.get_domain_update_token())
         else:
             return NoneProber()
 
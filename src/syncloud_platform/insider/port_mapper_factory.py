@@ -1,46 +1,83 @@
+import threading
 import time
+from queue import Queue, Empty
 
 from syncloudlib import logger
 
+from syncloud_platform import operations
 from syncloud_platform.insider.config import Port
 from syncloud_platform.insider.util import port_to_protocol, is_web_port
 
 
+PROBE_DEADLINE = 20
+RETRY_INTERVAL = 1
+
+
 class PortMapperFactory:
-    def __init__(self, nat_pmp_port_mapper, upnp_port_mapper):
+    def __init__(self, nat_pmp_port_mapper, upnp_port_mapper, deadline=PROBE_DEADLINE, retry_interval=RETRY_INTERVAL):
         self.nat_pmp_port_mapper = nat_pmp_port_mapper
         self.upnp_port_mapper = upnp_port_mapper
+        self.deadline = deadline
+        self.retry_interval = retry_interval
         self.log = logger.get_logger('port_mapper_factory')
 
-    def check_mapper(self, mapper):
+    def check_mapper(self, mapper, cancelled=None):
         
         try:
-            ip = self.retrying_get_external_address(mapper)
+            ip = self.retrying_get_external_address(mapper, cancelled)
+            if cancelled is not None and cancelled.is_set():
+                self.log.info('{0} mapper probe cancelled'.format(mapper.name()))
+                return None
             if ip is None or ip == '':
                 raise Exception("Returned bad ip address: {0}".format(ip))
             self.log.warn('{0} mapper is working, returned external ip: {1}'.format(mapper.name(), ip))
-            return mapper
+            return ip
         except Exception as e:
             self.log.warn('{0} mapper failed, message: {1}, {2}'.format(mapper.name(), repr(e), vars(e)))
         return None
 
-    def retrying_get_external_address(self, mapper):
+    def retrying_get_external_address(self, mapper, cancelled=None):
+        if cancelled is None:
+            cancelled = threading.Event()
         retry = 0
         retries = 5
-        ip = mapper.external_ip()
+        ip = mapper.external_ip(cancelled)
         while not ip and retry < retries:
             retry += 1
             self.log.info('retrying external ip: {0} / {1}'.format(retry, retries))
-            time.sleep(1)
-            ip = mapper.external_ip()
+            if cancelled.wait(self.retry_interval):
+                return None
+            ip = mapper.external_ip(cancelled)
         return ip
 
+    def find_mapper(self):
+        mappers = [self.nat_pmp_port_mapper, self.upnp_port_mapper]
+        cancelled = threading.Event()
+        results = Queue()
+        for mapper in mappers:
+            # plain daemon threads, a losing probe must not hold a cron run at exit
+            thread = threading.Thread(target=operations.bind(self._probe), args=(mapper, cancelled, results))
+            thread.daemon = True
+            thread.start()
+
+        deadline = time.time() + self.deadline
+        try:
+            for _ in mappers:
+                try:
+                    mapper, ip = results.get(timeout=max(deadline - time.time(), 0))
+                except Empty:
+                    self.log.error('no mapper answered within {0} seconds'.format(self.deadline))
+                    return None, None
+                if ip is not None:
+                    return mapper, ip
+            self.log.error('None of mappers are working')
+            return None, None
+        finally:
+            cancelled.set()
+
+    def _probe(self, mapper, cancelled, results):
+        results.put((mapper, self.check_mapper(mapper, cancelled)))
+
     def provide_mapper(self):
-        mapper = self.check_mapper(self.nat_pmp_port_mapper)
-        if mapper is not None:
-            return mapper
-        mapper = self.check_mapper(self.upnp_port_mapper)
-        if mapper is not None:
-            return mapper
-        self.log.error('None of mappers are working')
-        return None
+        mapper, ip = self.find_mapper()
+        return mapper
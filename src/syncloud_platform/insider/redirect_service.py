@@ -53,8 +53,12 @@ class RedirectService:
         response_data = convertible.from_json(response.text)
         return response_data
         
-    def sync(self, external_ip, web_port, web_local_port, web_protocol, update_token, external_access):
-        
+    def sync(self, external_ip, web_port, web_local_port, web_protocol, update_token, external_access,
+             user_config=None):
+
+        if user_config is None:
+            user_config = self.user_platform_config
+
         map_local_address = not external_access
         
         version = self.versions.platform_version()
@@ -90,11 +94,11 @@ class RedirectService:
         if local_ip_v6:
             data['ipv6'] = local_ip_v6
 
-        dkim_key = self.user_platform_config.get_dkim_key()
+        dkim_key = user_config.get_dkim_key()
         if dkim_key:
             data['dkim_key'] = dkim_key
 
-        url = urljoin(self.user_platform_config.get_redirect_api_url(), "/domain/update")
+        url = urljoin(user_config.get_redirect_api_url(), "/domain/update")
 
         self.logger.debug('url: ' + url)
         json = convertible.to_json(data)
@@ -1,10 +1,13 @@
 import itertools
+import threading
 from subprocess import check_output, CalledProcessError
 from miniupnpc import UPnP
 
 from syncloudlib import logger
 import time
 
+MAPPINGS_TTL = 60
+
 
 class Mapping:
     def __init__(self, external_port, protocol, local_ip, local_port, description, enabled, remote_ip, lease_time):
@@ -31,10 +34,14 @@ def to_mapping(m):
 
 
 class UpnpClient:
-    def __init__(self, upnp):
+    def __init__(self, upnp, mappings_ttl=MAPPINGS_TTL):
         self.logger = logger.get_logger('UpnpClient')
         self.upnp = upnp
         self.initialized = False
+        self.mappings_ttl = mappings_ttl
+        self.lock = threading.Lock()
+        self.mappings = None
+        self.mappings_time = 0
 
     def init(self):
         if self.initialized:
@@ -52,7 +59,7 @@ class UpnpClient:
         self.logger.info('ip: {0}'.format(external_ip))
         return external_ip
 
-    def __list(self):
+    def __load(self):
         result = []
         i = 0
         while True:
@@ -63,6 +70,21 @@ class UpnpClient:
             i += 1
         return [to_mapping(m) for m in result]
 
+    def __list(self):
+        # one soap call per router entry, keep a snapshot and update it on add/remove
+        with self.lock:
+            if self.mappings is not None and time.time() - self.mappings_time < self.mappings_ttl:
+                return list(self.mappings)
+        mappings = self.__load()
+        with self.lock:
+            self.mappings = mappings
+            self.mappings_time = time.time()
+        return list(mappings)
+
+    def invalidate(self):
+        with self.lock:
+            self.mappings = None
+
     def mapped_external_ports(self, protocol):
         mappings = self.__list()
         ports = [m.external_port for m in mappings if m.protocol == protocol]
@@ -76,11 +98,29 @@ class UpnpClient:
 
     def remove(self, protocol, external_port):
         self.logger.info('removing {0} port mapping'.format(external_port))
-        self.upnp.deleteportmapping(external_port, protocol)
+        try:
+            self.upnp.deleteportmapping(external_port, protocol)
+        except Exception:
+            self.invalidate()
+            raise
+        with self.lock:
+            if self.mappings is not None:
+                self.mappings = [m for m in self.mappings
+                                 if not (m.external_port == external_port and m.protocol == protocol)]
 
     def add(self, protocol, local_port, external_port, description):
         self.logger.debug('adding {0} -> {1} port mapping'.format(external_port, local_port))
-        self.upnp.addportmapping(external_port, protocol, self.upnp.lanaddr, local_port, description, '')
+        try:
+            self.upnp.addportmapping(external_port, protocol, self.upnp.lanaddr, local_port, description, '')
+        except Exception:
+            self.invalidate()
+            raise
+        with self.lock:
+            if self.mappings is not None:
+                self.mappings = [m for m in self.mappings
+                                 if not (m.external_port == external_port and m.protocol == protocol)]
+                self.mappings.append(Mapping(external_port, protocol, self.upnp.lanaddr, local_port,
+                                             description, True, None, '0'))
 
 
 LOWER_LIMIT = 10000
@@ -89,10 +129,11 @@ UPPER_LIMIT = 65535
 
 class UpnpPortMapper:
 
-    def __init__(self, upnp, fail_attempts=50, lower_limit=LOWER_LIMIT, upper_limit=UPPER_LIMIT):
+    def __init__(self, upnp, fail_attempts=50, lower_limit=LOWER_LIMIT, upper_limit=UPPER_LIMIT,
+                 mappings_ttl=MAPPINGS_TTL):
         self.fail_attempts = fail_attempts
         self.logger = logger.get_logger('UpnpPortMapper')
-        self.upnp_client = UpnpClient(upnp)
+        self.upnp_client = UpnpClient(upnp, mappings_ttl)
         self.lower_limit = lower_limit
         self.upper_limit = upper_limit
 
@@ -154,14 +195,16 @@ class UpnpPortMapper:
             self.logger.warn('unable to remove port {0}, probably does not exist anymore, error: {1}, {2}'.format(
                              external_port, repr(e), vars(e)))
 
-    def external_ip(self):
-
+    def external_ip(self, cancelled=None):
+        if cancelled is None:
+            cancelled = threading.Event()
         retry = 0
         retries = 5
         ip = self.upnpc().external_ip()
         while not ip and retry < retries:
             retry += 1
             self.logger.info('retrying external ip: {0} / {1}'.format(retry, retries))
-            time.sleep(1)
+            if cancelled.wait(1):
+                return None
             ip = self.upnpc().external_ip()
         return ip
@@ -0,0 +1,276 @@
+import fcntl
+import marshal
+import os
+import sys
+import threading
+import time
+from os.path import join, isdir, isfile
+
+from requests.adapters import HTTPAdapter
+from syncloudlib import logger
+
+from syncloud_platform.process import is_alive
+
+METRICS_DIR = '/dev/shm/syncloud_platform_metrics' if isdir('/dev/shm') else '/tmp/syncloud_platform_metrics'
+FLUSH_INTERVAL = 1
+BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+SUBPROCESS = 'subprocess'
+SQLITE = 'sqlite'
+HTTP = 'http'
+RETIRED = 'retired'
+
+local = threading.local()
+installed = False
+
+
+def count(kind):
+    calls = getattr(local, 'calls', None)
+    if calls is not None:
+        calls[kind] = calls.get(kind, 0) + 1
+
+
+def bind(func):
+    # executor threads do not see the request thread local, carry its counters over
+    calls = getattr(local, 'calls', None)
+
+    def bound(*args, **kwargs):
+        previous = getattr(local, 'calls', None)
+        local.calls = calls
+        try:
+            return func(*args, **kwargs)
+        finally:
+            local.calls = previous
+    return bound
+
+
+def count_sqlite(statement):
+    count(SQLITE)
+
+
+def _audit(event, args):
+    if event == 'subprocess.Popen':
+        count(SUBPROCESS)
+
+
+def install():
+    global installed
+    if installed:
+        return
+    installed = True
+    # audit hooks need python 3.8, subprocess calls are not counted on older interpreters
+    if hasattr(sys, 'addaudithook'):
+        sys.addaudithook(_audit)
+    send = HTTPAdapter.send
+
+    def counting_send(self, request, **kwargs):
+        count(HTTP)
+        return send(self, request, **kwargs)
+
+    HTTPAdapter.send = counting_send
+
+
+class Metrics:
+
+    def __init__(self, metrics_dir=METRICS_DIR, flush_interval=FLUSH_INTERVAL):
+        self.metrics_dir = metrics_dir
+        self.flush_interval = flush_interval
+        self.logger = logger.get_logger('Metrics')
+        self.lock = threading.Lock()
+        self.requests = {}
+        self.durations = {}
+        self.calls = {}
+        self.in_flight = {}
+        self.flushed = 0
+        self.flushed_pid = None
+
+    def begin(self, app):
+        local.calls = {}
+        with self.lock:
+            self.in_flight[app] = self.in_flight.get(app, 0) + 1
+
+    def end(self, app, route, method, status, seconds):
+        calls = getattr(local, 'calls', None) or {}
+        local.calls = None
+        with self.lock:
+            self.in_flight[app] = self.in_flight.get(app, 1) - 1
+            key = (app, route, method, str(status))
+            self.requests[key] = self.requests.get(key, 0) + 1
+            duration = self.durations.get((app, route))
+            if duration is None:
+                duration = [0] * (len(BUCKETS) + 2)
+                self.durations[(app, route)] = duration
+            for i, bucket in enumerate(BUCKETS):
+                if seconds <= bucket:
+                    duration[i] += 1
+                    break
+            duration[-2] += seconds
+            duration[-1] += 1
+            for kind, calls_count in calls.items():
+                key = (app, route, kind)
+                self.calls[key] = self.calls.get(key, 0) + calls_count
+            idle = self.in_flight[app] == 0
+        if idle or time.time() - self.flushed > self.flush_interval:
+            self.flush()
+
+    def flush(self):
+        pid = os.getpid()
+        with self.lock:
+            if self.flushed_pid != pid:
+                # a file with our pid is left by a dead worker, keep its counts before replacing it
+                try:
+                    self.retire(pid)
+                except (IOError, OSError) as e:
+                    self.logger.warn('unable to retire metrics: {0}'.format(e))
+                self.flushed_pid = pid
+            state = self._state()
+            self.flushed = time.time()
+        try:
+            if not isdir(self.metrics_dir):
+                os.makedirs(self.metrics_dir)
+            filename = join(self.metrics_dir, '{0}.marshal'.format(pid))
+            temp_filename = '{0}.{1}'.format(filename, threading.current_thread().ident)
+            with open(temp_filename, 'wb') as f:
+                marshal.dump(state, f)
+            os.rename(temp_filename, filename)
+        except (IOError, OSError) as e:
+            self.logger.warn('unable to flush metrics: {0}'.format(e))
+
+    def retire(self, reused_pid=None):
+        # counters of dead workers are folded into one file, pid named files of recycled workers
+        # would otherwise be overwritten when the pid is reused and the totals would go backwards
+        if not isdir(self.metrics_dir):
+            return
+        own = os.getpid()
+        with open(join(self.metrics_dir, RETIRED + '.lock'), 'a') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            retired = None
+            if isfile(join(self.metrics_dir, RETIRED + '.marshal')):
+                retired = self._load(RETIRED)
+            if retired is None:
+                retired = empty_state()
+            folded = []
+            for file in os.listdir(self.metrics_dir):
+                if not file.endswith('.marshal') or file == RETIRED + '.marshal':
+                    continue
+                pid = int(file.split('.')[0])
+                if pid == reused_pid or (pid != own and not is_alive(pid)):
+                    state = self._load(pid)
+                    if state is not None:
+                        merge_state(retired, state)
+                    folded.append(file)
+            if not folded:
+                return
+            self._save(RETIRED, retired)
+            for file in folded:
+                os.remove(join(self.metrics_dir, file))
+
+    def render(self):
+        try:
+            self.retire()
+        except (IOError, OSError) as e:
+            self.logger.warn('unable to retire metrics: {0}'.format(e))
+        total = empty_state()
+        in_flight = {}
+        for pid, state in self._states():
+            merge_state(total, state)
+            if pid is not None and is_alive(pid):
+                merge(in_flight, state['in_flight'])
+        requests, durations, calls = total['requests'], total['durations'], total['calls']
+
+        lines = ['# HELP platform_http_requests_total Requests by route, method and status.',
+                 '# TYPE platform_http_requests_total counter']
+        for (app, route, method, status), value in sorted(requests.items()):
+            lines.append(sample('platform_http_requests_total',
+                                [('app', app), ('route', route), ('method', method), ('status', status)], value))
+
+        lines += ['# HELP platform_http_request_duration_seconds Request latency by route.',
+                  '# TYPE platform_http_request_duration_seconds histogram']
+        for (app, route), values in sorted(durations.items()):
+            labels = [('app', app), ('route', route)]
+            cumulative = 0
+            for bucket, value in zip(BUCKETS, values):
+                cumulative += value
+                lines.append(sample('platform_http_request_duration_seconds_bucket',
+                                    labels + [('le', repr(float(bucket)))], cumulative))
+            lines.append(sample('platform_http_request_duration_seconds_bucket', labels + [('le', '+Inf')], values[-1]))
+            lines.append(sample('platform_http_request_duration_seconds_sum', labels, values[-2]))
+            lines.append(sample('platform_http_request_duration_seconds_count', labels, values[-1]))
+
+        lines += ['# HELP platform_http_requests_in_flight Requests being served.',
+                  '# TYPE platform_http_requests_in_flight gauge']
+        for app, value in sorted(in_flight.items()):
+            lines.append(sample('platform_http_requests_in_flight', [('app', app)], value))
+
+        lines += ['# HELP platform_http_request_calls_total Subprocess, SQLite and outbound HTTP calls made by route.',
+                  '# TYPE platform_http_request_calls_total counter']
+        for (app, route, kind), value in sorted(calls.items()):
+            lines.append(sample('platform_http_request_calls_total',
+                                [('app', app), ('route', route), ('kind', kind)], value))
+
+        return '\n'.join(lines) + '\n'
+
+    def _state(self):
+        return dict(requests=dict(self.requests),
+                    durations=dict((key, list(values)) for key, values in self.durations.items()),
+                    calls=dict(self.calls),
+                    in_flight=dict(self.in_flight))
+
+    def _states(self):
+        own = os.getpid()
+        with self.lock:
+            states = [(own, self._state())]
+        if isdir(self.metrics_dir):
+            for file in os.listdir(self.metrics_dir):
+                if not file.endswith('.marshal'):
+                    continue
+                name = file.split('.')[0]
+                pid = None if name == RETIRED else int(name)
+                if pid == own:
+                    continue
+                state = self._load(name)
+                if state is not None:
+                    states.append((pid, state))
+        return states
+
+    def _load(self, name):
+        try:
+            with open(join(self.metrics_dir, '{0}.marshal'.format(name)), 'rb') as f:
+                return marshal.load(f)
+        except (IOError, OSError, EOFError, ValueError) as e:
+            self.logger.warn('unable to read metrics of {0}: {1}'.format(name, e))
+            return None
+
+    def _save(self, name, state):
+        filename = join(self.metrics_dir, '{0}.marshal'.format(name))
+        temp_filename = '{0}.{1}.{2}'.format(filename, os.getpid(), threading.current_thread().ident)
+        with open(temp_filename, 'wb') as f:
+            marshal.dump(state, f)
+        os.rename(temp_filename, filename)
+
+
+def empty_state():
+    return dict(requests={}, durations={}, calls={}, in_flight={})
+
+
+def merge_state(total, state):
+    merge(total['requests'], state['requests'])
+    merge(total['calls'], state['calls'])
+    for key, values in state['durations'].items():
+        durations = total['durations'].setdefault(key, [0] * len(values))
+        for i, value in enumerate(values):
+            durations[i] += value
+
+
+def merge(total, values):
+    for key, value in values.items():
+        total[key] = total.get(key, 0) + value
+
+
+def sample(name, labels, value):
+    return '{0}{{{1}}} {2}'.format(name, ','.join('{0}="{1}"'.format(label, escape(text)) for label, text in labels),
+                                   value)
+
+
+def escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
@@ -19,3 +19,16 @@ class Network:
             ipv6 = addrs[netifaces.AF_INET6]
         return dict(name=iface, ipv4=ipv4, ipv6=ipv6)
 
+
+    def default_gateway(self):
+        gateway = netifaces.gateways().get('default', {}).get(netifaces.AF_INET)
+        if gateway is None:
+            return None
+        return gateway[0]
+
+    def addresses(self):
+        addresses = []
+        for iface in netifaces.interfaces():
+            for addr in netifaces.ifaddresses(iface).get(netifaces.AF_INET, []):
+                addresses.append(addr['addr'])
+        return addresses
@@ -0,0 +1,198 @@
+import json
+import logging
+import os
+import threading
+import time
+import traceback
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from os.path import join, isfile
+
+from syncloudlib import logger
+
+from syncloud_platform.config import config
+from syncloud_platform.process import is_alive
+from syncloud_platform.rest import serializer
+
+OPERATIONS_DIR = join(config.DATA_DIR, 'operations')
+WORKERS = 2
+KEEP = 50
+LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+local = threading.local()
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+ERROR = 'error'
+
+
+class OperationLogHandler(logging.Handler):
+
+    def __init__(self, filename, id):
+        logging.Handler.__init__(self)
+        self.filename = filename
+        self.id = id
+        self.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    def emit(self, record):
+        # emit runs in the logging thread, it belongs to the operation or to a thread bound to it
+        if getattr(local, 'id', None) != self.id:
+            return
+        try:
+            with open(self.filename, 'a') as f:
+                f.write(self.format(record) + '\n')
+        except Exception:
+            self.handleError(record)
+
+
+class Operations:
+
+    def __init__(self, operations_dir=OPERATIONS_DIR, workers=WORKERS, keep=KEEP):
+        self.operations_dir = operations_dir
+        self.workers = workers
+        self.keep = keep
+        self.logger = logger.get_logger('Operations')
+        self.lock = threading.Lock()
+        self.executor = None
+        self.executor_pid = None
+
+    def submit(self, name, func, *args):
+        id = uuid.uuid4().hex
+        self._write(self._new(id, name))
+        self.logger.info('operation {0}: {1} queued'.format(id, name))
+        self._executor().submit(self._run, id, name, func, args)
+        return id
+
+    def get(self, id):
+        if not is_valid_id(id):
+            return None
+        operation = self._read(id)
+        if operation is None:
+            return None
+        if operation['status'] in [QUEUED, RUNNING] and not is_alive(operation['pid']):
+            operation['status'] = ERROR
+            operation['message'] = 'interrupted by a platform restart'
+        operation['log'] = self._read_log(id)
+        return operation
+
+    def _run(self, id, name, func, args):
+        operation = self._read(id)
+        if operation is None:
+            self.logger.warn('operation {0}: {1} status is missing, recreating'.format(id, name))
+            operation = self._new(id, name)
+        operation.update(status=RUNNING, started=time.time())
+        self._write(operation)
+        handler = OperationLogHandler(self._filename(id, 'log'), id)
+        root = logging.getLogger()
+        root.addHandler(handler)
+        local.id = id
+        try:
+            self.logger.info('operation {0}: {1} started'.format(id, name))
+            result = func(*args)
+            operation.update(status=DONE, result=serializer.to_dict(result))
+            self.logger.info('operation {0}: {1} done'.format(id, name))
+        except Exception as e:
+            self.logger.error('operation {0}: {1} failed: {2}'.format(id, name, traceback.format_exc()))
+            operation.update(status=ERROR, message=str(e))
+        finally:
+            local.id = None
+            root.removeHandler(handler)
+            operation['finished'] = time.time()
+            self._write(operation)
+            self._cleanup()
+
+    def _new(self, id, name):
+        return dict(id=id, name=name, status=QUEUED, pid=os.getpid(), created=time.time(),
+                    started=None, finished=None, result=None, message=None)
+
+    def _executor(self):
+        pid = os.getpid()
+        with self.lock:
+            if self.executor is None or self.executor_pid != pid:
+                self.executor = ThreadPoolExecutor(max_workers=self.workers)
+                self.executor_pid = pid
+            return self.executor
+
+    def _filename(self, id, extension):
+        return join(self.operations_dir, '{0}.{1}'.format(id, extension))
+
+    def _read(self, id):
+        filename = self._filename(id, 'json')
+        if not isfile(filename):
+            return None
+        with open(filename) as f:
+            return json.load(f)
+
+    def _read_log(self, id):
+        filename = self._filename(id, 'log')
+        if not isfile(filename):
+            return []
+        with open(filename) as f:
+            return f.read().splitlines()
+
+    def _write(self, operation):
+        if not os.path.isdir(self.operations_dir):
+            os.makedirs(self.operations_dir)
+        filename = self._filename(operation['id'], 'json')
+        temp_filename = '{0}.{1}'.format(filename, threading.current_thread().ident)
+        with open(temp_filename, 'w') as f:
+            json.dump(operation, f)
+        os.rename(temp_filename, filename)
+
+    def _cleanup(self):
+        try:
+            names = os.listdir(self.operations_dir)
+        except OSError as e:
+            self.logger.warn('unable to clean up old operations: {0}'.format(e))
+            return
+        files = [join(self.operations_dir, file) for file in names if file.endswith('.json')]
+        files.sort(key=mtime, reverse=True)
+        for filename in files[self.keep:]:
+            if not self._is_active(filename):
+                remove(filename)
+                remove(filename[:-len('json')] + 'log')
+        for file in names:
+            if file.endswith('.log') and not isfile(join(self.operations_dir, file[:-len('log')] + 'json')):
+                remove(join(self.operations_dir, file))
+
+    def _is_active(self, filename):
+        try:
+            with open(filename) as f:
+                operation = json.load(f)
+        except (IOError, OSError, ValueError):
+            return False
+        return operation['status'] in [QUEUED, RUNNING] and is_alive(operation['pid'])
+
+
+def bind(func):
+    # threads an operation fans its work out to do not see its thread local, carry the operation over
+    id = getattr(local, 'id', None)
+
+    def bound(*args, **kwargs):
+        previous = getattr(local, 'id', None)
+        local.id = id
+        try:
+            return func(*args, **kwargs)
+        finally:
+            local.id = previous
+    return bound
+
+
+def mtime(filename):
+    try:
+        return os.path.getmtime(filename)
+    except OSError:
+        # removed by a concurrent clean up
+        return 0
+
+
+def remove(filename):
+    try:
+        os.remove(filename)
+    except OSError:
+        pass
+
+
+def is_valid_id(id):
+    return len(id) == 32 and all(c in '0123456789abcdef' for c in id)
@@ -0,0 +1,11 @@
+import errno
+import os
+
+
+def is_alive(pid):
+    try:
+        os.kill(pid, 0)
+        return True
+    except OSError as e:
+        # the process exists but belongs to another user
+        return e.errno == errno.EPERM
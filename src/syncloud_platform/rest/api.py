@@ -6,8 +6,10 @@ from syncloudlib.error import PassthroughJsonError
 
 from syncloud_platform.application.api import get_app_paths, get_app_setup
 from syncloud_platform.injector import get_injector
+from syncloud_platform.rest.flask_metrics import instrument
 
 app = Flask(__name__)
+instrument(app, 'api', get_injector().metrics)
 
 
 @app.route("/app/install_path", methods=["GET"])
@@ -104,6 +106,11 @@ def user_email():
     return jsonify(success=True, message='', data=email), 200
 
 
+@app.route("/metrics", methods=["GET"])
+def metrics():
+    return Response(get_injector().metrics.render(), mimetype='text/plain; version=0.0.4')
+
+
 @app.errorhandler(Exception)
 def handle_exception(error):
     status_code = 500
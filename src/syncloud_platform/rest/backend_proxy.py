@@ -1,8 +1,50 @@
-import requests_unixsocket
+import os
 
-socket_file = '/var/snap/platform/common/backend.sock'
-socket = 'http+unix://{0}'.format(socket_file.replace('/', '%2F'))
+import requests
+from syncloudlib import logger
 
-def backend_request(method, url, data):
-    session = requests_unixsocket.Session()
-    return session.request(method, '{0}{1}'.format(socket, url), data=data)
+from syncloud_platform.snap.snapd import SocketAdapter
+
+SOCKET_FILE = '/var/snap/platform/common/backend.sock'
+SOCKET = 'http+unix://{0}'.format(SOCKET_FILE.replace('/', '%2F'))
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 600
+CHUNK_SIZE = 64 * 1024
+HOP_BY_HOP_HEADERS = ['connection', 'keep-alive', 'proxy-authenticate', 'proxy-authorization', 'te', 'trailer',
+                      'transfer-encoding', 'upgrade']
+
+
+class BackendProxy:
+
+    def __init__(self, socket=SOCKET, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT):
+        self.socket = socket
+        self.timeout = (connect_timeout, read_timeout)
+        self.logger = logger.get_logger('BackendProxy')
+        self.session = None
+        self.session_pid = None
+
+    def request(self, method, url, data):
+        return self._session().request(method, '{0}{1}'.format(self.socket, url), data=data,
+                                       timeout=self.timeout, stream=True)
+
+    def headers(self, response):
+        return [(name, value) for name, value in response.headers.items()
+                if name.lower() not in HOP_BY_HOP_HEADERS]
+
+    def stream(self, response):
+        # raw bytes, so Content-Encoding and Content-Length from the backend stay valid,
+        # the connection goes back to the pool once the body is read
+        try:
+            for chunk in response.raw.stream(CHUNK_SIZE, decode_content=False):
+                yield chunk
+        finally:
+            response.close()
+
+    def _session(self):
+        pid = os.getpid()
+        if self.session is None or self.session_pid != pid:
+            session = requests.Session()
+            session.mount('http+unix://', SocketAdapter(timeout=self.timeout[1]))
+            self.session = session
+            self.session_pid = pid
+        return self.session
@@ -0,0 +1,19 @@
+import re
+from os.path import join, isfile
+
+BACKUP_DIR = '/data/platform/backup'
+BACKUP_LOCATION = '/backup_files'
+FILE_NAME = re.compile(r'^[\w][\w.-]*$')
+
+
+def backup_file(file, backup_dir=BACKUP_DIR):
+    if not FILE_NAME.match(file):
+        return None
+    path = join(backup_dir, file)
+    if not isfile(path):
+        return None
+    return path
+
+
+def accel_redirect(file):
+    return '{0}/{1}'.format(BACKUP_LOCATION, file)
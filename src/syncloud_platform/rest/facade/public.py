@@ -1,13 +1,17 @@
+from concurrent.futures import ThreadPoolExecutor
 from syncloudlib import logger
 
 from syncloud_platform.rest.model.app import app_from_snap_app
 from syncloud_platform.control import power
+from syncloud_platform import metrics
+
+PAGE_WORKERS = 3
 
 
 class Public:
 
     def __init__(self, platform_config, user_platform_config, device, device_info, snap, hardware, redirect_service,
-                 log_aggregator, certbot_generator, port_mapper_factory, network, port_config):
+                 log_aggregator, certbot_generator, mapper_health, network, port_config):
         self.port_config = port_config
         self.hardware = hardware
         self.platform_config = platform_config
@@ -20,8 +24,9 @@ class Public:
         self.redirect_service = redirect_service
         self.log_aggregator = log_aggregator
         self.certbot_generator = certbot_generator
-        self.port_mapper_factory = port_mapper_factory
+        self.mapper_health = mapper_health
         self.network=network
+        self.executor = ThreadPoolExecutor(max_workers=PAGE_WORKERS)
         
     def domain(self):
         return self.device_info.domain()
@@ -46,13 +51,25 @@ class Public:
         return self.snap.list()
 
     def install(self, app_id):
-        self.snap.install(app_id)
+        return self.snap.install(app_id)
 
     def remove(self, app_id):
         return self.snap.remove(app_id)
 
     def upgrade(self, app_id, channel, force):
-        self.snap.upgrade(app_id, channel, force)
+        return self.snap.upgrade(app_id, channel, force)
+
+    def install_many(self, app_ids):
+        return self.snap.install_many(app_ids)
+
+    def upgrade_many(self, app_ids):
+        return self.snap.upgrade_many(app_ids)
+
+    def change(self, change_id):
+        return self.snap.change(change_id)
+
+    def watch_change(self, change_id):
+        return self.snap.watch_change(change_id)
 
     def available_apps(self):
         return [app_from_snap_app(a) for a in self.snap.user_apps() if a.app.enabled]
@@ -63,14 +80,20 @@ class Public:
     def access(self):
     
         upnp_enabled = self.user_platform_config.get_upnp()
-        mapper = self.port_mapper_factory.provide_mapper()
-        upnp_available = mapper is not None
+        mapper = self.mapper_health.status()
+        # nothing has been probed yet, the first probe is running in the background
+        mapper_probing = mapper['checked'] is None
+        upnp_available = None if mapper_probing else mapper['mapper'] is not None
         external_access = self.user_platform_config.get_external_access()
 
         result = dict(external_access=external_access,
                       upnp_available=upnp_available,
                       upnp_enabled=upnp_enabled,
-                      upnp_message='not used')
+                      upnp_message='not used',
+                      mapper=mapper['mapper'],
+                      mapper_external_ip=mapper['external_ip'],
+                      mapper_checked=mapper['checked'],
+                      mapper_probing=mapper_probing)
 
         manual_public_ip = self.user_platform_config.get_public_ip()
         if manual_public_ip is not None:
@@ -106,3 +129,16 @@ class Public:
 
     def network_interfaces(self):
         return self.network.interfaces()
+
+    def network_page(self):
+        return self._gather(access=self.access,
+                            port_mappings=self.port_mappings,
+                            interfaces=self.network_interfaces)
+
+    def storage_page(self):
+        return self._gather(disks=self.disks,
+                            boot_disk=self.boot_disk)
+
+    def _gather(self, **calls):
+        futures = dict((name, self.executor.submit(metrics.bind(call))) for name, call in calls.items())
+        return dict((name, future.result()) for name, future in futures.items())
@@ -0,0 +1,27 @@
+import time
+
+from flask import g, request
+
+from syncloud_platform import metrics as calls
+
+
+def instrument(app, name, metrics):
+    calls.install()
+
+    @app.before_request
+    def start_request_metrics():
+        g.metrics_start = time.time()
+        metrics.begin(name)
+
+    @app.after_request
+    def record_response_status(response):
+        g.metrics_status = response.status_code
+        return response
+
+    @app.teardown_request
+    def end_request_metrics(error):
+        start = g.pop('metrics_start', None)
+        if start is None:
+            return
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        metrics.end(name, route, request.method, g.pop('metrics_status', 500), time.time() - start)
@@ -1,4 +1,6 @@
-class App:
+class App(object):
+    __slots__ = ('id', 'name', 'url', 'icon')
+
     def __init__(self, app_id, name, icon, url):
         self.id = app_id
         self.name = name
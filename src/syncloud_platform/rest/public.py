@@ -1,7 +1,8 @@
+import json
 import sys
+import threading
 import traceback
 
-from syncloudlib.json import convertible
 from syncloudlib.error import PassthroughJsonError
 
 import requests
@@ -14,16 +15,32 @@ from syncloud_platform.rest.flask_decorators import nocache, redirect_if_not_act
 from syncloud_platform.rest.model.flask_user import FlaskUser
 from syncloud_platform.rest.model.user import User
 from syncloud_platform.gaplib import linux
-from syncloud_platform.rest.backend_proxy import backend_request
 from syncloud_platform.rest.service_exception import ServiceException
 from syncloud_platform.rest.internal_validator import InternalValidator
+from syncloud_platform.rest import serializer
+from syncloud_platform.rest.flask_metrics import instrument
+from syncloud_platform.rest import backups
+from syncloud_platform.config import generations
+from syncloud_platform.snap.icon_cache import ICON_TTL
 
 injector = get_injector()
 public = injector.public
 internal = injector.internal
 device = injector.device
+icon_cache = injector.icon_cache
+response_cache = injector.response_cache
+backend = injector.backend_proxy
+operations = injector.operations
+
+APPS_CHANNELS = [generations.APPS, generations.USER_CONFIG, generations.PORT_CONFIG]
+APPS_STAMPS = [injector.installed_snaps.generation]
+# streams hold a uwsgi thread, keep the other thread of each worker for regular requests
+CHANGE_STREAMS_PER_WORKER = 1
+change_streams = threading.BoundedSemaphore(CHANGE_STREAMS_PER_WORKER)
+ACCESS_CHANNELS = [generations.ACCESS, generations.USER_CONFIG, generations.PORT_CONFIG]
 
 app = Flask(__name__)
+instrument(app, 'public', injector.metrics)
 app.config['SECRET_KEY'] = public.user_platform_config.get_web_secret_key()
 login_manager = LoginManager()
 login_manager.init_app(app)
@@ -39,7 +56,7 @@ def _callback():
 
 @app.route("/rest/id", methods=["GET"])
 def identification():
-    return jsonify(success=True, message='', data=convertible.to_dict(internal.identification())), 200
+    return jsonify(success=True, message='', data=serializer.to_dict(internal.identification())), 200
 
 
 @app.route("/rest/activation_status", methods=["GET"])
@@ -128,36 +145,95 @@ def logout():
 @redirect_if_not_activated
 @login_required
 def user():
-    return jsonify(convertible.to_dict(current_user.user)), 200
+    return jsonify(serializer.to_dict(current_user.user)), 200
 
 
 @app.route("/rest/installed_apps", methods=["GET"])
 @redirect_if_not_activated
 @login_required
+@response_cache.cached(30, APPS_CHANNELS, APPS_STAMPS)
 def installed_apps():
-    return jsonify(apps=convertible.to_dict(public.installed_apps())), 200
+    return jsonify(apps=serializer.to_dict(public.installed_apps())), 200
 
 
 @app.route("/rest/app", methods=["GET"])
 @redirect_if_not_activated
 @login_required
 def app_status():
-    return jsonify(info=convertible.to_dict(public.get_app(request.args['app_id']))), 200
+    return jsonify(info=serializer.to_dict(public.get_app(request.args['app_id']))), 200
 
 
 @app.route("/rest/install", methods=["GET"])
 @redirect_if_not_activated
 @login_required
 def install():
-    public.install(request.args['app_id'])
-    return 'OK', 200
+    change_id = public.install(request.args['app_id'])
+    response_cache.invalidate(generations.APPS)
+    return jsonify(success=True, change_id=change_id), 200
 
 
 @app.route("/rest/remove", methods=["GET"])
 @redirect_if_not_activated
 @login_required
 def remove():
-    return jsonify(message=public.remove(request.args['app_id'])), 200
+    change_id = public.remove(request.args['app_id'])
+    response_cache.invalidate(generations.APPS)
+    return jsonify(success=True, change_id=change_id), 200
+
+
+@app.route("/rest/batch/install", methods=["GET"])
+@redirect_if_not_activated
+@login_required
+def batch_install():
+    change_id = public.install_many(request.args.getlist('app_id'))
+    response_cache.invalidate(generations.APPS)
+    return jsonify(success=True, change_id=change_id), 200
+
+
+@app.route("/rest/batch/upgrade", methods=["GET"])
+@redirect_if_not_activated
+@login_required
+def batch_upgrade():
+    change_id = public.upgrade_many(request.args.getlist('app_id'))
+    response_cache.invalidate(generations.APPS)
+    return jsonify(success=True, change_id=change_id), 200
+
+
+@app.route("/rest/change", methods=["GET"])
+@redirect_if_not_activated
+@login_required
+def change():
+    progress = public.change(request.args['id'])
+    if progress['ready']:
+        response_cache.invalidate(generations.APPS)
+    return jsonify(success=True, data=progress), 200
+
+
+@app.route("/rest/change/stream", methods=["GET"])
+@redirect_if_not_activated
+@login_required
+def change_stream():
+    changes = public.watch_change(request.args['id'])
+    if not change_streams.acquire(False):
+        # EventSource treats the error as a failed stream and the page falls back to polling
+        return jsonify(success=False, message='too many change streams'), 503
+
+    def events():
+        for progress in changes:
+            if progress is None:
+                yield ': heartbeat\n\n'
+                continue
+            if progress['ready']:
+                response_cache.invalidate(generations.APPS)
+            yield 'data: {0}\n\n'.format(json.dumps(progress))
+            if progress['ready']:
+                return
+        yield 'event: reconnect\ndata: {}\n\n'
+
+    response = Response(events(), mimetype='text/event-stream',
+                        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+    response.call_on_close(change_streams.release)
+    return response
 
 
 @app.route("/rest/restart", methods=["GET"])
@@ -189,23 +265,26 @@ def upgrade():
     if 'channel' in request.args:
         channel = request.args['channel']
 
-    public.upgrade(request.args['app_id'], channel, force)
+    change_id = public.upgrade(request.args['app_id'], channel, force)
+    response_cache.invalidate(generations.APPS)
 
-    return 'OK', 200
+    return jsonify(success=True, change_id=change_id), 200
 
 
 @app.route("/rest/available_apps", methods=["GET"])
 @redirect_if_not_activated
 @login_required
+@response_cache.cached(300, APPS_CHANNELS, APPS_STAMPS)
 def available_apps():
-    return jsonify(apps=convertible.to_dict(public.available_apps())), 200
+    return jsonify(apps=serializer.to_dict(public.available_apps())), 200
 
 
 @app.route("/rest/access/port_mappings", methods=["GET"])
 @redirect_if_not_activated
 @login_required
+@response_cache.cached(30, ACCESS_CHANNELS)
 def port_mappings():
-    return jsonify(success=True, port_mappings=convertible.to_dict(public.port_mappings())), 200
+    return jsonify(success=True, port_mappings=serializer.to_dict(public.port_mappings())), 200
 
 
 @app.route("/rest/access/access", methods=["GET"])
@@ -222,30 +301,45 @@ def set_access():
     public_ip = None
     if 'public_ip' in request.args:
         public_ip = request.args['public_ip']
-    public.set_access(
+    return submit_operation(
+        'set_access', generations.ACCESS, public.set_access,
         request.args['upnp_enabled'] == 'true',
         request.args['external_access'] == 'true',
         public_ip,
         int(request.args['certificate_port']),
         int(request.args['access_port'])
     )
-    return jsonify(success=True), 200
 
 
 @app.route("/rest/access/network_interfaces", methods=["GET"])
 @redirect_if_not_activated
 @login_required
+@response_cache.cached(30, [])
 def network_interfaces():
     return jsonify(success=True, data=dict(interfaces=public.network_interfaces())), 200
 
 
+@app.route("/rest/page/network", methods=["GET"])
+@redirect_if_not_activated
+@login_required
+def network_page():
+    return jsonify(success=True, data=serializer.to_dict(public.network_page())), 200
+
+
+@app.route("/rest/page/storage", methods=["GET"])
+@redirect_if_not_activated
+@login_required
+@response_cache.cached(10, [generations.DISKS])
+def storage_page():
+    return jsonify(success=True, data=serializer.to_dict(public.storage_page())), 200
+
+
 @app.route("/rest/send_log", methods=["GET"])
 @redirect_if_not_activated
 @login_required
 def send_log():
     include_support = request.args['include_support'] == 'true'
-    public.send_logs(include_support)
-    return jsonify(success=True), 200
+    return submit_operation('send_logs', None, public.send_logs, include_support)
 
 
 @app.route("/rest/settings/device_domain", methods=["GET"])
@@ -258,6 +352,7 @@ def device_domain():
 @app.route("/rest/settings/device_url", methods=["GET"])
 @redirect_if_not_activated
 @login_required
+@response_cache.cached(300, ACCESS_CHANNELS)
 def device_url():
     return jsonify(success=True, device_url=public.device_url()), 200
 
@@ -265,29 +360,32 @@ def device_url():
 @app.route("/rest/settings/disks", methods=["GET"])
 @redirect_if_not_activated
 @login_required
+@response_cache.cached(10, [generations.DISKS])
 def disks():
-    return jsonify(success=True, disks=convertible.to_dict(public.disks())), 200
+    return jsonify(success=True, disks=serializer.to_dict(public.disks())), 200
 
 
 @app.route("/rest/settings/boot_disk", methods=["GET"])
 @redirect_if_not_activated
 @login_required
+@response_cache.cached(10, [generations.DISKS])
 def boot_disk():
-    return jsonify(success=True, data=convertible.to_dict(public.boot_disk())), 200
+    return jsonify(success=True, data=serializer.to_dict(public.boot_disk())), 200
 
 
 @app.route("/rest/settings/disk_activate", methods=["GET"])
 @redirect_if_not_activated
 @login_required
 def disk_activate():
-    return jsonify(success=True, disks=public.disk_activate(request.args['device'])), 200
+    return submit_operation('disk_activate', generations.DISKS, public.disk_activate, request.args['device'])
 
 
 @app.route("/rest/settings/versions", methods=["GET"])
 @redirect_if_not_activated
 @login_required
+@response_cache.cached(60, APPS_CHANNELS, APPS_STAMPS)
 def versions():
-    return jsonify(success=True, data=convertible.to_dict(public.list_apps())), 200
+    return jsonify(success=True, data=serializer.to_dict(public.list_apps())), 200
 
 
 @app.route("/rest/settings/installer_status", methods=["GET"])
@@ -301,15 +399,34 @@ def installer_status():
 @redirect_if_not_activated
 @login_required
 def disk_deactivate():
-    return jsonify(success=True, disks=public.disk_deactivate()), 200
+    return submit_operation('disk_deactivate', generations.DISKS, public.disk_deactivate)
 
 
 @app.route("/rest/settings/regenerate_certificate", methods=["GET"])
 @redirect_if_not_activated
 @login_required
 def regenerate_certificate():
-    public.regenerate_certificate()
-    return jsonify(success=True), 200
+    return submit_operation('regenerate_certificate', generations.ACCESS, public.regenerate_certificate)
+
+
+@app.route("/rest/operation", methods=["GET"])
+@redirect_if_not_activated
+@login_required
+def operation():
+    status = operations.get(request.args['id'])
+    if status is None:
+        return jsonify(success=False, message='operation not found'), 404
+    return jsonify(success=True, data=status), 200
+
+
+def submit_operation(name, channel, func, *args):
+    def run():
+        try:
+            return func(*args)
+        finally:
+            if channel:
+                response_cache.invalidate(channel)
+    return jsonify(success=True, operation_id=operations.submit(name, run)), 200
 
 
 @app.route("/rest/settings/deactivate", methods=["POST"])
@@ -320,15 +437,40 @@ def deactivate():
     return jsonify(success=True), 200
 
 
+@app.route("/rest/cache/stats", methods=["GET"])
+@redirect_if_not_activated
+@login_required
+def cache_stats():
+    return jsonify(success=True, data=response_cache.stats()), 200
+
+
 @app.route("/rest/app_image", methods=["GET"])
 @redirect_if_not_activated
 @login_required
 def app_image():
     channel = request.args['channel']
     app = request.args['app']
-    r = requests.get('http://apps.syncloud.org/releases/{0}/images/{1}-128.png'.format(channel, app), stream=True)
-    return Response(r.iter_content(chunk_size=10*1024),
-                    content_type=r.headers['Content-Type'])
+    try:
+        name = icon_cache.get(channel, app)
+    except requests.exceptions.HTTPError as e:
+        return '', e.response.status_code
+    response = Response(content_type='image/png')
+    response.headers['X-Accel-Redirect'] = '/app_images/{0}'.format(name)
+    response.headers['Cache-Control'] = 'public, max-age={0}'.format(ICON_TTL)
+    return response
+
+
+@app.route("/rest/backup/download", methods=["GET"])
+@redirect_if_not_activated
+@login_required
+def backup_download():
+    file = request.args['file']
+    if backups.backup_file(file) is None:
+        return jsonify(success=False, message='backup file not found: {0}'.format(file)), 404
+    response = Response(content_type='application/octet-stream')
+    response.headers['Content-Disposition'] = 'attachment; filename="{0}"'.format(file)
+    response.headers['X-Accel-Redirect'] = backups.accel_redirect(file)
+    return response
 
 
 @app.route("/rest/backup/<path:path>", methods=["GET"])
@@ -338,8 +480,9 @@ def app_image():
 @redirect_if_not_activated
 @login_required
 def backend_proxy(path):
-    response = backend_request(request.method, request.full_path.replace("/rest", "", 1), request.form)
-    return response.text, response.status_code
+    response = backend.request(request.method, request.full_path.replace("/rest", "", 1), request.form)
+    return Response(backend.stream(response), status=response.status_code,
+                    headers=backend.headers(response))
 
 
 @app.errorhandler(Exception)
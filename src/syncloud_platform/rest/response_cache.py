@@ -0,0 +1,75 @@
+import hashlib
+import threading
+import time
+from functools import update_wrapper
+
+from flask import make_response, request, Response
+from syncloudlib import logger
+
+
+class ResponseCache:
+
+    def __init__(self, generations):
+        self.generations = generations
+        self.logger = logger.get_logger('ResponseCache')
+        self.lock = threading.Lock()
+        self.entries = {}
+        self.hits = 0
+        self.misses = 0
+
+    def cached(self, ttl, channels, stamps=()):
+        def decorator(f):
+            def new_func(*args, **kwargs):
+                key = request.full_path
+                generation = self._generation(channels, stamps)
+                entry = self._get(key, generation)
+                if entry is None:
+                    response = make_response(f(*args, **kwargs))
+                    if generation is None or response.status_code != 200:
+                        return response
+                    body = response.get_data()
+                    entry = (generation, time.time() + ttl, hashlib.sha1(body).hexdigest(), body, response.mimetype)
+                    with self.lock:
+                        self.entries[key] = entry
+                    state = 'MISS'
+                else:
+                    state = 'HIT'
+
+                generation, expires, etag, body, mimetype = entry
+                response = Response(body, mimetype=mimetype)
+                response.set_etag(etag)
+                response.headers['Cache-Control'] = 'private, no-cache'
+                response.headers['X-Cache'] = state
+                return response.make_conditional(request)
+            return update_wrapper(new_func, f)
+        return decorator
+
+    def invalidate(self, *channels):
+        for channel in channels:
+            self.generations.bump(channel)
+
+    def stats(self):
+        with self.lock:
+            total = self.hits + self.misses
+            return dict(hits=self.hits, misses=self.misses, entries=len(self.entries),
+                        hit_ratio=float(self.hits) / total if total else 0.0)
+
+    def _generation(self, channels, stamps):
+        # stamps catch changes made outside of the platform, like snapd auto refresh
+        generation = tuple(self.generations.get(channel) for channel in channels) + \
+            tuple(stamp() for stamp in stamps)
+        if None in generation:
+            return None
+        return generation
+
+    def _get(self, key, generation):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None and (entry[0] != generation or entry[1] < time.time()):
+                entry = None
+                del self.entries[key]
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+            return entry
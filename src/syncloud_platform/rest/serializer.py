@@ -0,0 +1,64 @@
+import datetime
+import json
+
+from syncloudlib.json import convertible
+
+PRIMITIVES = (bool, str, int, float, datetime.datetime)
+PRIMITIVE_TYPES = frozenset(PRIMITIVES + (type(None),))
+
+compiled = {}
+
+
+def to_dict(value):
+    if value is None or isinstance(value, PRIMITIVES):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [to_dict(item) for item in value]
+    if isinstance(value, dict):
+        return dict((key, to_dict(item)) for key, item in value.items())
+    return serializer(type(value))(value)
+
+
+def to_json(value):
+    return json.dumps(to_dict(value))
+
+
+def serializer(cls):
+    function = compiled.get(cls)
+    if function is None:
+        function = compile_serializer(cls)
+        compiled[cls] = function
+    return function
+
+
+def compile_serializer(cls):
+    fields = slot_fields(cls)
+    if fields is None:
+        # models without __slots__ have no fixed layout, reflect per object as before
+        return convertible.to_dict
+
+    lines = ['def serialize(value):', '    result = {}']
+    for field in fields:
+        lines.append('    item = value.{0}'.format(field))
+        lines.append('    result[{0!r}] = item if item.__class__ in primitive_types else to_dict(item)'.format(field))
+    lines.append('    return result')
+    namespace = {'to_dict': to_dict, 'primitive_types': PRIMITIVE_TYPES}
+    exec(compile('\n'.join(lines), '<serializer {0}>'.format(cls.__name__), 'exec'), namespace)
+    return namespace['serialize']
+
+
+def slot_fields(cls):
+    fields = []
+    for base in reversed(cls.__mro__):
+        slots = base.__dict__.get('__slots__')
+        if slots is None:
+            if base is not object:
+                return None
+            continue
+        if isinstance(slots, str):
+            slots = [slots]
+        fields.extend(slot for slot in slots if slot not in fields and not slot.startswith('__'))
+    public = getattr(cls, '__public__', None)
+    if public is not None:
+        fields = [field for field in fields if field in public]
+    return fields
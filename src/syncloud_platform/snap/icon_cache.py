@@ -0,0 +1,139 @@
+import json
+import os
+import re
+import threading
+import time
+from os.path import join, isfile
+
+import requests
+from syncloudlib import logger
+
+ICON_URL = 'http://apps.syncloud.org/releases/{0}/images/{1}-128.png'
+ICON_TTL = 24 * 3600
+ICON_CACHE_SIZE = 20 * 1024 * 1024
+ICON_TIMEOUT = 10
+ICON_SUFFIX = '-128.png'
+META_SUFFIX = '.json'
+NAME = re.compile(r'^[\w.-]+$')
+
+
+class IconCache:
+
+    def __init__(self, cache_dir, max_size=ICON_CACHE_SIZE, ttl=ICON_TTL, url=ICON_URL, timeout=ICON_TIMEOUT):
+        self.cache_dir = cache_dir
+        self.max_size = max_size
+        self.ttl = ttl
+        self.url = url
+        self.timeout = timeout
+        self.logger = logger.get_logger('IconCache')
+        self.lock = threading.Lock()
+        self.meta = {}
+
+    def get(self, channel, app):
+        name = icon_name(channel, app)
+        filename = join(self.cache_dir, name)
+        meta = self._read_meta(name) if isfile(filename) else None
+        now = time.time()
+        if meta is not None and now - meta['checked'] < self.ttl:
+            self._touch(filename, now)
+            return name
+
+        headers = {}
+        if meta is not None:
+            if meta.get('etag'):
+                headers['If-None-Match'] = meta['etag']
+            if meta.get('last_modified'):
+                headers['If-Modified-Since'] = meta['last_modified']
+
+        try:
+            response = requests.get(self.url.format(channel, app), headers=headers, timeout=self.timeout)
+            if response.status_code != 304:
+                response.raise_for_status()
+        except requests.exceptions.RequestException as e:
+            if meta is None:
+                raise
+            self.logger.warn('unable to revalidate {0}, serving cached icon: {1}'.format(name, e))
+            self._touch(filename, now)
+            return name
+
+        if meta is not None and response.status_code == 304:
+            meta = dict(meta, checked=now)
+            self._write_meta(name, meta)
+            self._touch(filename, now)
+            return name
+
+        with self.lock:
+            self._write(name, response.content)
+            self._write_meta(name, dict(
+                etag=response.headers.get('ETag'),
+                last_modified=response.headers.get('Last-Modified'),
+                checked=now))
+            self._evict()
+        return name
+
+    def _read_meta(self, name):
+        meta = self.meta.get(name)
+        if meta is not None:
+            return meta
+        try:
+            with open(join(self.cache_dir, name + META_SUFFIX)) as f:
+                meta = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        self.meta[name] = meta
+        return meta
+
+    def _write_meta(self, name, meta):
+        self._write(name + META_SUFFIX, json.dumps(meta).encode())
+        self.meta[name] = meta
+
+    def _write(self, name, content):
+        filename = join(self.cache_dir, name)
+        directory = os.path.dirname(filename)
+        if not os.path.isdir(directory):
+            os.makedirs(directory)
+        temp_filename = '{0}.{1}.{2}'.format(filename, os.getpid(), threading.current_thread().ident)
+        with open(temp_filename, 'wb') as f:
+            f.write(content)
+        os.rename(temp_filename, filename)
+
+    def _touch(self, filename, now):
+        # atime is the lru clock, set it explicitly as the data dir may be mounted noatime
+        try:
+            os.utime(filename, (now, os.stat(filename).st_mtime))
+        except OSError:
+            pass
+
+    def _evict(self):
+        icons = []
+        total = 0
+        for root, dirs, files in os.walk(self.cache_dir):
+            for file in files:
+                if not file.endswith(ICON_SUFFIX):
+                    continue
+                filename = join(root, file)
+                try:
+                    stat = os.stat(filename)
+                except OSError:
+                    continue
+                icons.append((stat.st_atime, stat.st_size, filename))
+                total += stat.st_size
+
+        for atime, size, filename in sorted(icons):
+            if total <= self.max_size:
+                break
+            self.logger.info('evicting {0}'.format(filename))
+            name = os.path.relpath(filename, self.cache_dir)
+            self.meta.pop(name, None)
+            for path in [filename, filename + META_SUFFIX]:
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            total -= size
+
+
+def icon_name(channel, app):
+    if not NAME.match(channel) or not NAME.match(app) or '..' in channel or '..' in app:
+        raise Exception('invalid icon: {0}/{1}'.format(channel, app))
+    return '{0}/{1}{2}'.format(channel, app, ICON_SUFFIX)
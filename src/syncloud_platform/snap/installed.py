@@ -0,0 +1,61 @@
+import json
+import os
+
+from syncloudlib import logger
+
+SNAPD_STATE_FILE = '/var/lib/snapd/state.json'
+
+
+class InstalledSnaps:
+
+    def __init__(self, snapd, state_file=SNAPD_STATE_FILE):
+        self.snapd = snapd
+        self.state_file = state_file
+        self.logger = logger.get_logger('InstalledSnaps')
+        self.index = (None, None, None)
+
+    def list(self):
+        return list(self._index()[1])
+
+    def get(self, name):
+        return self._index()[2].get(name)
+
+    def has_app(self, name, app):
+        snap = self.get(name)
+        if snap is None:
+            return False
+        return app in [declared['name'] for declared in snap.get('apps', [])]
+
+    def generation(self):
+        return self._stamp()
+
+    def invalidate(self):
+        self.index = (None, None, None)
+
+    def _index(self):
+        stamp = self._stamp()
+        index = self.index
+        if stamp is not None and index[0] == stamp:
+            return index
+        snaps = self._load()
+        index = (stamp, snaps, dict((snap['name'], snap) for snap in snaps))
+        self.index = index
+        return index
+
+    def _stamp(self):
+        # snapd persists its state on every change progress, including the final one
+        try:
+            stat = os.stat(self.state_file)
+            return stat.st_mtime_ns, stat.st_size
+        except OSError:
+            return None
+
+    def _load(self):
+        self.logger.info('installed snaps')
+        response = self.snapd.get('/v2/snaps')
+        self.logger.debug("snaps response: {0}".format(response.text))
+        snap_response = json.loads(response.text)
+        if snap_response['status'] != 'OK':
+            raise Exception(snap_response['result']['message'])
+        apps = snap_response['result']
+        return sorted(apps, key=lambda app: app['name'])
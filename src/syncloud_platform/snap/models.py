@@ -1,22 +1,22 @@
-from syncloudlib.json.convertible import Field, List
+class App(object):
+    __slots__ = ('id', 'name', 'required', 'ui', 'url', 'icon', 'description', 'enabled')
 
+    def __init__(self, id=None, name=None, required=False, ui=False, url='', icon=None,
+                 description='No description given yet', enabled=True):
+        self.id = id
+        self.name = name
+        self.required = required
+        self.ui = ui
+        self.url = url
+        self.icon = icon
+        self.description = description
+        self.enabled = enabled
 
-class App:
-    id = Field()
-    name = Field()
-    required = Field(default=False)
-    ui = Field(default=False)
-    url = Field(default='')
-    icon = Field(default=None)
-    description = Field(default='No description given yet')
-    enabled = Field(default=True)
 
+class AppVersions(object):
+    __slots__ = ('app', 'current_version', 'installed_version')
 
-class Apps:
-    apps = Field(field_type=List(App))
-
-
-class AppVersions:
-    app = Field(field_type=App)
-    current_version = Field()
-    installed_version = Field()
+    def __init__(self, app=None, current_version=None, installed_version=None):
+        self.app = app
+        self.current_version = current_version
+        self.installed_version = installed_version
@@ -1,17 +1,33 @@
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
 from syncloudlib import logger
 import json
-import requests_unixsocket
 import requests
+import time
+from syncloud_platform import metrics, operations
 from syncloud_platform.snap.models import AppVersions, App
 
-SOCKET = "http+unix://%2Fvar%2Frun%2Fsnapd.socket"
+STORE_SNAPS_KEY = 'store_snaps'
+INSTALLER_VERSION_KEY = 'installer_version_{0}'
+WORKERS = 4
+TIMEOUT = 60
+STORE_CONNECT_TIMEOUT = 5
+STORE_READ_TIMEOUT = 20
+CHANGE_POLL_INTERVAL = 0.5
+CHANGE_WATCH_DURATION = 60
+CHANGE_HEARTBEAT = 15
+DOWNLOAD_TASK = 'download-snap'
 
 
 class Snap:
 
-    def __init__(self, platform_config, info):
+    def __init__(self, platform_config, info, snapd, store_cache, installed, timeout=TIMEOUT):
         self.info = info
+        self.snapd = snapd
+        self.store_cache = store_cache
+        self.installed = installed
         self.platform_config = platform_config
+        self.timeout = timeout
+        self.executor = ThreadPoolExecutor(max_workers=WORKERS)
         self.logger = logger.get_logger('Snap')
 
     def update(self, release=None):
@@ -20,28 +36,48 @@ class Snap:
 
     def install(self, app_id):
         self.logger.info('snap install')
-        session = requests_unixsocket.Session()
-        response = session.post('{0}/v2/snaps/{1}'.format(SOCKET, app_id), json={'action': 'install'})
+        response = self.snapd.post('/v2/snaps/{0}'.format(app_id), {'action': 'install'})
         self.logger.info("install response: {0}".format(response.text))
+        self.installed.invalidate()
+        self.invalidate_store()
+        return change_id(response)
 
     def upgrade(self, app_id, channel, force):
         self.logger.info('snap upgrade')
-        session = requests_unixsocket.Session()
-        response = session.post('{0}/v2/snaps/{1}'.format(SOCKET, app_id), json={
+        response = self.snapd.post('/v2/snaps/{0}'.format(app_id), {
             'action': 'refresh',
             'channel': channel,
             'ignore-validation': force
         })
         self.logger.info("refresh response: {0}".format(response.text))
-        snapd_response = json.loads(response.text)
-        if (snapd_response['status']) != 'Accepted':
-            raise Exception(snapd_response['result']['message'])
+        self.installed.invalidate()
+        self.invalidate_store()
+        return change_id(response)
+
+    def install_many(self, app_ids):
+        return self._multi('install', app_ids)
+
+    def upgrade_many(self, app_ids):
+        return self._multi('refresh', app_ids)
+
+    def _multi(self, action, app_ids):
+        if not app_ids:
+            raise Exception('no apps to {0}'.format(action))
+        self.logger.info('snap {0}: {1}'.format(action, ', '.join(app_ids)))
+        response = self.snapd.post('/v2/snaps', {'action': action, 'snaps': app_ids})
+        self.logger.info("{0} response: {1}".format(action, response.text))
+        self.installed.invalidate()
+        self.invalidate_store()
+        return change_id(response)
+
+    def invalidate_store(self):
+        self.store_cache.invalidate(STORE_SNAPS_KEY)
+        self.store_cache.invalidate(INSTALLER_VERSION_KEY.format(self.platform_config.get_channel()))
 
     def status(self):
         self.logger.info('snap changes')
         
-        session = requests_unixsocket.Session()
-        response = session.get('{0}/v2/changes?select=in-progress'.format(SOCKET))
+        response = self.snapd.get('/v2/changes?select=in-progress')
         self.logger.info("changes response: {0}".format(response.text))
         snapd_response = json.loads(response.text)
 
@@ -52,23 +88,75 @@ class Snap:
 
     def remove(self, app_id):
         self.logger.info('snap remove')
-        session = requests_unixsocket.Session()
-        session.post('{0}/v2/snaps/{1}'.format(SOCKET, app_id), json={'action': 'remove'})
-
-    def list(self):
-        installed_apps = self.installed_all_apps()
-        store_apps = self.store_all_apps()
-        apps = join_apps(installed_apps, store_apps)
-        apps.append(self._installer())
+        response = self.snapd.post('/v2/snaps/{0}'.format(app_id), {'action': 'remove'})
+        self.logger.info("remove response: {0}".format(response.text))
+        self.installed.invalidate()
+        return change_id(response)
+
+    def change(self, id):
+        response = self.snapd.get('/v2/changes/{0}'.format(id))
+        snapd_response = json.loads(response.text)
+        if snapd_response['status'] != 'OK':
+            raise Exception(snapd_response['result']['message'])
+        return change_progress(snapd_response['result'])
+
+    def watch_change(self, id, interval=CHANGE_POLL_INTERVAL, duration=CHANGE_WATCH_DURATION,
+                     heartbeat=CHANGE_HEARTBEAT):
+        # yields None as a heartbeat when nothing changed for a while, stops after duration even if not ready
+        last = None
+        start = time.time()
+        quiet_since = start
+        while True:
+            progress = self.change(id)
+            now = time.time()
+            if progress != last:
+                yield progress
+                last = progress
+                quiet_since = now
+            if progress['ready']:
+                if progress['status'] != 'Error':
+                    self.installed.invalidate()
+                return
+            if now - start >= duration:
+                return
+            if now - quiet_since >= heartbeat:
+                yield None
+                quiet_since = now
+            time.sleep(interval)
+
+    def list(self, strict=False):
+        # strict raises instead of leaving out the store apps or the installer when they are not available
+        deadline = time.time() + self.timeout
+        urls = self.info.url_builder()
+        installed_future = self.executor.submit(operations.bind(metrics.bind(self.installed_all_apps)), urls)
+        store_future = self.executor.submit(operations.bind(metrics.bind(self.store_all_apps)), urls)
+        installer_future = self.executor.submit(operations.bind(metrics.bind(self._installer)), urls)
+
+        apps = join_apps(result(installed_future, deadline),
+                         self._partial_result(store_future, deadline, [], 'store apps', strict))
+        installer_app = self._partial_result(installer_future, deadline, None, 'installer', strict)
+        if installer_app:
+            apps.append(installer_app)
         return apps
 
-    def store_all_apps(self):
+    def _partial_result(self, future, deadline, default, name, strict=False):
+        try:
+            return result(future, deadline)
+        except Exception as e:
+            if strict:
+                raise
+            self.logger.warn('{0} not available: {1}'.format(name, repr(e)))
+            return default
+
+    def store_all_apps(self, urls=None):
         self.logger.info('snap list')
-        return [self._available_app(app) for app in self._available_snaps()]
+        urls = self._url_builder(urls)
+        return [self._available_app(app, urls) for app in self._available_snaps()]
 
-    def find_in_store(self, app_id):
+    def find_in_store(self, app_id, urls=None):
         self.logger.info('snap list')
-        found_apps = [self._available_app(app) for app in self._available_snaps(app_id)]
+        urls = self._url_builder(urls)
+        found_apps = [self._available_app(app, urls) for app in self._available_snaps(app_id)]
 
         if len(found_apps) == 0:
             self.logger.warn("No app found")
@@ -80,84 +168,98 @@ class Snap:
         return found_apps[0]
 
     def user_apps(self):
-        return [self._available_app(app) for app in self._available_snaps() if app['type'] == 'app']
+        urls = self.info.url_builder()
+        return [self._available_app(app, urls) for app in self._available_snaps() if app['type'] == 'app']
 
     def _available_snaps(self, query='*'):
         self.logger.info('available snaps, query: {0}'.format(query))
-        session = requests_unixsocket.Session()
-        response = session.get('{0}/v2/find?name={1}'.format(SOCKET, query))
+        apps = self.store_cache.get(STORE_SNAPS_KEY, self._store_snaps)
+        if query != '*':
+            return [app for app in apps if app['name'] == query]
+        return apps
+
+    def _store_snaps(self):
+        response = self.snapd.get('/v2/find?name=*')
         self.logger.info("find response: {0}".format(response.text))
         snapd_response = json.loads(response.text)
-        if query != "*" and snapd_response['status'] != 'OK':
-            return []
+        if snapd_response['status'] != 'OK':
+            raise Exception(snapd_response['result']['message'])
         apps = snapd_response['result']
         return sorted(apps, key=lambda app: app['name'])
 
     def installed_user_apps(self):
-        return [self._installed_app(app) for app in self._installed_snaps() if app['type'] == 'app']
+        urls = self.info.url_builder()
+        return [self._installed_app(app, urls) for app in self.installed_snaps() if app['type'] == 'app']
 
-    def installed_all_apps(self):
-        return [self._installed_app(app) for app in self._installed_snaps()]
+    def installed_all_apps(self, urls=None):
+        urls = self._url_builder(urls)
+        return [self._installed_app(app, urls) for app in self.installed_snaps()]
 
-    def _installed_snaps(self):
-        self.logger.info('installed snaps')
-        session = requests_unixsocket.Session()
-        response = session.get('{0}/v2/snaps'.format(SOCKET))
-        self.logger.debug("snaps response: {0}".format(response.text))
-        snap_response = json.loads(response.text)
-
-        apps = snap_response['result']
-        return sorted(apps, key=lambda app: app['name'])
+    def installed_snaps(self):
+        return self.installed.list()
 
 
-    def _installer(self):
+    def _installer(self, urls):
         channel = self.platform_config.get_channel()
         self.logger.info('system info')
-        session = requests_unixsocket.Session()
-        response = session.get('{0}/v2/system-info'.format(SOCKET))
+        response = self.snapd.get('/v2/system-info')
         self.logger.debug("system info response: {0}".format(response.text))
         snap_response = json.loads(response.text)
 
-        version_response = requests.get('http://apps.syncloud.org/releases/{0}/snapd.version'.format(channel))
+        store_version = self.store_cache.get(INSTALLER_VERSION_KEY.format(channel),
+                                             lambda: self._installer_store_version(channel))
 
         return self.to_app(
             'installer',
             'Installer',
             channel,
             snap_response['result']['version'],
-            version_response.text
+            store_version,
+            urls
         )
 
-    def _installed_app(self, installed_app):
+    def _installer_store_version(self, channel):
+        version_response = requests.get('http://apps.syncloud.org/releases/{0}/snapd.version'.format(channel),
+                                        timeout=(STORE_CONNECT_TIMEOUT, STORE_READ_TIMEOUT))
+        version_response.raise_for_status()
+        return version_response.text
+
+    def _installed_app(self, installed_app, urls):
         return self.to_app(
             installed_app['name'],
             installed_app['summary'],
             installed_app['channel'],
             installed_app['version'],
-            None)
+            None,
+            urls)
 
-    def _available_app(self, available_app):
+    def _available_app(self, available_app, urls):
         return self.to_app(
             available_app['name'],
             available_app['summary'],
             available_app['channel'],
             None,
-            available_app['version'])
+            available_app['version'],
+            urls)
 
-    def find_installed(self, app_id):
-        session = requests_unixsocket.Session()
-        response = session.get('{0}/v2/snaps/{1}'.format(SOCKET, app_id))
-        self.logger.info("snap response: {0}".format(response.text))
-        snap_response = json.loads(response.text)
-        if snap_response['status-code'] == 404:
+    def _url_builder(self, urls):
+        if urls is None:
+            return self.info.url_builder()
+        return urls
+
+    def find_installed(self, app_id, urls=None):
+        app = self.installed.get(app_id)
+        if app is None:
             return None
-        app = snap_response['result']
-        existing_app = self._installed_app(app)
-        return existing_app
+        return self._installed_app(app, self._url_builder(urls))
 
     def get_app(self, app_id):
-        existing_app = self.find_installed(app_id)
-        store_app = self.find_in_store(app_id)
+        deadline = time.time() + self.timeout
+        urls = self.info.url_builder()
+        installed_future = self.executor.submit(operations.bind(metrics.bind(self.find_installed)), app_id, urls)
+        store_future = self.executor.submit(operations.bind(metrics.bind(self.find_in_store)), app_id, urls)
+        existing_app = result(installed_future, deadline)
+        store_app = self._partial_result(store_future, deadline, None, 'store app')
         if not existing_app and not store_app:
             raise Exception("not found")
 
@@ -170,12 +272,12 @@ class Snap:
         existing_app.current_version = store_app.current_version
         return existing_app
 
-    def to_app(self, id, name, channel, installed_version, store_version):
+    def to_app(self, id, name, channel, installed_version, store_version, urls):
 
         new_app = App()
         new_app.id = id
         new_app.name = name
-        new_app.url = self.info.url(id)
+        new_app.url = urls.url(id)
         new_app.icon = "/rest/app_image?channel={0}&app={1}".format(channel, id)
 
         app_version = AppVersions()
@@ -186,6 +288,59 @@ class Snap:
         return app_version
 
 
+def change_id(response):
+    snapd_response = json.loads(response.text)
+    if snapd_response['status'] != 'Accepted':
+        raise Exception(snapd_response['result']['message'])
+    return snapd_response['change']
+
+
+def change_progress(change):
+    tasks = []
+    bytes_done = 0
+    bytes_total = 0
+    for task in change.get('tasks', []):
+        progress = task.get('progress', {})
+        done = progress.get('done', 0)
+        total = progress.get('total', 0)
+        if task.get('kind') == DOWNLOAD_TASK:
+            bytes_done += done
+            bytes_total += total
+        tasks.append(dict(
+            kind=task.get('kind'),
+            summary=task.get('summary'),
+            status=task.get('status'),
+            label=progress.get('label', ''),
+            done=done,
+            total=total))
+
+    return dict(
+        id=change['id'],
+        kind=change.get('kind'),
+        summary=change.get('summary'),
+        status=change['status'],
+        ready=change.get('ready', False),
+        err=change.get('err'),
+        tasks_done=len([task for task in tasks if task['status'] == 'Done']),
+        tasks_total=len(tasks),
+        bytes_done=bytes_done,
+        bytes_total=bytes_total,
+        tasks=tasks)
+
+
+def remaining(deadline):
+    return max(0, deadline - time.time())
+
+
+def result(future, deadline):
+    try:
+        return future.result(timeout=remaining(deadline))
+    except TimeoutError:
+        # a call still waiting for a worker is dropped instead of holding the shared pool later
+        future.cancel()
+        raise
+
+
 def join_apps(installed_apps, store_apps):
     all_apps = dict([(app.app.id, app) for app in installed_apps])
     for store_app in store_apps:
@@ -194,4 +349,4 @@ def join_apps(installed_apps, store_apps):
         else:
             all_apps[store_app.app.id] = store_app
 
-    return all_apps.values()
+    return list(all_apps.values())
@@ -0,0 +1,87 @@
+import os
+import threading
+import time
+
+import requests
+from requests.compat import urlparse
+from requests_unixsocket.adapters import UnixAdapter
+from syncloudlib import logger
+
+SOCKET = "http+unix://%2Fvar%2Frun%2Fsnapd.socket"
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 60
+RETRIES = 1
+IDEMPOTENT_METHODS = ['GET']
+
+
+def endpoint(path):
+    return '/'.join(path.split('?')[0].split('/')[:3])
+
+
+class SocketAdapter(UnixAdapter):
+    # UnixAdapter keeps a pool per full url, share one pool (and its keep-alive connection) per socket
+    def get_connection(self, url, proxies=None):
+        parsed = urlparse(url)
+        return UnixAdapter.get_connection(self, '{0}://{1}'.format(parsed.scheme, parsed.netloc), proxies)
+
+
+class SnapdClient:
+
+    def __init__(self, socket=SOCKET, connect_timeout=CONNECT_TIMEOUT, read_timeout=READ_TIMEOUT, retries=RETRIES):
+        self.socket = socket
+        self.timeout = (connect_timeout, read_timeout)
+        self.retries = retries
+        self.logger = logger.get_logger('SnapdClient')
+        self.lock = threading.Lock()
+        self.session = None
+        self.session_pid = None
+        self.latency = {}
+
+    def get(self, path):
+        return self.request('GET', path)
+
+    def post(self, path, body):
+        return self.request('POST', path, json=body)
+
+    def request(self, method, path, **kwargs):
+        attempt = 0
+        while True:
+            start = time.time()
+            try:
+                response = self._session().request(method, '{0}{1}'.format(self.socket, path),
+                                                   timeout=self.timeout, **kwargs)
+                self._record(method, path, time.time() - start, False)
+                return response
+            except requests.exceptions.ConnectionError as e:
+                self._record(method, path, time.time() - start, True)
+                if method not in IDEMPOTENT_METHODS or attempt >= self.retries:
+                    raise
+                attempt += 1
+                self.logger.warn('snapd connection failed, retrying {0} {1}: {2}'.format(method, path, e))
+                self._reset()
+
+    def stats(self):
+        with self.lock:
+            return dict((key, dict(count=count, errors=errors, total=total, max=longest))
+                        for key, (count, errors, total, longest) in self.latency.items())
+
+    def _session(self):
+        pid = os.getpid()
+        if self.session is None or self.session_pid != pid:
+            session = requests.Session()
+            session.mount('http+unix://', SocketAdapter(timeout=self.timeout[1]))
+            self.session = session
+            self.session_pid = pid
+        return self.session
+
+    def _reset(self):
+        session = self.session
+        self.session = None
+        if session is not None and self.session_pid == os.getpid():
+            session.close()
+
+    def _record(self, method, path, seconds, error):
+        key = '{0} {1}'.format(method, endpoint(path))
+        with self.lock:
+            count, errors, total, longest = self.latency.get(key, (0, 0, 0.0, 0.0))
+            self.latency[key] = (count + 1, errors + (1 if error else 0), total + seconds, max(longest, seconds))
@@ -0,0 +1,98 @@
+import fcntl
+import json
+import os
+import threading
+import time
+from os.path import join
+
+from syncloudlib import logger
+
+CACHE_TTL = 3600
+
+
+class StoreCache:
+
+    def __init__(self, cache_dir, ttl=CACHE_TTL):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+        self.logger = logger.get_logger('StoreCache')
+        self.lock = threading.Lock()
+        self.memory = {}
+        self.refreshing = {}
+
+    def get(self, key, load):
+        entry = self._read(key)
+        if entry is None:
+            return self._refresh(key, load)
+        created, value = entry
+        if time.time() - created > self.ttl:
+            self.refresh_in_background(key, load)
+        return value
+
+    def invalidate(self, key):
+        entry = self._read(key)
+        if entry is not None:
+            self.logger.info('invalidating {0}'.format(key))
+            self._write(key, 0, entry[1])
+
+    def refresh_in_background(self, key, load):
+        with self.lock:
+            thread = self.refreshing.get(key)
+            if thread is not None:
+                return thread
+            thread = threading.Thread(target=self._background_refresh, args=(key, load))
+            thread.daemon = True
+            self.refreshing[key] = thread
+        thread.start()
+        return thread
+
+    def _background_refresh(self, key, load):
+        try:
+            with open(self._filename(key) + '.lock', 'a') as lock:
+                try:
+                    fcntl.flock(lock, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except (IOError, OSError):
+                    self.logger.info('{0} is being refreshed by another process'.format(key))
+                    return
+                self._refresh(key, load)
+        except Exception as e:
+            self.logger.warn('unable to refresh {0}, serving stale value: {1}'.format(key, e))
+        finally:
+            with self.lock:
+                self.refreshing.pop(key, None)
+
+    def _refresh(self, key, load):
+        value = load()
+        self._write(key, time.time(), value)
+        return value
+
+    def _filename(self, key):
+        return join(self.cache_dir, '{0}.json'.format(key))
+
+    def _read(self, key):
+        filename = self._filename(key)
+        try:
+            mtime = os.stat(filename).st_mtime_ns
+        except OSError:
+            return None
+        cached = self.memory.get(key)
+        if cached is not None and cached[0] == mtime:
+            return cached[1]
+        try:
+            with open(filename) as f:
+                entry = json.load(f)
+        except (IOError, OSError, ValueError) as e:
+            self.logger.warn('unable to read {0}: {1}'.format(filename, e))
+            return None
+        result = (entry['created'], entry['value'])
+        self.memory[key] = (mtime, result)
+        return result
+
+    def _write(self, key, created, value):
+        if not os.path.isdir(self.cache_dir):
+            os.makedirs(self.cache_dir)
+        filename = self._filename(key)
+        temp_filename = '{0}.{1}.{2}'.format(filename, os.getpid(), threading.current_thread().ident)
+        with open(temp_filename, 'w') as f:
+            json.dump({'created': created, 'value': value}, f)
+        os.rename(temp_filename, filename)
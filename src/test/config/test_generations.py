@@ -0,0 +1,74 @@
+import mmap
+
+from syncloud_platform.config.generations import Generations, USER_CONFIG, PORT_CONFIG
+from syncloud_platform.config.user_config import PlatformUserConfig
+from syncloud_platform.insider.config import Port
+from syncloud_platform.insider.device_info import DeviceInfo
+from syncloud_platform.insider.port_config import PortConfig
+from test.insider.helpers import temp_file, get_port_config
+from os.path import dirname
+
+
+def test_bump_is_shared():
+    filename = temp_file()
+    worker1 = Generations(filename)
+    worker2 = Generations(filename)
+
+    assert worker1.get(USER_CONFIG) == 0
+    worker2.bump(USER_CONFIG)
+    assert worker1.get(USER_CONFIG) == 1
+    assert worker1.get(PORT_CONFIG) == 0
+
+
+def test_not_available():
+    generations = Generations('/not/existing/generations')
+    generations.bump(USER_CONFIG)
+    assert generations.get(USER_CONFIG) is None
+
+
+def test_bump_without_memory_map(monkeypatch):
+    filename = temp_file()
+    worker1 = Generations(filename)
+    worker2 = Generations(filename)
+    assert worker1.get(USER_CONFIG) == 0
+
+    def no_mmap(*args):
+        raise OSError('mmap is not available')
+    monkeypatch.setattr(mmap, 'mmap', no_mmap)
+    worker2.bump(USER_CONFIG)
+    assert worker2.get(USER_CONFIG) is None
+    assert worker1.get(USER_CONFIG) == 1
+    assert worker1.get(PORT_CONFIG) == 0
+
+
+def test_user_config_invalidated_by_other_worker():
+    config_db = temp_file()
+    generations = temp_file()
+    worker1 = PlatformUserConfig(config_db, generations=Generations(generations))
+    worker1.init_user_config()
+    worker2 = PlatformUserConfig(config_db, generations=Generations(generations))
+
+    assert not worker1.is_activated()
+    worker2.set_activated()
+    assert worker1.is_activated()
+
+
+def test_device_info_invalidated_by_other_worker():
+    generations = temp_file()
+    user_config = PlatformUserConfig(temp_file(), generations=Generations(generations))
+    user_config.init_user_config()
+    user_config.update_domain('device', 'token')
+    user_config.set_redirect_enabled(True)
+    user_config.update_device_access(False, True, '1.1.1.1', 80, 443)
+    port_config = get_port_config([Port(443, 10000, 'TCP')])
+    port_config.generations = Generations(generations)
+
+    device_info = DeviceInfo(user_config, port_config, Generations(generations))
+    assert device_info.url('app') == 'https://app.device.syncloud.it:10000'
+
+    other_port_config = PortConfig(dirname(port_config.filename), Generations(generations))
+    other_port_config.add_or_update(Port(443, 10001, 'TCP'))
+    assert device_info.url('app') == 'https://app.device.syncloud.it:10001'
+
+    user_config.update_domain('other', 'token')
+    assert device_info.url('app') == 'https://app.other.syncloud.it:10001'
@@ -0,0 +1,47 @@
+import os
+import tempfile
+from os.path import join, isfile
+
+import pytest
+
+from syncloud_platform.config.config import PlatformConfig, PLATFORM_CONFIG_NAME, PLATFORM_CONFIG_CACHE_SUFFIX
+
+
+def write_config(config_dir, data_dir):
+    with open(join(config_dir, PLATFORM_CONFIG_NAME), 'w') as f:
+        f.write("""
+[platform]
+data_dir: {0}
+log_root: %(data_dir)s/log
+certbot_test_cert: true
+""".format(data_dir))
+
+
+def test_values():
+    config_dir = tempfile.mkdtemp()
+    write_config(config_dir, '/data')
+
+    config = PlatformConfig(config_dir)
+
+    assert config.get_log_root() == '/data/log'
+    assert config.is_certbot_test_cert()
+    assert config.get_channel() is None
+    assert not isfile(join(config_dir, PLATFORM_CONFIG_NAME + PLATFORM_CONFIG_CACHE_SUFFIX))
+    with pytest.raises(AttributeError):
+        config.values.data_dir = '/other'
+
+
+def test_cache():
+    config_dir = tempfile.mkdtemp()
+    config_file = join(config_dir, PLATFORM_CONFIG_NAME)
+    write_config(config_dir, '/data')
+
+    assert PlatformConfig(config_dir, use_cache=True).get_log_root() == '/data/log'
+    assert isfile(config_file + PLATFORM_CONFIG_CACHE_SUFFIX)
+    assert PlatformConfig(config_dir, use_cache=True).get_log_root() == '/data/log'
+
+    write_config(config_dir, '/other')
+    stat = os.stat(config_file)
+    os.utime(config_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+    assert PlatformConfig(config_dir, use_cache=True).get_log_root() == '/other/log'
@@ -1,4 +1,6 @@
-from os.path import dirname, join, isfile
+from os.path import dirname, join
+import tempfile
+import pytest
 
 from syncloud_platform.config.user_config import PlatformUserConfig
 from test.insider.helpers import temp_file
@@ -37,9 +39,7 @@ api_url = http://api.syncloud.it
 user_email = user@example.com
 user_update_token = token2
        """)
-    config_db = join(dirname(__file__), 'db')
-    if isfile(config_db):
-        os.remove(config_db)
+    config_db = join(tempfile.mkdtemp(), 'db')
     config = PlatformUserConfig(config_db, old_config_file)
     assert config.get_redirect_domain() == 'syncloud.it'
     assert config.get_upnp() == True
@@ -47,11 +47,92 @@ user_update_token = token2
     assert config.get_external_access() == False
     
     assert not path.isfile(old_config_file)
+    config.close()
+    assert os.listdir(dirname(config_db)) == ['db']
 
 def test_none():
-    config_db = join(dirname(__file__), 'db')
-    if isfile(config_db):
-        os.remove(config_db)
-    config = PlatformUserConfig(config_db)
+    config = PlatformUserConfig(join(tempfile.mkdtemp(), 'db'))
     config.set_web_secret_key(None)
+    config.close()
     
+
+
+def test_cache_sees_changes_from_other_connection():
+    config_db = temp_file()
+    config = PlatformUserConfig(config_db)
+    config.init_user_config()
+    other = PlatformUserConfig(config_db)
+
+    assert not config.is_activated()
+    other.set_activated()
+    assert config.is_activated()
+
+
+def test_cache_keeps_db_value_types():
+    config = PlatformUserConfig(temp_file())
+    config.init_user_config()
+
+    config.update_device_access(False, True, '1.1.1.1', 80, 443)
+    assert config.get_manual_access_port() == '443'
+    config.update_device_access(False, True, '1.1.1.1', 80, 444)
+    assert config.get_manual_access_port() == '444'
+
+
+def test_snapshot():
+    config = PlatformUserConfig(temp_file())
+    config.init_user_config()
+    config.update_device_access(False, True, '1.1.1.1', 80, 443)
+
+    snapshot = config.snapshot()
+    config.update_device_access(True, False, '2.2.2.2', 81, 444)
+
+    assert snapshot.get_external_access()
+    assert not snapshot.get_upnp()
+    assert snapshot.get_public_ip() == '1.1.1.1'
+    assert snapshot.get_manual_access_port() == '443'
+    assert snapshot.get_redirect_api_url() == 'http://api.syncloud.it'
+    assert snapshot.get_domain_update_token() is None
+    with pytest.raises(AttributeError):
+        snapshot.values = {}
+
+
+def test_get_many():
+    config = PlatformUserConfig(temp_file())
+    config.init_user_config()
+    config.update_domain('device', 'token')
+
+    assert config.get_many(['platform.user_domain', 'platform.domain_update_token', 'missing']) == {
+        'platform.user_domain': 'device',
+        'platform.domain_update_token': 'token',
+        'missing': None
+    }
+
+
+def test_transaction_commits_once():
+    config_db = temp_file()
+    config = PlatformUserConfig(config_db)
+    config.init_user_config()
+    other = PlatformUserConfig(config_db)
+
+    with config.transaction():
+        config.set_user_email('user@example.com')
+        config.update_domain('device', 'token')
+        assert config.get_domain_update_token() == 'token'
+        assert other.get_domain_update_token() is None
+
+    assert other.get_user_email() == 'user@example.com'
+    assert other.get_domain_update_token() == 'token'
+
+
+def test_transaction_rollback():
+    config = PlatformUserConfig(temp_file())
+    config.init_user_config()
+
+    with pytest.raises(Exception):
+        with config.transaction():
+            config.update_domain('device', 'token')
+            config.set_activated()
+            raise Exception('activation failed')
+
+    assert config.get_user_domain() is None
+    assert not config.is_activated()
@@ -0,0 +1,68 @@
+import sqlite3
+
+from syncloud_platform.config import user_config
+from syncloud_platform.config.user_config import PlatformUserConfig
+from test.insider.helpers import temp_file
+
+
+def activation_writes(config):
+    config.set_redirect_enabled(True)
+    config.update_redirect('syncloud.it', 'http://api.syncloud.it')
+    config.set_user_email('user@example.com')
+    config.set_user_update_token('user_token')
+    config.update_domain('device', 'domain_token')
+    config.update_device_access(False, False, None, 0, 0)
+    config.set_web_secret_key('secret')
+    config.set_activated()
+
+
+def count_commits(activate):
+    commits = []
+    connect = sqlite3.connect
+
+    def count(statement):
+        if statement.upper().startswith('COMMIT'):
+            commits.append(statement)
+
+    class CountingConnection(sqlite3.Connection):
+        # the config installs its own trace callback, chain ours in front of it
+        def set_trace_callback(self, callback):
+            sqlite3.Connection.set_trace_callback(
+                self, lambda statement: count(statement) or (callback and callback(statement)))
+
+    def counting_connect(*args, **kwargs):
+        connection = connect(*args, factory=CountingConnection, **kwargs)
+        connection.set_trace_callback(None)
+        return connection
+
+    user_config.sqlite3.connect = counting_connect
+    try:
+        config = PlatformUserConfig(temp_file())
+        config.init_user_config()
+        activate(config)
+    finally:
+        user_config.sqlite3.connect = connect
+    return len(commits)
+
+
+def activation_transactions(config):
+    with config.transaction():
+        config.set_redirect_enabled(True)
+        config.update_redirect('syncloud.it', 'http://api.syncloud.it')
+        config.set_user_email('user@example.com')
+    with config.transaction():
+        config.set_user_update_token('user_token')
+        config.update_domain('device', 'domain_token')
+        config.set_web_secret_key('secret')
+    config.update_device_access(False, False, None, 0, 0)
+    config.set_activated()
+
+
+def test_commits_per_activation():
+    before = count_commits(activation_writes)
+    after = count_commits(activation_transactions)
+
+    # counts COMMIT statements, how many of them reach the disk depends on the synchronous pragma
+    print('commits per activation, before: {0}, after: {1}'.format(before, after))
+    assert after == 4
+    assert before > after
@@ -0,0 +1,98 @@
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+
+from syncloud_platform.insider.igd import values
+
+SERVICE_TYPE = 'urn:schemas-upnp-org:service:WANIPConnection:1'
+FAULT = '<?xml version="1.0"?>' \
+        '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"><s:Body><s:Fault>' \
+        '<faultcode>s:Client</faultcode><faultstring>UPnPError</faultstring><detail>' \
+        '<UPnPError xmlns="urn:schemas-upnp-org:control-1-0">' \
+        '<errorCode>{0}</errorCode><errorDescription>{1}</errorDescription>' \
+        '</UPnPError></detail></s:Fault></s:Body></s:Envelope>'
+RESPONSE = '<?xml version="1.0"?>' \
+           '<s:Envelope xmlns:s="http://schemas.xmlsoap.org/soap/envelope/"><s:Body>' \
+           '<u:{0}Response xmlns:u="{1}">{2}</u:{0}Response></s:Body></s:Envelope>'
+
+
+class IgdHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        service_type, action = self.headers['SOAPAction'].strip('"').split('#')
+        self.server.requests.append(action)
+        if self.path != '/ctl/IPConn':
+            return self._respond(404, '')
+        if service_type != self.server.service_type:
+            return self._respond(500, FAULT.format(401, 'Invalid Action'))
+        arguments = values(self.rfile.read(length))
+        result = getattr(self.server, action)(arguments)
+        if isinstance(result, int):
+            return self._respond(500, FAULT.format(result, 'Error'))
+        body = ''.join('<{0}>{1}</{0}>'.format(name, value) for name, value in result)
+        self._respond(200, RESPONSE.format(action, service_type, body))
+
+    def _respond(self, status, body):
+        data = body.encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'text/xml')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeIgd(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+    def __init__(self, external_ip='1.1.1.1', service_type=SERVICE_TYPE):
+        HTTPServer.__init__(self, ('127.0.0.1', 0), IgdHandler)
+        self.external_ip = external_ip
+        self.service_type = service_type
+        self.mappings = []
+        self.requests = []
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def control_url(self):
+        return 'http://127.0.0.1:{0}/ctl/IPConn'.format(self.server_address[1])
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+
+    def GetExternalIPAddress(self, arguments):
+        return [('NewExternalIPAddress', self.external_ip)]
+
+    def GetGenericPortMappingEntry(self, arguments):
+        index = int(arguments['NewPortMappingIndex'])
+        if index >= len(self.mappings):
+            return 713
+        external_port, protocol, local_ip, local_port, description = self.mappings[index]
+        return [('NewRemoteHost', ''), ('NewExternalPort', external_port), ('NewProtocol', protocol),
+                ('NewInternalPort', local_port), ('NewInternalClient', local_ip), ('NewEnabled', 1),
+                ('NewPortMappingDescription', description), ('NewLeaseDuration', 0)]
+
+    def AddPortMapping(self, arguments):
+        external_port = int(arguments['NewExternalPort'])
+        protocol = arguments['NewProtocol']
+        for mapping in self.mappings:
+            if mapping[0] == external_port and mapping[1] == protocol:
+                return 718
+        self.mappings.append((external_port, protocol, arguments['NewInternalClient'],
+                              int(arguments['NewInternalPort']), arguments['NewPortMappingDescription']))
+        return []
+
+    def DeletePortMapping(self, arguments):
+        external_port = int(arguments['NewExternalPort'])
+        protocol = arguments['NewProtocol']
+        mappings = [m for m in self.mappings if not (m[0] == external_port and m[1] == protocol)]
+        if len(mappings) == len(self.mappings):
+            return 714
+        self.mappings = mappings
+        return []
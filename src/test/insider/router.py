@@ -0,0 +1,102 @@
+import socket
+import struct
+import threading
+import time
+
+
+class StandInMapper:
+    def __init__(self, name, router, working, delay, failure_delay):
+        self.mapper_name = name
+        self.router = router
+        self.working = working
+        self.delay = delay
+        self.failure_delay = failure_delay
+        self.calls = 0
+
+    def name(self):
+        return self.mapper_name
+
+    def external_ip(self, cancelled=None):
+        self.calls += 1
+        if not self.working:
+            time.sleep(self.failure_delay)
+            raise Exception('{0} gateway did not answer'.format(self.mapper_name))
+        time.sleep(self.delay)
+        return self.router.external_ip
+
+
+class StandInRouter:
+    # answer delays model a lan round trip, failure delays model the protocol giving up:
+    # NAT-PMP retries 9 times with growing timeouts, UPnP waits for SSDP replies
+    def __init__(self, nat_pmp=False, upnp=False, external_ip='1.1.1.1', delay=0.01,
+                 nat_pmp_failure_delay=1.0, upnp_failure_delay=0.5):
+        self.external_ip = external_ip
+        self.nat_pmp = StandInMapper('NAT-PMP', self, nat_pmp, delay, nat_pmp_failure_delay)
+        self.upnp = StandInMapper('UPnP', self, upnp, delay, upnp_failure_delay)
+
+
+class FlakyMapper:
+    def __init__(self, name, answers):
+        self.mapper_name = name
+        self.answers = answers
+        self.calls = 0
+        self.lock = threading.Lock()
+
+    def name(self):
+        return self.mapper_name
+
+    def external_ip(self, cancelled=None):
+        with self.lock:
+            self.calls += 1
+            return self.answers.pop(0) if self.answers else None
+
+
+class StandInNatPmpGateway:
+    # answers NAT-PMP over udp on loopback, delay(request) decides when (and if, None drops it) to answer
+    def __init__(self, external_ip='1.1.1.1', delay=None, result=0, version=0, padding=b''):
+        self.external_ip = external_ip
+        self.delay = delay if delay is not None else (lambda request: 0)
+        self.result = result
+        self.version = version
+        self.padding = padding
+        self.requests = []
+        self.sources = set()
+        self.socket = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.socket.bind(('127.0.0.1', 0))
+        self.port = self.socket.getsockname()[1]
+        self.running = True
+        thread = threading.Thread(target=self._serve)
+        thread.daemon = True
+        thread.start()
+
+    def stop(self):
+        self.running = False
+        self.socket.close()
+
+    def _serve(self):
+        while self.running:
+            try:
+                data, addr = self.socket.recvfrom(16)
+            except OSError:
+                return
+            self.requests.append(data)
+            self.sources.add(addr)
+            delay = self.delay(data)
+            if delay is None:
+                continue
+            timer = threading.Timer(delay, self._respond, args=(data, addr))
+            timer.daemon = True
+            timer.start()
+
+    def _respond(self, data, addr):
+        version, opcode = struct.unpack('!BB', data[:2])
+        if opcode == 0:
+            response = struct.pack('!BBHI', self.version, 128, self.result, 1) + socket.inet_aton(self.external_ip)
+        else:
+            reserved, private_port, public_port, lifetime = struct.unpack('!HHHI', data[2:12])
+            response = struct.pack('!BBHIHHI', self.version, 128 + opcode, self.result, 1,
+                                   private_port, public_port, lifetime)
+        try:
+            self.socket.sendto(response + self.padding, addr)
+        except OSError:
+            pass
@@ -0,0 +1,135 @@
+import json
+import tempfile
+from os.path import join
+
+import pytest
+from syncloudlib import logger
+
+from syncloud_platform.insider.igd import PersistedIgd, UpnpError
+from syncloud_platform.insider.upnpc import UpnpPortMapper
+from test.insider.igd_server import FakeIgd
+
+logger.init(console=True)
+
+
+class DiscoveringUPnP:
+    def __init__(self, igd, lanaddr='2.2.2.2'):
+        self.igd = igd
+        self.lanaddr = lanaddr
+        self.discoveries = 0
+
+    def discover(self):
+        self.discoveries += 1
+
+    def selectigd(self):
+        return self.igd.control_url()
+
+
+class StaticNetwork:
+    def __init__(self, gateway='192.168.1.1', addresses=None):
+        self.gateway = gateway
+        self.local_addresses = addresses if addresses is not None else ['127.0.0.1', '2.2.2.2']
+
+    def default_gateway(self):
+        return self.gateway
+
+    def addresses(self):
+        return self.local_addresses
+
+
+def igd_file():
+    return join(tempfile.mkdtemp(), 'upnp_igd.json')
+
+
+def test_soap_port_mapping():
+    igd = FakeIgd()
+    try:
+        upnp = DiscoveringUPnP(igd)
+        mapper = UpnpPortMapper(PersistedIgd(upnp, igd_file(), StaticNetwork()))
+
+        assert mapper.external_ip() == '1.1.1.1'
+        assert mapper.add_mapping(80, 80, 'TCP') == 80
+        assert igd.mappings == [(80, 'TCP', '2.2.2.2', 80, 'Syncloud')]
+        mapper.remove_mapping(80, 80, 'TCP')
+        assert igd.mappings == []
+    finally:
+        igd.stop()
+
+
+def test_discovery_is_persisted():
+    igd = FakeIgd(service_type='urn:schemas-upnp-org:service:WANPPPConnection:1')
+    try:
+        filename = igd_file()
+        upnp = DiscoveringUPnP(igd)
+        assert UpnpPortMapper(PersistedIgd(upnp, filename, StaticNetwork())).external_ip() == '1.1.1.1'
+        assert UpnpPortMapper(PersistedIgd(upnp, filename, StaticNetwork())).external_ip() == '1.1.1.1'
+
+        assert upnp.discoveries == 1
+        with open(filename) as f:
+            state = json.load(f)
+        assert state['control_url'] == igd.control_url()
+        assert state['service_type'] == 'urn:schemas-upnp-org:service:WANPPPConnection:1'
+        assert state['lanaddr'] == '2.2.2.2'
+        assert state['gateway'] == '192.168.1.1'
+    finally:
+        igd.stop()
+
+
+def test_rediscover_on_gateway_change():
+    igd = FakeIgd()
+    try:
+        filename = igd_file()
+        upnp = DiscoveringUPnP(igd)
+        UpnpPortMapper(PersistedIgd(upnp, filename, StaticNetwork())).external_ip()
+        UpnpPortMapper(PersistedIgd(upnp, filename, StaticNetwork(gateway='10.0.0.1'))).external_ip()
+        UpnpPortMapper(PersistedIgd(upnp, filename, StaticNetwork(gateway='10.0.0.1'))).external_ip()
+
+        assert upnp.discoveries == 2
+    finally:
+        igd.stop()
+
+
+def test_rediscover_on_lan_address_change():
+    igd = FakeIgd()
+    try:
+        filename = igd_file()
+        upnp = DiscoveringUPnP(igd)
+        UpnpPortMapper(PersistedIgd(upnp, filename, StaticNetwork())).external_ip()
+        UpnpPortMapper(PersistedIgd(upnp, filename, StaticNetwork(addresses=['2.2.2.3']))).external_ip()
+
+        assert upnp.discoveries == 2
+    finally:
+        igd.stop()
+
+
+def test_rediscover_on_soap_failure():
+    old_igd = FakeIgd()
+    new_igd = FakeIgd(external_ip='3.3.3.3')
+    try:
+        upnp = DiscoveringUPnP(old_igd)
+        persisted = PersistedIgd(upnp, igd_file(), StaticNetwork())
+        mapper = UpnpPortMapper(persisted)
+        assert mapper.external_ip() == '1.1.1.1'
+
+        old_igd.stop()
+        upnp.igd = new_igd
+        assert mapper.external_ip() == '3.3.3.3'
+        assert upnp.discoveries == 2
+        assert persisted.selectigd() == new_igd.control_url()
+    finally:
+        new_igd.stop()
+
+
+def test_upnp_error_does_not_rediscover():
+    igd = FakeIgd()
+    try:
+        upnp = DiscoveringUPnP(igd)
+        persisted = PersistedIgd(upnp, igd_file(), StaticNetwork())
+        persisted.addportmapping(80, 'TCP', '2.2.2.2', 80, 'Syncloud', '')
+        with pytest.raises(UpnpError) as context:
+            persisted.addportmapping(80, 'TCP', '2.2.2.2', 80, 'Syncloud', '')
+
+        assert context.value.code == 718
+        assert upnp.discoveries == 1
+    finally:
+        igd.stop()
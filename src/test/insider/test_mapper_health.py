@@ -0,0 +1,113 @@
+import tempfile
+import time
+from os.path import join
+
+from syncloudlib import logger
+
+from syncloud_platform.insider.mapper_health import MapperHealth
+
+logger.init(console=True)
+
+
+class StubMapper:
+    def name(self):
+        return 'UPnP'
+
+
+class StubFactory:
+    def __init__(self, mapper, ip, delay=0):
+        self.mapper = mapper
+        self.ip = ip
+        self.delay = delay
+        self.probes = 0
+
+    def find_mapper(self):
+        self.probes += 1
+        time.sleep(self.delay)
+        return self.mapper, self.ip
+
+
+class StaticNetwork:
+    def __init__(self, gateway='192.168.1.1'):
+        self.gateway = gateway
+
+    def default_gateway(self):
+        return self.gateway
+
+    def addresses(self):
+        return ['192.168.1.2']
+
+
+def status_file():
+    return join(tempfile.mkdtemp(), 'mapper_health.json')
+
+
+def wait_probe(health):
+    thread = health.probing
+    if thread is not None:
+        thread.join()
+
+
+def test_status_does_not_block_on_probe():
+    factory = StubFactory(StubMapper(), '1.1.1.1', delay=1)
+    health = MapperHealth(factory, StaticNetwork(), status_file())
+
+    start = time.time()
+    status = health.status()
+    assert time.time() - start < 0.5
+    assert status['mapper'] is None
+    assert status['checked'] is None
+
+    wait_probe(health)
+    status = health.status()
+    assert status['mapper'] == 'UPnP'
+    assert status['external_ip'] == '1.1.1.1'
+    assert factory.probes == 1
+
+
+def test_status_is_shared_between_processes():
+    filename = status_file()
+    factory = StubFactory(None, None)
+    MapperHealth(factory, StaticNetwork(), filename).provide_mapper()
+
+    health = MapperHealth(factory, StaticNetwork(), filename)
+    status = health.status()
+    wait_probe(health)
+
+    assert status['mapper'] is None
+    assert status['checked'] is not None
+    assert factory.probes == 1
+
+
+def test_probe_on_network_change():
+    filename = status_file()
+    factory = StubFactory(StubMapper(), '1.1.1.1')
+    MapperHealth(factory, StaticNetwork(), filename).provide_mapper()
+
+    health = MapperHealth(factory, StaticNetwork(gateway='10.0.0.1'), filename)
+    health.status()
+    wait_probe(health)
+
+    assert factory.probes == 2
+
+
+def test_probe_after_interval():
+    filename = status_file()
+    factory = StubFactory(StubMapper(), '1.1.1.1')
+    health = MapperHealth(factory, StaticNetwork(), filename, interval=0)
+    health.provide_mapper()
+    time.sleep(0.01)
+    health.status()
+    wait_probe(health)
+
+    assert factory.probes == 2
+
+
+def test_monitor_probes_on_schedule():
+    factory = StubFactory(StubMapper(), '1.1.1.1')
+    health = MapperHealth(factory, StaticNetwork(), status_file(), check_interval=0.05)
+    health.start()
+    time.sleep(0.3)
+
+    assert factory.probes == 1
+    assert health.status()['external_ip'] == '1.1.1.1'
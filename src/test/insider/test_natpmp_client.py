@@ -0,0 +1,116 @@
+import struct
+import time
+
+import pytest
+from syncloudlib import logger
+
+from syncloud_platform.insider import NATPMP
+from syncloud_platform.insider.natpmp_client import NatPmpClient
+from syncloud_platform.insider.natpmpc import NatPmpPortMapper
+from test.insider.router import StandInNatPmpGateway
+
+logger.init(console=True)
+
+
+def private_port(request):
+    return struct.unpack('!H', request[4:6])[0]
+
+
+def test_port_mapper():
+    gateway = StandInNatPmpGateway()
+    try:
+        mapper = NatPmpPortMapper(NatPmpClient('127.0.0.1', gateway.port))
+
+        assert mapper.external_ip() == '1.1.1.1'
+        assert mapper.add_mapping(80, 10080, 'TCP') == 10080
+        mapper.remove_mapping(80, 10080, 'TCP')
+        assert len(gateway.requests) == 3
+    finally:
+        gateway.stop()
+
+
+def test_many_ports_on_one_socket():
+    # each answer takes over 0.1 seconds and they come back in reverse order
+    gateway = StandInNatPmpGateway(delay=lambda request: 0.1 + (50 - private_port(request)) * 0.002)
+    try:
+        client = NatPmpClient('127.0.0.1', gateway.port)
+        start = time.time()
+        responses = client.map_ports([(NATPMP.NATPMP_PROTOCOL_TCP, 10000 + port, port) for port in range(50)])
+        seconds = time.time() - start
+        print('50 ports mapped in {0:.3f}s'.format(seconds))
+
+        assert [r.private_port for r in responses] == list(range(50))
+        assert [r.public_port for r in responses] == list(range(10000, 10050))
+        assert len(gateway.requests) == 50
+        assert len(gateway.sources) == 1
+        assert seconds < 1
+    finally:
+        gateway.stop()
+
+
+def test_retry_timing():
+    attempts = []
+    gateway = StandInNatPmpGateway(delay=lambda request: attempts.append(time.time()) or
+                                   (0 if len(attempts) > 2 else None))
+    try:
+        client = NatPmpClient('127.0.0.1', gateway.port, initial_timeout=0.1)
+
+        assert client.get_public_address() == '1.1.1.1'
+        assert len(attempts) == 3
+        assert attempts[1] - attempts[0] == pytest.approx(0.1, abs=0.05)
+        assert attempts[2] - attempts[1] == pytest.approx(0.2, abs=0.05)
+    finally:
+        gateway.stop()
+
+
+def test_dead_gateway():
+    gateway = StandInNatPmpGateway(delay=lambda request: None)
+    try:
+        client = NatPmpClient('127.0.0.1', gateway.port, retries=3, initial_timeout=0.05)
+        with pytest.raises(NATPMP.NATPMPUnsupportedError):
+            client.get_public_address()
+        assert len(gateway.requests) == 3
+    finally:
+        gateway.stop()
+
+
+def test_no_gateway_fails_fast():
+    gateway = StandInNatPmpGateway()
+    gateway.stop()
+    client = NatPmpClient('127.0.0.1', gateway.port)
+    start = time.time()
+    with pytest.raises(NATPMP.NATPMPUnsupportedError):
+        client.get_public_address()
+    assert time.time() - start < 1
+
+
+def test_result_error():
+    gateway = StandInNatPmpGateway(result=NATPMP.NATPMP_RESULT_NOT_AUTHORIZED)
+    try:
+        mapper = NatPmpPortMapper(NatPmpClient('127.0.0.1', gateway.port))
+        with pytest.raises(NATPMP.NATPMPResultError):
+            mapper.add_mapping(80, 80, 'TCP')
+    finally:
+        gateway.stop()
+
+
+def test_long_datagrams():
+    gateway = StandInNatPmpGateway(padding=b'\0' * 8)
+    try:
+        mapper = NatPmpPortMapper(NatPmpClient('127.0.0.1', gateway.port))
+
+        assert mapper.external_ip() == '1.1.1.1'
+        assert mapper.add_mapping(80, 10080, 'TCP') == 10080
+    finally:
+        gateway.stop()
+
+
+def test_unknown_version_is_ignored():
+    gateway = StandInNatPmpGateway(version=1)
+    try:
+        client = NatPmpClient('127.0.0.1', gateway.port, retries=2, initial_timeout=0.05)
+        with pytest.raises(NATPMP.NATPMPUnsupportedError):
+            client.get_public_address()
+        assert len(gateway.requests) == 2
+    finally:
+        gateway.stop()
@@ -0,0 +1,95 @@
+import time
+
+from syncloudlib import logger
+
+from syncloud_platform.insider.natpmp_client import NatPmpClient
+from syncloud_platform.insider.natpmpc import NatPmpPortMapper
+from syncloud_platform.insider.port_mapper_factory import PortMapperFactory
+from test.insider.router import StandInRouter, FlakyMapper, StandInNatPmpGateway
+
+logger.init(console=True)
+
+
+def time_to_mapper(router, deadline=5):
+    factory = PortMapperFactory(router.nat_pmp, router.upnp, deadline=deadline, retry_interval=0.05)
+    start = time.time()
+    mapper, ip = factory.find_mapper()
+    return mapper, ip, time.time() - start
+
+
+def test_nat_pmp_only():
+    router = StandInRouter(nat_pmp=True)
+    mapper, ip, seconds = time_to_mapper(router)
+    print('NAT-PMP only: {0:.3f}s'.format(seconds))
+
+    assert mapper.name() == 'NAT-PMP'
+    assert ip == '1.1.1.1'
+    assert seconds < router.upnp.failure_delay
+
+
+def test_upnp_only():
+    router = StandInRouter(upnp=True)
+    mapper, ip, seconds = time_to_mapper(router)
+    print('UPnP only: {0:.3f}s'.format(seconds))
+
+    assert mapper.name() == 'UPnP'
+    assert ip == '1.1.1.1'
+    assert seconds < router.nat_pmp.failure_delay
+
+
+def test_dead_router():
+    router = StandInRouter()
+    mapper, ip, seconds = time_to_mapper(router)
+    print('dead router: {0:.3f}s'.format(seconds))
+
+    assert mapper is None
+    assert ip is None
+    assert seconds < router.nat_pmp.failure_delay + 0.5
+
+
+def test_dead_router_deadline():
+    router = StandInRouter(nat_pmp_failure_delay=10, upnp_failure_delay=10)
+    mapper, ip, seconds = time_to_mapper(router, deadline=0.3)
+    print('dead router with deadline: {0:.3f}s'.format(seconds))
+
+    assert mapper is None
+    assert 0.3 <= seconds < 1
+
+
+def test_losing_probe_is_cancelled():
+    nat_pmp = FlakyMapper('NAT-PMP', ['1.1.1.1'])
+    upnp = FlakyMapper('UPnP', [])
+    factory = PortMapperFactory(nat_pmp, upnp, retry_interval=0.05)
+    mapper, ip = factory.find_mapper()
+    time.sleep(0.3)
+
+    assert mapper is nat_pmp
+    assert upnp.calls <= 2
+
+
+def test_losing_nat_pmp_request_is_cancelled():
+    gateway = StandInNatPmpGateway(delay=lambda request: None)
+    try:
+        client = NatPmpClient('127.0.0.1', gateway.port)
+        upnp = FlakyMapper('UPnP', ['1.1.1.1'])
+        factory = PortMapperFactory(NatPmpPortMapper(client), upnp, retry_interval=0.05)
+        mapper, ip = factory.find_mapper()
+        time.sleep(0.3)
+        sent = len(gateway.requests)
+        time.sleep(1)
+
+        assert mapper is upnp
+        assert client.client.pending == {}
+        assert len(gateway.requests) == sent
+    finally:
+        gateway.stop()
+
+
+def test_retry_empty_ip():
+    nat_pmp = FlakyMapper('NAT-PMP', [None, '', '1.1.1.1'])
+    upnp = FlakyMapper('UPnP', [])
+    factory = PortMapperFactory(nat_pmp, upnp, retry_interval=0.01)
+    mapper, ip = factory.find_mapper()
+
+    assert mapper is nat_pmp
+    assert ip == '1.1.1.1'
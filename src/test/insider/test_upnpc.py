@@ -106,7 +106,7 @@ def test_above_limit_fail_attempts():
     with pytest.raises(Exception) as context:
         mapper.add_mapping(1, 1, 'TCP')
 
-    assert 'Unable' in context.value.msg
+    assert 'Unable' in str(context.value)
     assert len(upnp.mappings) == 0
 
 
@@ -123,4 +123,70 @@ def test_below_limit_fail_attempts():
 
     assert upnp.by_external_port(4).local_port == 1
     assert upnp.by_external_port(4).local_ip == '2.2.2.2'
-.2'
+
+
+class CountingUPnP(InMemoryUPnP):
+    def __init__(self, externalipaddress, lanaddr):
+        InMemoryUPnP.__init__(self, externalipaddress, lanaddr)
+        self.list_calls = 0
+
+    def getgenericportmapping(self, index):
+        self.list_calls += 1
+        return InMemoryUPnP.getgenericportmapping(self, index)
+
+
+def test_mappings_are_listed_once():
+
+    upnp = CountingUPnP('1.1.1.1', '2.2.2.2')
+    upnp.mappings = [Mapping(port, 'TCP', '3.3.3.3', port, '', True, '1.1.1.1', '') for port in range(10000, 10010)]
+
+    mapper = UpnpPortMapper(upnp)
+    mapper.add_mapping(80, 80, 'TCP')
+    mapper.add_mapping(443, 443, 'TCP')
+    mapper.add_mapping(80, 80, 'TCP')
+
+    assert upnp.list_calls == 11
+    assert len(upnp.mappings) == 12
+
+
+def test_mappings_are_updated_on_add_and_remove():
+
+    upnp = CountingUPnP('1.1.1.1', '2.2.2.2')
+    upnp.mappings = [Mapping(80, 'TCP', '2.2.2.2', 80, '', True, '1.1.1.1', '')]
+
+    mapper = UpnpPortMapper(upnp)
+    mapper.remove_mapping(80, 80, 'TCP')
+    assert mapper.add_mapping(80, 80, 'TCP') == 80
+    assert mapper.add_mapping(81, 80, 'TCP') == 10000
+
+    assert upnp.list_calls == 1
+    assert upnp.by_external_port(80).local_port == 80
+    assert upnp.by_external_port(10000).local_port == 81
+
+
+def test_mappings_are_reloaded_after_failure():
+
+    upnp = CountingUPnP('1.1.1.1', '2.2.2.2')
+    upnp.fail_on_external_port_with(80, Exception('Conflict'))
+
+    mapper = UpnpPortMapper(upnp, lower_limit=81)
+    mapper.add_mapping(80, 80, 'TCP')
+    upnp.mappings.append(Mapping(82, 'TCP', '3.3.3.3', 82, '', True, '1.1.1.1', ''))
+    upnp.fail_on_external_port_with(82, Exception('Conflict'))
+    mapper.add_mapping(82, 82, 'TCP')
+
+    assert upnp.by_external_port(81).local_port == 80
+    assert upnp.by_external_port(83).local_port == 82
+    assert upnp.list_calls == 7
+
+
+def test_mappings_are_reloaded_after_ttl():
+
+    upnp = CountingUPnP('1.1.1.1', '2.2.2.2')
+
+    mapper = UpnpPortMapper(upnp, mappings_ttl=0)
+    mapper.add_mapping(80, 80, 'TCP')
+    upnp.mappings = []
+    mapper.add_mapping(80, 80, 'TCP')
+
+    assert len(upnp.mappings) == 1
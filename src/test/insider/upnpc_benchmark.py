@@ -0,0 +1,57 @@
+import time
+
+from syncloudlib import logger
+
+from syncloud_platform.insider.upnpc import UpnpPortMapper, Mapping
+from test.insider.inmemory_upnp import InMemoryUPnP
+
+logger.init(console=True)
+
+LATENCY = 0.002
+ROUTER_MAPPINGS = 100
+PORTS = [80, 443, 22]
+
+
+class SlowUPnP(InMemoryUPnP):
+    def __init__(self, externalipaddress, lanaddr, latency):
+        InMemoryUPnP.__init__(self, externalipaddress, lanaddr)
+        self.latency = latency
+        self.calls = 0
+
+    def call(self):
+        self.calls += 1
+        time.sleep(self.latency)
+
+    def getgenericportmapping(self, index):
+        self.call()
+        return InMemoryUPnP.getgenericportmapping(self, index)
+
+    def deleteportmapping(self, external_port, protocol):
+        self.call()
+        return InMemoryUPnP.deleteportmapping(self, external_port, protocol)
+
+    def addportmapping(self, external_port, protocol, local_ip, local_port, description, something):
+        self.call()
+        return InMemoryUPnP.addportmapping(self, external_port, protocol, local_ip, local_port, description,
+                                           something)
+
+
+def sync(mappings_ttl):
+    upnp = SlowUPnP('1.1.1.1', '2.2.2.2', LATENCY)
+    upnp.mappings = [Mapping(port, 'TCP', '3.3.3.3', port, '', True, '1.1.1.1', '')
+                     for port in range(10000, 10000 + ROUTER_MAPPINGS)]
+    mapper = UpnpPortMapper(upnp, mappings_ttl=mappings_ttl)
+    start = time.time()
+    for port in PORTS:
+        mapper.add_mapping(port, port, 'TCP')
+    for port in PORTS:
+        mapper.add_mapping(port, port, 'TCP')
+    return upnp.calls, time.time() - start
+
+
+def test_router_with_many_mappings():
+    uncached_calls, uncached_time = sync(0)
+    cached_calls, cached_time = sync(60)
+    print('{0} router mappings, {1} ports mapped twice: uncached {2} calls {3:.3f}s, cached {4} calls {5:.3f}s'.format(
+        ROUTER_MAPPINGS, len(PORTS), uncached_calls, uncached_time, cached_calls, cached_time))
+    assert cached_calls < uncached_calls / 5
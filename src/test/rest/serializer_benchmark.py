@@ -0,0 +1,101 @@
+import timeit
+import tracemalloc
+
+from syncloudlib.json import convertible
+
+from syncloud_platform.disks.lsblk import Disk, Partition
+from syncloud_platform.rest import serializer
+from syncloud_platform.snap.models import App, AppVersions
+
+REPEAT = 1000
+
+
+class DictApp:
+    def __init__(self, id):
+        self.id = id
+        self.name = 'App {0}'.format(id)
+        self.required = False
+        self.ui = False
+        self.url = 'https://{0}.device.syncloud.it'.format(id)
+        self.icon = '/rest/app_image?channel=stable&app={0}'.format(id)
+        self.description = 'No description given yet'
+        self.enabled = True
+
+
+class DictAppVersions:
+    def __init__(self, app):
+        self.app = app
+        self.current_version = '2'
+        self.installed_version = '1'
+
+
+class DictPartition:
+    def __init__(self, device):
+        self.size = '10G'
+        self.device = device
+        self.mount_point = ''
+        self.active = False
+        self.fs_type = 'ext4'
+        self.mountable = True
+        self.extendable = False
+
+
+class DictDisk:
+    def __init__(self, partitions):
+        self.name = 'Disk'
+        self.partitions = partitions
+        self.device = '/dev/sda'
+        self.size = '200G'
+        self.active = False
+
+
+def slots_catalog():
+    return [AppVersions(App(id='app{0}'.format(i), name='App app{0}'.format(i),
+                            url='https://app{0}.device.syncloud.it'.format(i),
+                            icon='/rest/app_image?channel=stable&app=app{0}'.format(i)), '2', '1')
+            for i in range(100)]
+
+
+def dict_catalog():
+    return [DictAppVersions(DictApp('app{0}'.format(i))) for i in range(100)]
+
+
+def slots_disks():
+    return [Disk('Disk', '/dev/sda', '200G',
+                 [Partition('10G', '/dev/sda{0}'.format(i), '', False, 'ext4', True) for i in range(20)])]
+
+
+def dict_disks():
+    return [DictDisk([DictPartition('/dev/sda{0}'.format(i)) for i in range(20)])]
+
+
+def allocated(factory):
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    value = factory()
+    size = tracemalloc.get_traced_memory()[0] - before
+    tracemalloc.stop()
+    del value
+    return size
+
+
+def compare(name, slots_factory, dict_factory):
+    slots_value = slots_factory()
+    dict_value = dict_factory()
+    assert serializer.to_dict(slots_value) == convertible.to_dict(dict_value)
+
+    compiled = timeit.timeit(lambda: serializer.to_dict(slots_value), number=REPEAT) / REPEAT
+    reflected = timeit.timeit(lambda: convertible.to_dict(dict_value), number=REPEAT) / REPEAT
+    print('{0}: compiled {1:.6f}s, convertible {2:.6f}s, speedup {3:.1f}x, memory {4} vs {5} bytes'.format(
+        name, compiled, reflected, reflected / compiled, allocated(slots_factory), allocated(dict_factory)))
+    return compiled, reflected
+
+
+def test_catalog():
+    compiled, reflected = compare('100 app catalog', slots_catalog, dict_catalog)
+    assert compiled < reflected
+
+
+def test_disks():
+    compiled, reflected = compare('20 partition disk', slots_disks, dict_disks)
+    assert compiled < reflected
@@ -0,0 +1,35 @@
+import json
+
+from syncloudlib import logger
+
+from syncloud_platform.rest.backend_proxy import BackendProxy
+from test.snap.snapd_server import FakeSnapd
+
+logger.init(console=True)
+
+
+def test_streams_body_and_headers():
+    backend = FakeSnapd({'/backup/list': {'success': True, 'data': ['app1-2019.tar.gz']}})
+    try:
+        proxy = BackendProxy(backend.socket_url())
+        response = proxy.request('GET', '/backup/list?', {})
+
+        body = b''.join(proxy.stream(response))
+
+        assert json.loads(body.decode()) == {'success': True, 'data': ['app1-2019.tar.gz']}
+        assert ('Content-Type', 'application/json') in proxy.headers(response)
+    finally:
+        backend.stop()
+
+
+def test_keeps_connection_alive():
+    backend = FakeSnapd({'/job/status': {'success': True, 'data': 'JobStatusIdle'}})
+    try:
+        proxy = BackendProxy(backend.socket_url())
+        for _ in range(3):
+            body = b''.join(proxy.stream(proxy.request('GET', '/job/status?', {})))
+            assert json.loads(body.decode())['data'] == 'JobStatusIdle'
+
+        assert backend.connections == 1
+    finally:
+        backend.stop()
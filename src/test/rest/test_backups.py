@@ -0,0 +1,23 @@
+import tempfile
+from os.path import join
+
+from syncloud_platform.rest.backups import backup_file, accel_redirect
+
+
+def test_existing_file():
+    backup_dir = tempfile.mkdtemp()
+    open(join(backup_dir, 'files-2019-0101-120000.tar.gz'), 'w').close()
+
+    assert backup_file('files-2019-0101-120000.tar.gz', backup_dir) == join(backup_dir, 'files-2019-0101-120000.tar.gz')
+    assert accel_redirect('files-2019-0101-120000.tar.gz') == '/backup_files/files-2019-0101-120000.tar.gz'
+
+
+def test_missing_file():
+    assert backup_file('files.tar.gz', tempfile.mkdtemp()) is None
+
+
+def test_path_outside_backup_dir():
+    backup_dir = tempfile.mkdtemp()
+    assert backup_file('../etc/passwd', backup_dir) is None
+    assert backup_file('..', backup_dir) is None
+    assert backup_file('.hidden', backup_dir) is None
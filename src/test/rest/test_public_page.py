@@ -0,0 +1,78 @@
+import time
+
+from syncloudlib import logger
+
+from syncloud_platform.rest.facade.public import Public
+
+logger.init(console=True)
+
+
+class StubPlatformConfig:
+    def www_root_public(self):
+        return '/www'
+
+
+class StaticAccessConfig:
+    def get_upnp(self):
+        return True
+
+    def get_external_access(self):
+        return True
+
+    def get_public_ip(self):
+        return None
+
+
+class StaticMapperHealth:
+    def __init__(self, status):
+        self.mapper_status = status
+
+    def status(self):
+        return self.mapper_status
+
+
+class SlowHardware:
+    def available_disks(self):
+        time.sleep(0.3)
+        return ['disk']
+
+    def root_partition(self):
+        time.sleep(0.3)
+        return 'root'
+
+
+def test_storage_page_is_gathered_concurrently():
+    public = Public(StubPlatformConfig(), None, None, None, None, SlowHardware(), None, None, None, None, None, None)
+
+    start = time.time()
+    page = public.storage_page()
+
+    assert page == {'disks': ['disk'], 'boot_disk': 'root'}
+    assert time.time() - start < 0.5
+
+
+def access(status):
+    public = Public(StubPlatformConfig(), StaticAccessConfig(), None, None, None, None, None, None, None,
+                    StaticMapperHealth(status), None, None)
+    return public.access()
+
+
+def test_access_before_first_probe():
+    result = access(dict(mapper=None, external_ip=None, checked=None))
+
+    assert result['mapper_probing']
+    assert result['upnp_available'] is None
+
+
+def test_access_without_mapper():
+    result = access(dict(mapper=None, external_ip=None, checked=1500000000.0))
+
+    assert not result['mapper_probing']
+    assert result['upnp_available'] is False
+
+
+def test_access_with_mapper():
+    result = access(dict(mapper='UPnP', external_ip='1.1.1.1', checked=1500000000.0))
+
+    assert not result['mapper_probing']
+    assert result['upnp_available'] is True
@@ -0,0 +1,95 @@
+from flask import Flask, jsonify
+from syncloudlib import logger
+
+from syncloud_platform.config.generations import Generations, APPS
+from syncloud_platform.rest.response_cache import ResponseCache
+from syncloud_platform.snap.installed import InstalledSnaps
+from test.insider.helpers import temp_file
+
+logger.init(console=True)
+
+
+def create_app(cache, ttl=60, stamps=()):
+    app = Flask(__name__)
+    calls = []
+
+    @app.route('/apps')
+    @cache.cached(ttl, [APPS], stamps)
+    def apps():
+        calls.append(1)
+        return jsonify(apps=['app{0}'.format(len(calls))]), 200
+
+    return app.test_client(), calls
+
+
+def test_hit():
+    cache = ResponseCache(Generations(temp_file()))
+    client, calls = create_app(cache)
+
+    first = client.get('/apps')
+    second = client.get('/apps')
+
+    assert first.headers['X-Cache'] == 'MISS'
+    assert second.headers['X-Cache'] == 'HIT'
+    assert second.get_json() == {'apps': ['app1']}
+    assert len(calls) == 1
+    assert cache.stats()['hit_ratio'] == 0.5
+
+
+def test_not_modified():
+    cache = ResponseCache(Generations(temp_file()))
+    client, calls = create_app(cache)
+
+    etag = client.get('/apps').headers['ETag']
+    response = client.get('/apps', headers={'If-None-Match': etag})
+
+    assert response.status_code == 304
+    assert response.data == b''
+
+
+def test_invalidated_by_other_worker():
+    filename = temp_file()
+    cache = ResponseCache(Generations(filename))
+    client, calls = create_app(cache)
+
+    client.get('/apps')
+    ResponseCache(Generations(filename)).invalidate(APPS)
+    response = client.get('/apps')
+
+    assert response.get_json() == {'apps': ['app2']}
+
+
+def test_expired():
+    cache = ResponseCache(Generations(temp_file()))
+    client, calls = create_app(cache, ttl=0)
+
+    client.get('/apps')
+    client.get('/apps')
+
+    assert len(calls) == 2
+
+
+def test_disabled_without_generations():
+    cache = ResponseCache(Generations('/not/existing/generations'))
+    client, calls = create_app(cache)
+
+    client.get('/apps')
+    client.get('/apps')
+
+    assert len(calls) == 2
+
+
+def test_invalidated_by_snapd_state():
+    state_file = temp_file('{}')
+    installed_snaps = InstalledSnaps(None, state_file)
+    cache = ResponseCache(Generations(temp_file()))
+    client, calls = create_app(cache, stamps=[installed_snaps.generation])
+
+    client.get('/apps')
+    assert client.get('/apps').headers['X-Cache'] == 'HIT'
+    with open(state_file, 'w') as f:
+        f.write('{"changes": {}}')
+    response = client.get('/apps')
+
+    assert response.headers['X-Cache'] == 'MISS'
+    assert response.get_json() == {'apps': ['app2']}
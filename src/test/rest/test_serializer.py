@@ -0,0 +1,41 @@
+from syncloud_platform.disks.lsblk import Disk, Partition
+from syncloud_platform.rest import serializer
+from syncloud_platform.rest.model.user import User
+from syncloud_platform.snap.models import App, AppVersions
+
+
+def test_slots_model():
+    app = AppVersions(App(id='app1', name='App 1'), '2', '1')
+
+    assert serializer.to_dict([app]) == [{
+        'app': {'id': 'app1', 'name': 'App 1', 'required': False, 'ui': False, 'url': '', 'icon': None,
+                'description': 'No description given yet', 'enabled': True},
+        'current_version': '2',
+        'installed_version': '1'
+    }]
+
+
+def test_nested_list():
+    disk = Disk('', '/dev/sda', '20G', [Partition('10G', '/dev/sda1', '/', True, 'ext4', False)])
+
+    result = serializer.to_dict(disk)
+
+    assert result['name'] == 'Disk'
+    assert result['partitions'][0]['mount_point'] == '/'
+    assert result['partitions'][0]['extendable'] is False
+
+
+def test_model_without_slots():
+    assert serializer.to_dict(User('user')) == {'name': 'user'}
+
+
+def test_public_fields():
+    class Secret(object):
+        __slots__ = ('name', 'password')
+        __public__ = ['name']
+
+        def __init__(self):
+            self.name = 'user'
+            self.password = 'secret'
+
+    assert serializer.to_dict(Secret()) == {'name': 'user'}
@@ -0,0 +1,48 @@
+import time
+
+from syncloudlib import logger
+
+from syncloud_platform.insider.config import Port
+from syncloud_platform.insider.device_info import DeviceInfo
+from syncloud_platform.snap.snap import Snap
+from test.insider.helpers import get_user_platform_config, get_port_config
+
+logger.init(console=True)
+
+
+class CatalogStoreCache:
+    def __init__(self, size):
+        self.catalog = [{'name': 'app{0}'.format(i), 'summary': 'App', 'channel': 'stable', 'version': '1',
+                         'type': 'app'} for i in range(size)]
+
+    def get(self, key, load):
+        return self.catalog
+
+
+def count_config_reads(size):
+    user_config = get_user_platform_config()
+    user_config.update_domain('device', 'token')
+    user_config.update_redirect('syncloud.it', 'api.url')
+    user_config.update_device_access(False, True, '1.1.1.1', 80, 443)
+    user_config.set_redirect_enabled(True)
+    port_config = get_port_config([Port(443, 10000, 'TCP')])
+
+    reads = []
+    get = user_config._get
+    load = port_config.load
+    user_config._get = lambda *args: reads.append(args) or get(*args)
+    port_config.load = lambda: reads.append('ports.json') or load()
+
+    snap = Snap(None, DeviceInfo(user_config, port_config), None, CatalogStoreCache(size), None)
+    start = time.time()
+    apps = snap.store_all_apps()
+    assert apps[-1].app.url == 'https://app{0}.device.syncloud.it:10000'.format(size - 1)
+    return len(reads), time.time() - start
+
+
+def test_flat_cost_per_catalog():
+    results = dict((size, count_config_reads(size)) for size in [10, 60, 240])
+    for size, (reads, seconds) in sorted(results.items()):
+        print('catalog: {0} apps, config reads: {1}, time: {2:.4f}s'.format(size, reads, seconds))
+
+    assert results[10][0] == results[240][0]
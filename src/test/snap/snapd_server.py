@@ -0,0 +1,64 @@
+import json
+import os
+import tempfile
+import threading
+from http.server import BaseHTTPRequestHandler
+from socketserver import ThreadingMixIn, UnixStreamServer
+
+
+class SnapdHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        BaseHTTPRequestHandler.setup(self)
+        self.server.connections += 1
+
+    def address_string(self):
+        return 'snapd'
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append(('GET', self.path, None))
+        if self.server.resets > 0:
+            self.server.resets -= 1
+            self.close_connection = True
+            return
+        self._respond(self.server.responses.get(self.path, {'status-code': 404, 'status': 'Not Found'}))
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        body = json.loads(self.rfile.read(length).decode()) if length else None
+        self.server.requests.append(('POST', self.path, body))
+        self._respond(self.server.responses.get(self.path, {'status-code': 202, 'status': 'Accepted', 'change': '1'}))
+
+    def _respond(self, response):
+        data = json.dumps(response).encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeSnapd(ThreadingMixIn, UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, responses=None):
+        self.path = os.path.join(tempfile.mkdtemp(), 'snapd.socket')
+        UnixStreamServer.__init__(self, self.path, SnapdHandler)
+        self.responses = responses if responses is not None else {}
+        self.requests = []
+        self.connections = 0
+        self.resets = 0
+        thread = threading.Thread(target=self.serve_forever)
+        thread.daemon = True
+        thread.start()
+
+    def socket_url(self):
+        return 'http+unix://{0}'.format(self.path.replace('/', '%2F'))
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
@@ -0,0 +1,114 @@
+import os
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from os.path import join
+
+import pytest
+import requests
+from syncloudlib import logger
+
+from syncloud_platform.snap.icon_cache import IconCache, icon_name
+
+logger.init(console=True)
+
+
+class IconHandler(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requests.append((self.path, self.headers.get('If-None-Match')))
+        if self.server.failing:
+            self.send_response(503)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if self.path.endswith('missing-128.png'):
+            self.send_response(404)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if self.headers.get('If-None-Match') == '"v1"':
+            self.send_response(304)
+            self.end_headers()
+            return
+        data = b'x' * 100
+        self.send_response(200)
+        self.send_header('Content-Type', 'image/png')
+        self.send_header('ETag', '"v1"')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+@pytest.fixture
+def store():
+    server = HTTPServer(('127.0.0.1', 0), IconHandler)
+    server.requests = []
+    server.failing = False
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def url(server):
+    return 'http://127.0.0.1:{0}/releases/{{0}}/images/{{1}}-128.png'.format(server.server_port)
+
+
+def test_hit_does_not_go_to_store(store):
+    cache = IconCache(tempfile.mkdtemp(), url=url(store))
+
+    assert cache.get('stable', 'app1') == 'stable/app1-128.png'
+    assert cache.get('stable', 'app1') == 'stable/app1-128.png'
+
+    assert len(store.requests) == 1
+    assert os.path.getsize(join(cache.cache_dir, 'stable/app1-128.png')) == 100
+
+
+def test_stale_icon_is_revalidated(store):
+    cache = IconCache(tempfile.mkdtemp(), url=url(store), ttl=0)
+
+    cache.get('stable', 'app1')
+    cache.get('stable', 'app1')
+
+    assert store.requests[1][1] == '"v1"'
+
+
+def test_stale_icon_is_served_on_store_error(store):
+    cache = IconCache(tempfile.mkdtemp(), url=url(store), ttl=0)
+
+    cache.get('stable', 'app1')
+    store.failing = True
+
+    assert cache.get('stable', 'app1') == 'stable/app1-128.png'
+    assert len(store.requests) == 2
+    assert os.path.getsize(join(cache.cache_dir, 'stable/app1-128.png')) == 100
+
+
+def test_least_recently_used_icon_is_evicted(store):
+    cache = IconCache(tempfile.mkdtemp(), url=url(store), max_size=250)
+
+    cache.get('stable', 'app1')
+    cache.get('stable', 'app2')
+    os.utime(join(cache.cache_dir, 'stable/app1-128.png'), (time.time() - 100, time.time()))
+    cache.get('stable', 'app3')
+
+    assert sorted(os.listdir(join(cache.cache_dir, 'stable'))) == [
+        'app2-128.png', 'app2-128.png.json', 'app3-128.png', 'app3-128.png.json']
+
+
+def test_missing_icon(store):
+    cache = IconCache(tempfile.mkdtemp(), url=url(store))
+    with pytest.raises(requests.exceptions.HTTPError):
+        cache.get('stable', 'missing')
+
+
+def test_invalid_name():
+    with pytest.raises(Exception):
+        icon_name('stable', '../../etc/passwd')
@@ -0,0 +1,63 @@
+import os
+
+from syncloudlib import logger
+
+from syncloud_platform.snap.installed import InstalledSnaps
+from syncloud_platform.snap.snapd import SnapdClient
+from test.insider.helpers import temp_file
+from test.snap.snapd_server import FakeSnapd
+
+logger.init(console=True)
+
+
+def snaps_response(*names):
+    return {'status-code': 200, 'status': 'OK', 'result': [
+        {'name': name, 'type': 'app', 'version': '1', 'channel': 'stable',
+         'apps': [{'snap': name, 'name': 'storage-change'}]} for name in names
+    ]}
+
+
+def test_reload_on_state_change():
+    snapd = FakeSnapd({'/v2/snaps': snaps_response('app2', 'app1')})
+    state_file = temp_file('{}')
+    try:
+        installed = InstalledSnaps(SnapdClient(snapd.socket_url()), state_file)
+
+        assert [snap['name'] for snap in installed.list()] == ['app1', 'app2']
+        assert installed.get('app1')['version'] == '1'
+        assert installed.has_app('app1', 'storage-change')
+        assert not installed.has_app('app1', 'access-change')
+        assert installed.get('app3') is None
+        assert len(snapd.requests) == 1
+
+        snapd.responses['/v2/snaps'] = snaps_response('app1', 'app2', 'app3')
+        stat = os.stat(state_file)
+        os.utime(state_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1000000000))
+
+        assert installed.get('app3') is not None
+        assert len(snapd.requests) == 2
+    finally:
+        snapd.stop()
+
+
+def test_no_state_file():
+    snapd = FakeSnapd({'/v2/snaps': snaps_response('app1')})
+    try:
+        installed = InstalledSnaps(SnapdClient(snapd.socket_url()), '/not/existing/state.json')
+        installed.get('app1')
+        installed.get('app1')
+        assert len(snapd.requests) == 2
+    finally:
+        snapd.stop()
+
+
+def test_invalidate():
+    snapd = FakeSnapd({'/v2/snaps': snaps_response('app1')})
+    try:
+        installed = InstalledSnaps(SnapdClient(snapd.socket_url()), temp_file('{}'))
+        installed.get('app1')
+        installed.invalidate()
+        installed.get('app1')
+        assert len(snapd.requests) == 2
+    finally:
+        snapd.stop()
@@ -1,5 +1,19 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import pytest
+from syncloudlib import logger
+
 from syncloud_platform.snap.models import App, AppVersions
-from syncloud_platform.snap.snap import join_apps
+from syncloud_platform.insider.device_info import UrlBuilder
+from syncloud_platform.snap.installed import InstalledSnaps
+from syncloud_platform.snap import snap as snap_module
+from syncloud_platform.snap.snap import Snap, join_apps, result
+from syncloud_platform.snap.snapd import SnapdClient
+from test.snap.snapd_server import FakeSnapd
+
+logger.init(console=True)
 
 
 def test_join_apps():
@@ -51,3 +65,189 @@ def test_join_apps():
     assert all_apps[2].app.id == 'id3'
     assert all_apps[2].installed_version is None
     assert all_apps[2].current_version == 'v2'
+
+
+class StubInfo:
+    def url_builder(self):
+        return UrlBuilder(443, 'example.com')
+
+
+class StubPlatformConfig:
+    def get_channel(self):
+        return 'stable'
+
+
+class StubStoreCache:
+    def __init__(self, values):
+        self.values = values
+
+    def get(self, key, load):
+        if key in self.values:
+            return self.values[key]
+        return load()
+
+    def invalidate(self, key):
+        self.values.pop(key, None)
+
+
+def test_list_without_store():
+    snapd = FakeSnapd({
+        '/v2/snaps': {'status-code': 200, 'status': 'OK', 'result': [
+            {'name': 'app1', 'summary': 'App 1', 'channel': 'stable', 'version': '1', 'type': 'app'}
+        ]},
+        '/v2/system-info': {'status-code': 200, 'status': 'OK', 'result': {'version': '10'}},
+        '/v2/find?name=*': {'status-code': 400, 'status': 'Bad Request', 'result': {'message': 'store offline'}}
+    })
+    try:
+        client = SnapdClient(snapd.socket_url())
+        snap = Snap(StubPlatformConfig(), StubInfo(), client,
+                    StubStoreCache({'installer_version_stable': '11'}), InstalledSnaps(client))
+        apps = sorted(snap.list(), key=lambda app: app.app.id)
+
+        assert [app.app.id for app in apps] == ['app1', 'installer']
+        assert apps[0].installed_version == '1'
+        assert apps[1].current_version == '11'
+        with pytest.raises(Exception):
+            snap.list(strict=True)
+    finally:
+        snapd.stop()
+
+
+def test_late_result_is_cancelled():
+    executor = ThreadPoolExecutor(max_workers=1)
+    release = threading.Event()
+    executor.submit(release.wait, 5)
+    future = executor.submit(lambda: 'late')
+    try:
+        with pytest.raises(TimeoutError):
+            result(future, time.time() + 0.1)
+        assert future.cancelled()
+    finally:
+        release.set()
+
+
+def test_installer_store_version_has_timeout(monkeypatch):
+    calls = []
+
+    class Response:
+        text = '11'
+
+        def raise_for_status(self):
+            pass
+
+    monkeypatch.setattr(snap_module.requests, 'get', lambda url, **kwargs: calls.append(kwargs) or Response())
+    snap = Snap(StubPlatformConfig(), StubInfo(), None, StubStoreCache({}), None)
+
+    assert snap._installer_store_version('stable') == '11'
+    assert calls == [{'timeout': (snap_module.STORE_CONNECT_TIMEOUT, snap_module.STORE_READ_TIMEOUT)}]
+
+
+def test_get_app_without_store():
+    snapd = FakeSnapd({
+        '/v2/snaps': {'status-code': 200, 'status': 'OK', 'result': [
+            {'name': 'app1', 'summary': 'App 1', 'channel': 'stable', 'version': '1', 'type': 'app'}
+        ]},
+        '/v2/find?name=*': {'status-code': 400, 'status': 'Bad Request', 'result': {'message': 'store offline'}}
+    })
+    try:
+        client = SnapdClient(snapd.socket_url())
+        snap = Snap(StubPlatformConfig(), StubInfo(), client, StubStoreCache({}), InstalledSnaps(client))
+        app = snap.get_app('app1')
+
+        assert app.app.url == 'https://app1.example.com'
+        assert app.installed_version == '1'
+        assert app.current_version is None
+    finally:
+        snapd.stop()
+
+
+def test_install_returns_change_id():
+    snapd = FakeSnapd({
+        '/v2/snaps/app1': {'status-code': 202, 'status': 'Accepted', 'change': '7'}
+    })
+    try:
+        client = SnapdClient(snapd.socket_url())
+        snap = Snap(StubPlatformConfig(), StubInfo(), client, StubStoreCache({}), InstalledSnaps(client))
+
+        assert snap.install('app1') == '7'
+    finally:
+        snapd.stop()
+
+
+def test_upgrade_many_is_one_snapd_change():
+    snapd = FakeSnapd({
+        '/v2/snaps': {'status-code': 202, 'status': 'Accepted', 'change': '8'}
+    })
+    try:
+        client = SnapdClient(snapd.socket_url())
+        snap = Snap(StubPlatformConfig(), StubInfo(), client, StubStoreCache({}), InstalledSnaps(client))
+
+        assert snap.upgrade_many(['app1', 'app2']) == '8'
+        assert snapd.requests == [('POST', '/v2/snaps', {'action': 'refresh', 'snaps': ['app1', 'app2']})]
+    finally:
+        snapd.stop()
+
+
+def test_change_progress():
+    snapd = FakeSnapd({
+        '/v2/changes/7': {'status-code': 200, 'status': 'OK', 'result': {
+            'id': '7', 'kind': 'install-snap', 'summary': 'Install "app1" snap', 'status': 'Doing', 'ready': False,
+            'tasks': [
+                {'kind': 'download-snap', 'summary': 'Download snap "app1"', 'status': 'Doing',
+                 'progress': {'label': 'app1', 'done': 1024, 'total': 4096}},
+                {'kind': 'mount-snap', 'summary': 'Mount snap "app1"', 'status': 'Do',
+                 'progress': {'label': '', 'done': 0, 'total': 1}},
+                {'kind': 'prerequisites', 'summary': 'Ensure prerequisites', 'status': 'Done',
+                 'progress': {'label': '', 'done': 1, 'total': 1}}
+            ]
+        }}
+    })
+    try:
+        client = SnapdClient(snapd.socket_url())
+        snap = Snap(StubPlatformConfig(), StubInfo(), client, StubStoreCache({}), InstalledSnaps(client))
+        change = snap.change('7')
+
+        assert change['status'] == 'Doing'
+        assert not change['ready']
+        assert change['bytes_done'] == 1024
+        assert change['bytes_total'] == 4096
+        assert change['tasks_done'] == 1
+        assert change['tasks_total'] == 3
+        assert change['tasks'][0]['label'] == 'app1'
+    finally:
+        snapd.stop()
+
+
+def test_watch_change_stops_when_ready():
+    snapd = FakeSnapd({
+        '/v2/changes/7': {'status-code': 200, 'status': 'OK', 'result': {
+            'id': '7', 'kind': 'remove-snap', 'status': 'Error', 'ready': True, 'err': 'cannot remove', 'tasks': []
+        }}
+    })
+    try:
+        client = SnapdClient(snapd.socket_url())
+        snap = Snap(StubPlatformConfig(), StubInfo(), client, StubStoreCache({}), InstalledSnaps(client))
+        changes = list(snap.watch_change('7', interval=0))
+
+        assert len(changes) == 1
+        assert changes[0]['err'] == 'cannot remove'
+    finally:
+        snapd.stop()
+
+
+def test_watch_change_heartbeat_and_duration():
+    snapd = FakeSnapd({
+        '/v2/changes/8': {'status-code': 200, 'status': 'OK', 'result': {
+            'id': '8', 'kind': 'install-snap', 'status': 'Doing', 'ready': False, 'tasks': []
+        }}
+    })
+    try:
+        client = SnapdClient(snapd.socket_url())
+        snap = Snap(StubPlatformConfig(), StubInfo(), client, StubStoreCache({}), InstalledSnaps(client))
+        changes = list(snap.watch_change('8', interval=0.01, duration=0.2, heartbeat=0.05))
+
+        assert changes[0]['status'] == 'Doing'
+        assert None in changes
+        assert all(change is None for change in changes[1:])
+    finally:
+        snapd.stop()
@@ -0,0 +1,44 @@
+import json
+
+from syncloudlib import logger
+
+from syncloud_platform.snap.snapd import SnapdClient, endpoint
+from test.snap.snapd_server import FakeSnapd
+
+logger.init(console=True)
+
+
+def test_endpoint():
+    assert endpoint('/v2/snaps/nextcloud') == '/v2/snaps'
+    assert endpoint('/v2/find?name=*') == '/v2/find'
+    assert endpoint('/v2/system-info') == '/v2/system-info'
+
+
+def test_keep_alive():
+    snapd = FakeSnapd({'/v2/snaps': {'status-code': 200, 'status': 'OK', 'result': []}})
+    try:
+        client = SnapdClient(snapd.socket_url())
+        for _ in range(3):
+            assert json.loads(client.get('/v2/snaps').text)['status'] == 'OK'
+        client.post('/v2/snaps/app', {'action': 'install'})
+
+        assert snapd.connections == 1
+        assert snapd.requests[-1] == ('POST', '/v2/snaps/app', {'action': 'install'})
+        stats = client.stats()
+        assert stats['GET /v2/snaps']['count'] == 3
+        assert stats['POST /v2/snaps']['count'] == 1
+    finally:
+        snapd.stop()
+
+
+def test_retry_after_reset():
+    snapd = FakeSnapd({'/v2/snaps': {'status-code': 200, 'status': 'OK', 'result': []}})
+    try:
+        client = SnapdClient(snapd.socket_url())
+        client.get('/v2/snaps')
+        snapd.resets = 1
+
+        assert client.get('/v2/snaps').status_code == 200
+        assert client.stats()['GET /v2/snaps']['errors'] == 1
+    finally:
+        snapd.stop()
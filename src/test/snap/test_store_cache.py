@@ -0,0 +1,61 @@
+import tempfile
+import time
+
+from syncloudlib import logger
+
+from syncloud_platform.snap.store_cache import StoreCache
+
+logger.init(console=True)
+
+
+class Loader:
+    def __init__(self, *values):
+        self.values = list(values)
+        self.calls = 0
+
+    def __call__(self):
+        self.calls += 1
+        value = self.values.pop(0)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+
+def test_fresh_value_is_cached_on_disk():
+    cache_dir = tempfile.mkdtemp()
+    load = Loader(['app1'])
+
+    assert StoreCache(cache_dir).get('apps', load) == ['app1']
+    assert StoreCache(cache_dir).get('apps', load) == ['app1']
+    assert load.calls == 1
+
+
+def test_stale_value_is_served_while_refreshing():
+    cache = StoreCache(tempfile.mkdtemp(), ttl=0)
+    load = Loader(['app1'], ['app2'])
+    cache.get('apps', load)
+    time.sleep(0.01)
+
+    assert cache.get('apps', load) == ['app1']
+    cache.refresh_in_background('apps', load).join()
+    assert StoreCache(cache.cache_dir).get('apps', load) == ['app2']
+
+
+def test_failed_refresh_keeps_stale_value():
+    cache = StoreCache(tempfile.mkdtemp(), ttl=0)
+    load = Loader(['app1'], Exception('store is offline'))
+    cache.get('apps', load)
+
+    cache.refresh_in_background('apps', load).join()
+    assert cache.get('apps', Loader(['app2'])) == ['app1']
+
+
+def test_invalidate():
+    cache = StoreCache(tempfile.mkdtemp())
+    load = Loader(['app1'], ['app2'])
+    cache.get('apps', load)
+    cache.invalidate('apps')
+
+    assert cache.get('apps', load) == ['app1']
+    cache.refresh_in_background('apps', load).join()
+    assert cache.get('apps', load) == ['app2']
@@ -1,4 +1,10 @@
-from syncloud_platform.device import parse_username
+from syncloudlib import logger
+
+from syncloud_platform.config.user_config import PlatformUserConfig
+from syncloud_platform.device import Device, parse_username
+from test.insider.helpers import get_user_platform_config
+
+logger.init(console=True)
 
 
 def test_parse_username_from_username():
@@ -19,3 +25,27 @@ def test_parse_username_from_domain_fallback():
     name, email = parse_username(username, domain)
     assert name == 'test'
     assert email == 'test@example.com'
+
+
+class CommittedStateRecorder:
+    def __init__(self, config_db):
+        self.config_db = config_db
+        self.domains = []
+
+    def record(self, *args):
+        # a separate connection, like an app hook or another uwsgi worker
+        self.domains.append(PlatformUserConfig(self.config_db).get_custom_domain())
+
+    remove = create = generate_self_signed_certificate = reset = init_config = reload_public = record
+
+
+def test_activation_side_effects_see_committed_config():
+    user_config = get_user_platform_config()
+    recorder = CommittedStateRecorder(user_config.config_db)
+    device = Device(None, user_config, None, None, recorder, recorder, None, recorder, recorder)
+    device._check_internet_connection = lambda: None
+
+    device.activate_custom_domain('Example.COM', 'user', 'password')
+
+    assert recorder.domains == ['example.com'] * 6
+    assert user_config.is_activated()
@@ -0,0 +1,105 @@
+import marshal
+import os
+import sqlite3
+import subprocess
+import tempfile
+from os.path import join
+
+from flask import Flask, jsonify
+from syncloudlib import logger
+
+from syncloud_platform import metrics as calls
+from syncloud_platform.metrics import Metrics
+from syncloud_platform.rest.flask_metrics import instrument
+from syncloud_platform.snap.snapd import SnapdClient
+from test.snap.snapd_server import FakeSnapd
+
+logger.init(console=True)
+
+
+def create_app(metrics, snapd):
+    app = Flask(__name__)
+    instrument(app, 'public', metrics)
+
+    @app.route('/rest/app/<name>')
+    def app_status(name):
+        connection = sqlite3.connect(':memory:')
+        connection.set_trace_callback(calls.count_sqlite)
+        connection.execute('select 1')
+        connection.close()
+        subprocess.check_output(['true'])
+        SnapdClient(snapd.socket_url()).get('/v2/snaps')
+        return jsonify(success=True), 200
+
+    @app.route('/rest/fail')
+    def fail():
+        raise Exception('failed')
+
+    return app.test_client()
+
+
+def test_route_metrics():
+    snapd = FakeSnapd()
+    try:
+        metrics = Metrics(tempfile.mkdtemp())
+        client = create_app(metrics, snapd)
+        client.get('/rest/app/files')
+        client.get('/rest/app/mail')
+        client.get('/rest/fail')
+
+        text = metrics.render()
+    finally:
+        snapd.stop()
+
+    assert 'platform_http_requests_total{app="public",route="/rest/app/<name>",method="GET",status="200"} 2' in text
+    assert 'platform_http_requests_total{app="public",route="/rest/fail",method="GET",status="500"} 1' in text
+    assert 'platform_http_request_duration_seconds_count{app="public",route="/rest/app/<name>"} 2' in text
+    assert 'platform_http_request_calls_total{app="public",route="/rest/app/<name>",kind="sqlite"} 2' in text
+    assert 'platform_http_request_calls_total{app="public",route="/rest/app/<name>",kind="http"} 2' in text
+    assert 'platform_http_request_calls_total{app="public",route="/rest/app/<name>",kind="subprocess"} 2' in text
+    assert 'platform_http_requests_in_flight{app="public"} 0' in text
+
+
+def test_other_workers_are_merged():
+    metrics_dir = tempfile.mkdtemp()
+    other = dict(requests={('api', '/port/add', 'POST', '200'): 3},
+                 durations={('api', '/port/add'): [0] * 12 + [3, 1.5, 3]},
+                 calls={('api', '/port/add', 'subprocess'): 6},
+                 in_flight={'api': 1})
+    with open(join(metrics_dir, '999999999.marshal'), 'wb') as f:
+        marshal.dump(other, f)
+
+    text = Metrics(metrics_dir).render()
+
+    assert 'platform_http_requests_total{app="api",route="/port/add",method="POST",status="200"} 3' in text
+    assert 'platform_http_request_duration_seconds_bucket{app="api",route="/port/add",le="60.0"} 3' in text
+    assert 'platform_http_request_calls_total{app="api",route="/port/add",kind="subprocess"} 6' in text
+    assert 'platform_http_requests_in_flight{app="api"}' not in text
+
+
+def test_dead_workers_are_retired():
+    metrics_dir = tempfile.mkdtemp()
+    dead = dict(requests={('api', '/port/add', 'POST', '200'): 3}, durations={}, calls={}, in_flight={'api': 1})
+    for pid in ['999999998', '999999999']:
+        with open(join(metrics_dir, '{0}.marshal'.format(pid)), 'wb') as f:
+            marshal.dump(dead, f)
+
+    first = Metrics(metrics_dir).render()
+    second = Metrics(metrics_dir).render()
+
+    assert 'platform_http_requests_total{app="api",route="/port/add",method="POST",status="200"} 6' in first
+    assert first == second
+    assert sorted(f for f in os.listdir(metrics_dir) if f.endswith('.marshal')) == ['retired.marshal']
+
+
+def test_reused_pid_keeps_dead_worker_counts():
+    metrics_dir = tempfile.mkdtemp()
+    dead = dict(requests={('api', '/port/add', 'POST', '200'): 3}, durations={}, calls={}, in_flight={})
+    with open(join(metrics_dir, '{0}.marshal'.format(os.getpid())), 'wb') as f:
+        marshal.dump(dead, f)
+
+    metrics = Metrics(metrics_dir)
+    metrics.begin('api')
+    metrics.end('api', '/port/add', 'POST', 200, 0.1)
+
+    assert 'platform_http_requests_total{app="api",route="/port/add",method="POST",status="200"} 4' in metrics.render()
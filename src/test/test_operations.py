@@ -0,0 +1,128 @@
+import os
+import tempfile
+import threading
+
+from syncloudlib import logger
+
+from syncloud_platform.operations import Operations, DONE, ERROR, is_valid_id, bind
+
+logger.init(console=True)
+
+
+def wait(operations, id):
+    for _ in range(100):
+        operation = operations.get(id)
+        if operation['status'] in [DONE, ERROR]:
+            return operation
+        threading.Event().wait(0.05)
+    raise Exception('operation is not complete')
+
+
+def test_result_and_log():
+    operations = Operations(tempfile.mkdtemp())
+
+    def work(value):
+        logger.get_logger('work').info('working on {0}'.format(value))
+        return value * 2
+
+    operation = wait(operations, operations.submit('work', work, 21))
+
+    assert operation['status'] == DONE
+    assert operation['result'] == 42
+    assert any('working on 21' in line for line in operation['log'])
+
+
+def test_error():
+    operations = Operations(tempfile.mkdtemp())
+
+    def work():
+        raise Exception('certbot failed')
+
+    operation = wait(operations, operations.submit('work', work))
+
+    assert operation['status'] == ERROR
+    assert operation['message'] == 'certbot failed'
+
+
+def test_status_is_shared_between_workers():
+    operations_dir = tempfile.mkdtemp()
+    id = Operations(operations_dir).submit('work', lambda: 'ok')
+
+    assert wait(Operations(operations_dir), id)['result'] == 'ok'
+
+
+def test_log_of_other_threads_is_not_captured():
+    operations = Operations(tempfile.mkdtemp())
+    started = threading.Event()
+    release = threading.Event()
+
+    def work():
+        started.set()
+        release.wait(5)
+
+    id = operations.submit('work', work)
+    started.wait(5)
+    logger.get_logger('other').info('unrelated request')
+    release.set()
+
+    assert not any('unrelated request' in line for line in wait(operations, id)['log'])
+
+
+def test_log_of_bound_threads_is_captured():
+    operations = Operations(tempfile.mkdtemp())
+
+    def probe():
+        logger.get_logger('probe').info('probing in another thread')
+
+    def work():
+        thread = threading.Thread(target=bind(probe))
+        thread.start()
+        thread.join()
+
+    operation = wait(operations, operations.submit('work', work))
+
+    assert any('probing in another thread' in line for line in operation['log'])
+
+
+def test_cleanup_keeps_active_operations():
+    operations_dir = tempfile.mkdtemp()
+    operations = Operations(operations_dir, keep=1)
+    started = threading.Event()
+    release = threading.Event()
+
+    def work():
+        started.set()
+        release.wait(5)
+
+    running = operations.submit('work', work)
+    started.wait(5)
+    done = [wait(operations, operations.submit('work', lambda: 'ok'))['id'] for _ in range(3)]
+    files = os.listdir(operations_dir)
+    release.set()
+
+    assert '{0}.json'.format(running) in files
+    assert '{0}.json'.format(done[0]) not in files
+    assert '{0}.log'.format(done[0]) not in files
+    assert wait(operations, running)['status'] == DONE
+
+
+def test_missing_status_is_recreated():
+    operations = Operations(tempfile.mkdtemp(), workers=1)
+    release = threading.Event()
+
+    def work():
+        release.wait(5)
+        return 'ok'
+
+    blocking = operations.submit('work', work)
+    id = operations.submit('work', work)
+    os.remove(operations._filename(id, 'json'))
+    release.set()
+
+    assert wait(operations, blocking)['result'] == 'ok'
+    assert wait(operations, id)['result'] == 'ok'
+
+
+def test_invalid_id():
+    assert not is_valid_id('../../etc/passwd')
+    assert Operations(tempfile.mkdtemp()).get('../../etc/passwd') is None
@@ -0,0 +1,15 @@
+import os
+import subprocess
+
+from syncloud_platform.process import is_alive
+
+
+def test_is_alive():
+    assert is_alive(os.getpid())
+
+
+def test_is_not_alive():
+    process = subprocess.Popen(['true'])
+    process.wait()
+
+    assert not is_alive(process.pid)
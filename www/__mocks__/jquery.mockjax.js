@@ -4,7 +4,8 @@ var mockjax = require('jquery-mockjax')(jquery, window);
 export const State = {
     available_apps_success: true,
     disk_action_success: true,
-    job_status_running: false
+    job_status_running: false,
+    operation_status_available: true
 }
 
 const disks_data = {
@@ -66,13 +67,17 @@ const boot_disk_data = {
     };
 
 
-const access_data = {
+export const access_data = {
         error_toggle: false,
         "data": {
             "external_access": true,
             "upnp_available": false,
             "upnp_enabled": true,
             "upnp_message": "not used",
+            "mapper": null,
+            "mapper_external_ip": null,
+            "mapper_checked": 1500000000.0,
+            "mapper_probing": false,
             "public_ip": "111.111.111.111"
         },
         "success": true
@@ -142,7 +147,8 @@ function set_access(settings) {
             port_mappings_data.port_mappings[1].external_port = settings.data.access_port;
         }
         this.responseText = {
-            "success": true
+            "success": true,
+            "operation_id": "1"
         };
     } else {
         this.responseText = {
@@ -177,6 +183,29 @@ mockjax({
     responseText: disks_data
 });
 
+function network_page(settings) {
+    this.responseText = {
+        success: true,
+        data: {
+            access: access_data.data,
+            port_mappings: port_mappings_data.port_mappings,
+            interfaces: network_interfaces_data.data.interfaces
+        }
+    };
+}
+
+mockjax({
+    url: '/rest/page/network',
+    dataType: "json",
+    response: network_page
+});
+
+mockjax({
+    url: '/rest/page/storage',
+    dataType: "json",
+    responseText: {success: true, data: {disks: disks_data.disks, boot_disk: boot_disk_data.data}}
+});
+
 mockjax({
     url: '/rest/settings/boot_disk',
     dataType: "json",
@@ -202,12 +231,27 @@ mockjax({
 
 function disk_response(settings) {
       if (State.disk_action_success) {
-        this.responseText = disks_data;
+        this.responseText = {success: true, operation_id: '1'};
       } else {
         this.responseText = disks_data_error;
       }
     }
 
+function operation_response(settings) {
+    if (State.operation_status_available) {
+        this.responseText = {success: true, data: {id: '1', status: 'done', result: null}};
+    } else {
+        this.status = 502;
+        this.responseText = 'Bad Gateway';
+    }
+}
+
+mockjax({
+    url: '/rest/operation',
+    dataType: "json",
+    response: operation_response
+});
+
 mockjax({
     url: '/rest/settings/disk_activate',
     dataType: "json",
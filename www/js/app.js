@@ -20,12 +20,13 @@ function load_app(app_id, on_complete, on_error) {
     $.get('/rest/app', {app_id: app_id}).done(on_complete).fail(on_error);
 };
 
-export function run_app_action(url, app_id, status_url, status_predicate, on_complete, on_error) {
+export function run_app_action(url, app_id, status_url, status_predicate, on_progress, on_complete, on_error) {
     $.get(url, { app_id: app_id })
         .always((data) => {
             Common.check_for_service_error(data, () => {
-                Common.run_after_job_is_complete(
-                    setTimeout,
+                Common.run_after_change_is_complete(
+                    data.change_id,
+                    on_progress,
                     on_complete,
                     on_error,
                     status_url,
@@ -96,6 +97,9 @@ function ui_display_app(data) {
             app_id,
             Common.INSTALLER_STATUS_URL,
             Common.DEFAULT_STATUS_PREDICATE,
+            (change) => {
+                btn.text(Common.change_percent(change) + '%');
+            },
             () => {
                 btn.button('reset');
                 ui_load_app();
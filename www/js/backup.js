@@ -34,13 +34,14 @@ const gridOptions = {
         },
         {
             headerName: 'Actions',
-            width: 100,
+            width: 140,
             resizable: false,
             cellRenderer: (params) => { 
               var div = document.createElement('div');
               div.innerHTML = `
                 <i class='fa fa-undo' style='padding-left: 20px;  cursor:pointer;'></i>
                 <i class='fa fa-trash' style='padding-left: 20px;  cursor:pointer;'></i>
+                <i class='fa fa-download' style='padding-left: 20px;  cursor:pointer;'></i>
              `;
               var buttons = div.querySelectorAll('i');
               buttons[0].addEventListener('click', () => { 
@@ -57,6 +58,9 @@ const gridOptions = {
                 $('#confirm_question').html('Do you want to remove: ' + params.data.file + '?');
                 $('#backup_action_confirmation').modal('show');
               }); 
+              buttons[2].addEventListener('click', () => { 
+                window.location.href = '/rest/backup/download?file=' + encodeURIComponent(params.data.file);
+              }); 
               return div;
             }
         },
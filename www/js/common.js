@@ -46,6 +46,79 @@ export function run_after_job_is_complete(timeout_func, on_complete, on_error, s
 
 }
 
+export const OPERATION_STATUS_URL = '/rest/operation';
+
+export function operation_error(operation) {
+    return { status: 200, responseJSON: { success: false, message: operation.message } };
+}
+
+export function run_after_operation_is_complete(timeout_func, operation_id, on_complete, on_error) {
+
+    var recheck_function = function () { run_after_operation_is_complete(timeout_func, operation_id, on_complete, on_error); };
+
+    var recheck_timeout = 1000;
+    $.getJSON(OPERATION_STATUS_URL, { id: operation_id })
+     .done(function(resp) {
+            var operation = resp.data;
+            if (operation.status == 'done') {
+                on_complete(operation.result);
+            } else if (operation.status == 'error') {
+                on_error(operation_error(operation), {}, {});
+            } else {
+                timeout_func(recheck_function, recheck_timeout);
+            }
+        })
+     .fail(on_error);
+
+}
+
+export const CHANGE_STREAM_URL = '/rest/change/stream';
+
+export function change_percent(change) {
+    if (change.bytes_total > 0) {
+        return Math.floor(100 * change.bytes_done / change.bytes_total);
+    }
+    if (change.tasks_total > 0) {
+        return Math.floor(100 * change.tasks_done / change.tasks_total);
+    }
+    return 0;
+}
+
+export function run_after_change_is_complete(change_id, on_progress, on_complete, on_error, status_url, status_predicate) {
+
+    var poll = function () { run_after_job_is_complete(setTimeout, on_complete, on_error, status_url, status_predicate); };
+
+    if (!change_id || typeof EventSource === 'undefined') {
+        poll();
+        return;
+    }
+
+    var source = new EventSource(CHANGE_STREAM_URL + '?id=' + encodeURIComponent(change_id));
+    source.onmessage = function (event) {
+        var change = JSON.parse(event.data);
+        on_progress(change);
+        if (change.ready) {
+            source.close();
+            if (change.status == 'Error') {
+                on_error({ status: 200, responseJSON: { success: false, message: change.err } }, {}, {});
+            } else {
+                on_complete();
+            }
+        }
+    };
+    source.addEventListener('reconnect', function () {
+        //Server ends long streams, a new one starts with the current state
+        source.close();
+        run_after_change_is_complete(change_id, on_progress, on_complete, on_error, status_url, status_predicate);
+    });
+    source.onerror = function () {
+        //Stream is gone or refused (e.g. platform restarted during its own upgrade), keep tracking by polling
+        source.close();
+        poll();
+    };
+
+}
+
 export function find_app(apps_data, app_id) {
     for (var app_data of apps_data) {
         if (app_data.app.id == app_id) {
@@ -64,12 +137,24 @@ export function get_value(values, name) {
     return null;
 }
 
+export function run_operation(url, parameters, on_always, on_error) {
+    var on_failure = function (xhr, textStatus, errorThrown) {
+        on_always();
+        on_error(xhr, textStatus, errorThrown);
+    };
+    $.get(url, parameters)
+        .done(function (data) {
+            check_for_service_error(data, function () {
+                run_after_operation_is_complete(setTimeout, data.operation_id, on_always, on_failure);
+            }, on_failure);
+        })
+        .fail(on_failure);
+}
+
 export function send_logs(include_support, on_always, on_error) {
-    $.get('/rest/send_log',
-      { include_support: include_support }
-    ).always(on_always).fail(on_error);
+    run_operation('/rest/send_log', { include_support: include_support }, on_always, on_error);
 }
 
 export function send_log(on_always, on_error) {
-    $.get('/rest/send_log').always(on_always).fail(on_error);
+    run_operation('/rest/send_log', {}, on_always, on_error);
 }
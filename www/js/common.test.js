@@ -36,3 +36,44 @@ test( "backup job status predicate is not running", () => {
   expect(is_running).toEqual(false);
 });
 
+
+test( "change percent uses downloaded bytes", () => {
+  const change = {bytes_done: 25, bytes_total: 100, tasks_done: 0, tasks_total: 4};
+  expect(Common.change_percent(change)).toEqual(25);
+});
+
+test( "change percent falls back to tasks", () => {
+  const change = {bytes_done: 0, bytes_total: 0, tasks_done: 1, tasks_total: 4};
+  expect(Common.change_percent(change)).toEqual(25);
+});
+
+test( "change without id is polled", () => {
+  var on_complete_count = 0;
+  Common.run_after_change_is_complete(
+      undefined,
+      function(change) {},
+      function() {
+          on_complete_count += 1;
+      },
+      function(a, b, c) {},
+      Common.INSTALLER_STATUS_URL,
+      (resp) => { return false; }
+      );
+
+  expect(on_complete_count).toEqual(1);
+});
+
+test( "operation is complete", () => {
+  $.ajaxSetup({ async: false });
+  var on_complete_count = 0;
+  Common.run_after_operation_is_complete(
+      function(func, timeout) { func(); },
+      '1',
+      function(result) {
+          on_complete_count += 1;
+      },
+      function(a, b, c) {}
+      );
+
+  expect(on_complete_count).toEqual(1);
+});
@@ -12,16 +12,8 @@ import './ui/menu.js'
 import * as Common from './common.js'
 import Templates from './network.templates.js'
 
-function check_access(on_complete, on_error) {
-    $.get('/rest/access/access').done(on_complete).fail(on_error);
-}
-
-function network_interfaces(on_complete, on_error) {
-    $.get('/rest/access/network_interfaces').done(on_complete).fail(on_error);
-}
-
-function port_mappings(on_complete, on_error) {
-    $.get('/rest/access/port_mappings').done(on_complete).fail(on_error);
+export function network_page(on_complete, on_error) {
+    $.get('/rest/page/network').done(on_complete).fail(on_error);
 }
 
 function ui_display_toggles() {
@@ -87,13 +79,17 @@ function ui_display_access(data) {
     $('#tgl_upnp').bootstrapSwitch('state', access_data.upnp_enabled);
     $("#tgl_upnp_loading").removeClass('opacity-visible');
 
-    if (access_data.upnp_available) {
+    if (access_data.mapper_probing) {
+        $("#tgl_upnp_loading").addClass('opacity-visible');
+    }
+
+    if (access_data.upnp_available || access_data.mapper_probing) {
         $("#upnp_warning").hide('slow');
     } else {
         $("#upnp_warning").show('slow');
     }
     
-    if (access_data.upnp_available) {
+    if (access_data.upnp_available || access_data.mapper_probing) {
         $("#label_upnp").css("color", "black");
     } else {
         $("#label_upnp").css("color", "red");
@@ -127,20 +123,18 @@ function ui_check_access() {
     $("#tgl_ip_autodetect_loading").addClass('opacity-visible');
     $('#btn_save').button('loading');
 
-    check_access(
+    network_page(
         (data) => {
             Common.check_for_service_error(
                 data,
-                () => ui_display_access(data), 
+                () => {
+                    ui_display_access({ data: data.data.access });
+                    ui_display_port_mappings({ port_mappings: data.data.port_mappings });
+                    ui_display_network({ data: { interfaces: data.data.interfaces } });
+                },
                 UiCommon.ui_display_error);
         },
         UiCommon.ui_display_error);
-
-    port_mappings(ui_display_port_mappings, UiCommon.ui_display_error);
-}
-
-function ui_check_network() {
-    network_interfaces(ui_display_network, UiCommon.ui_display_error);
 }
 
 function ui_prepare_external_access() {
@@ -199,7 +193,22 @@ export function set_access(
             request_data.public_ip = public_ip;
         }
         $.get('/rest/access/set_access', request_data)
-            .done(on_complete)
+            .done(function (data) {
+                Common.check_for_service_error(data, function () {
+                    Common.run_after_operation_is_complete(
+                        setTimeout,
+                        data.operation_id,
+                        function () { on_complete(data); },
+                        function (xhr, textStatus, errorThrown) {
+                            // network and non json errors have no responseJSON
+                            var response = xhr.responseJSON;
+                            if (response === undefined) {
+                                response = { success: false, message: textStatus };
+                            }
+                            on_complete(response);
+                        });
+                }, function () { on_complete(data); });
+            })
             .fail(on_error);
     };
     
@@ -283,6 +292,5 @@ $(document).ready(function () {
     });
 
     ui_check_access();
-    ui_check_network();
 
 });
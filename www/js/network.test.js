@@ -1,5 +1,5 @@
 import * as Network from './network.js'
-import { State } from '../__mocks__/jquery.mockjax.js'
+import { State, access_data } from '../__mocks__/jquery.mockjax.js'
 
 test('network save access', () => {
   $.ajaxSetup({ async: false });
@@ -17,3 +17,36 @@ test('network save access', () => {
       );
   expect(response).toBeDefined();
 });
+
+test('network page', () => {
+  $.ajaxSetup({ async: false });
+  var response;
+  Network.network_page(
+        function (data) {
+            response = data;
+        },
+        function () {}
+      );
+  expect(response.data.access).toBeDefined();
+  expect(response.data.port_mappings.length).toEqual(2);
+});
+
+test('network save access without operation status', () => {
+  $.ajaxSetup({ async: false });
+  access_data.error_toggle = false;
+  State.operation_status_available = false;
+  var response;
+  Network.set_access(true,
+        true,
+        true,
+        '1.1.1.1',
+        80,
+        443,
+        function (data) {
+            response = data;
+        },
+        function () {}
+      );
+  State.operation_status_available = true;
+  expect(response).toEqual({ success: false, message: 'error' });
+});
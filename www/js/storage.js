@@ -24,6 +24,10 @@ function update_boot_disk(on_complete, on_error) {
     $.get('/rest/settings/boot_disk').done(on_complete).fail(on_error);
 }
 
+export function storage_page(on_complete, on_error) {
+    $.get('/rest/page/storage').done(on_complete).fail(on_error);
+}
+
 export function boot_extend(on_complete, on_error) {
     $.post('/rest/storage/boot_extend')
         .done(function (data) {
@@ -46,15 +50,7 @@ export function boot_extend(on_complete, on_error) {
 
 export function disk_action(disk_device, is_activate, on_always, on_error) {
     var mode = is_activate ? "disk_activate" : "disk_deactivate";
-    $.get('/rest/settings/' + mode, {device: disk_device})
-        .done(function(data) {
-              Common.check_for_service_error(
-                  data,
-                  function() {},
-                  on_error);
-          })
-        .always(on_always)
-        .fail(on_error);
+    Common.run_operation('/rest/settings/' + mode, {device: disk_device}, on_always, on_error);
 }
 
 
@@ -189,14 +185,16 @@ function ui_check_disks() {
 		update_disks(ui_display_disks, UiCommon.ui_display_error);
 }
 
-function ui_check_boot_disk() {
-		update_boot_disk(ui_display_boot_disk, UiCommon.ui_display_error);
+function ui_load_page() {
+		storage_page((data) => {
+		    ui_display_disks({ disks: data.data.disks });
+		    ui_display_boot_disk({ data: data.data.boot_disk });
+		}, UiCommon.ui_display_error);
 }
 
 $(document).ready(function () {
     if (typeof mock !== 'undefined') { console.log("backend mock") };
     UiCommon.check_activation_status();
-    ui_check_disks();
-    ui_check_boot_disk();
+    ui_load_page();
 
 });
@@ -22,8 +22,9 @@ export function platform_upgrade(on_complete, on_error) {
     $.get('/rest/upgrade', { app_id: 'platform' })
         .done(function (data) {
                       Common.check_for_service_error(data, function () {
-                          Common.run_after_job_is_complete(
-                              setTimeout,
+                          Common.run_after_change_is_complete(
+                              data.change_id,
+                              function (change) {},
                               function () {
                                   get_versions(
                                        on_complete,